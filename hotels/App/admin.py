@@ -1,9 +1,11 @@
 from django.contrib import admin
-from .models import Hotel, TypeChambre, Chambre, Client, Reservation, Occupation
+from .models import Hotel, TypeChambre, Chambre, HotelTypeChambre, Client, Reservation, Occupation, DailyOccupancy
 
 admin.site.register(Hotel)
 admin.site.register(TypeChambre)
 admin.site.register(Chambre)
+admin.site.register(HotelTypeChambre)
 admin.site.register(Client)
 admin.site.register(Reservation)
 admin.site.register(Occupation)
+admin.site.register(DailyOccupancy)
@@ -0,0 +1,119 @@
+"""
+Attribution de chambres concrètes aux réservations.
+
+Une Reservation ne donne que l'hôtel, le type et le nombre de chambres.
+L'allocateur choisit les chambres par « best fit » : parmi les chambres du
+type libres pour le séjour, il prend celles dont le trou libre autour du
+séjour est le plus serré. Les grands trous restent disponibles pour les
+longs séjours à venir, et le calendrier se fragmente moins.
+"""
+import heapq
+import random
+from collections import namedtuple
+from datetime import timedelta
+from itertools import count
+
+from .availability import AvailabilityIndex
+
+Affectation = namedtuple("Affectation", "reservation chambres")
+
+BEST_FIT = "best_fit"
+FIRST_FIT = "first_fit"
+
+
+class RoomAllocator:
+    """Attribue des chambres à partir d'une copie privée de l'index de disponibilité."""
+
+    def __init__(self, chambres, index=None, strategie=BEST_FIT, seed=None):
+        # chambres : itérable de (chambre_pk, hotel_pk, type_pk)
+        self.index = index if index is not None else AvailabilityIndex()
+        self.strategie = strategie
+        self._rng = random.Random(seed)
+        self._par_type = {}
+        for pk, hotel_id, type_id in chambres:
+            self._par_type.setdefault((hotel_id, type_id), []).append(pk)
+        # Clés négatives : ne se confondent pas avec les Occupation.pk de l'index
+        self._cles = count(-1, -1)
+
+    @classmethod
+    def depuis_base(cls, **kwargs):
+        from .models import Chambre, Occupation
+
+        chambres = Chambre.objects.values_list("pk", "num_ho_id", "num_ty_id")
+        index = AvailabilityIndex.from_queryset(Occupation.objects.all())
+        return cls(chambres, index=index, **kwargs)
+
+    def _perte(self, chambre_id, date_a, date_d):
+        """Clé de tri best fit : (côtés non bornés du trou, temps libre perdu autour du séjour)."""
+        trou = self.index.room(chambre_id).gap(date_a, date_d)
+        if trou is None:
+            return None
+        avant, apres = trou
+        non_bornes = 0
+        perte = timedelta()
+        if avant is None:
+            non_bornes += 1
+        else:
+            perte += date_a - avant
+        if apres is None:
+            non_bornes += 1
+        else:
+            perte += apres - date_d
+        return non_bornes, perte
+
+    def choisir(self, hotel_id, type_id, date_a, date_d, nb_chambres=1):
+        """Chambres retenues pour le séjour, ou None s'il n'y en a pas assez de libres."""
+        candidates = self._par_type.get((hotel_id, type_id), [])
+        if self.strategie == FIRST_FIT:
+            candidates = candidates[:]
+            self._rng.shuffle(candidates)
+            libres = [pk for pk in candidates if self.index.is_free(pk, date_a, date_d)]
+            return libres[:nb_chambres] if len(libres) >= nb_chambres else None
+
+        scores = []
+        for pk in candidates:
+            perte = self._perte(pk, date_a, date_d)
+            if perte is not None:
+                scores.append((perte, pk))
+        if len(scores) < nb_chambres:
+            return None
+        return [pk for _, pk in heapq.nsmallest(nb_chambres, scores)]
+
+    def allouer(self, hotel_id, type_id, date_a, date_d, nb_chambres=1):
+        chambres = self.choisir(hotel_id, type_id, date_a, date_d, nb_chambres)
+        if chambres is not None:
+            for pk in chambres:
+                self.index.add(next(self._cles), pk, date_a, date_d)
+        return chambres
+
+    def allouer_lot(self, reservations, plus_longs_dabord=True):
+        """Attribue des chambres à un lot de réservations ; renvoie (affectations, refusees).
+
+        Par défaut les plus longs séjours sont placés d'abord ; sinon les
+        réservations sont traitées dans leur ordre d'arrivée.
+        """
+        if plus_longs_dabord:
+            reservations = sorted(reservations, key=lambda r: (-r.nb_jours, r.date_a))
+        affectations, refusees = [], []
+        for reservation in reservations:
+            date_d = reservation.date_a + timedelta(days=reservation.nb_jours)
+            chambres = self.allouer(reservation.num_ho_id, reservation.num_ty_id,
+                                    reservation.date_a, date_d, reservation.nb_chambres)
+            if chambres is None:
+                refusees.append(reservation)
+            else:
+                affectations.append(Affectation(reservation, chambres))
+        return affectations, refusees
+
+
+def occupations(affectations):
+    """Occupation (non enregistrées) correspondant aux affectations."""
+    from .models import Occupation
+
+    return [
+        Occupation(num_cl_id=a.reservation.num_cl_id, num_ho_id=a.reservation.num_ho_id,
+                   num_ch_id=pk, date_a=a.reservation.date_a,
+                   date_d=a.reservation.date_a + timedelta(days=a.reservation.nb_jours))
+        for a in affectations
+        for pk in a.chambres
+    ]
@@ -0,0 +1,164 @@
+"""
+Index de disponibilité en mémoire : une liste triée d'intervalles par chambre.
+
+Les occupations d'une même chambre sont disjointes (contrainte C2), donc les
+dates d'arrivée et de départ sont triées dans le même ordre : « la chambre
+est-elle libre ? » se résout par une recherche dichotomique au lieu d'un
+parcours de la table Occupation.
+
+Les intervalles sont semi-ouverts [date_a, date_d) : une chambre libérée le
+matin peut être réoccupée le même jour.
+"""
+from bisect import bisect_left, bisect_right
+from threading import RLock
+
+
+class RoomIntervals:
+    """Occupations d'une chambre, triées par date d'arrivée."""
+
+    __slots__ = ("starts", "ends", "pks")
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        self.pks = []
+
+    def __len__(self):
+        return len(self.starts)
+
+    def add(self, pk, date_a, date_d):
+        i = bisect_right(self.starts, date_a)
+        self.starts.insert(i, date_a)
+        self.ends.insert(i, date_d)
+        self.pks.insert(i, pk)
+
+    def append(self, pk, date_a, date_d):
+        # Chargement initial : les lignes arrivent déjà triées par date_a
+        self.starts.append(date_a)
+        self.ends.append(date_d)
+        self.pks.append(pk)
+
+    def remove(self, pk, date_a):
+        i = bisect_left(self.starts, date_a)
+        while i < len(self.starts) and self.starts[i] == date_a:
+            if self.pks[i] == pk:
+                del self.starts[i]
+                del self.ends[i]
+                del self.pks[i]
+                return True
+            i += 1
+        return False
+
+    def is_free(self, date_a, date_d):
+        # Seule la dernière occupation qui commence avant date_d peut chevaucher
+        i = bisect_left(self.starts, date_d)
+        return i == 0 or self.ends[i - 1] <= date_a
+
+    def gap(self, date_a, date_d):
+        """Trou libre (fin précédente, début suivant) contenant le séjour, ou None s'il est occupé.
+
+        None aux extrémités signifie que le trou n'est pas borné de ce côté.
+        """
+        i = bisect_left(self.starts, date_d)
+        if i > 0 and self.ends[i - 1] > date_a:
+            return None
+        previous_end = self.ends[i - 1] if i > 0 else None
+        next_start = self.starts[i] if i < len(self.starts) else None
+        return previous_end, next_start
+
+    def next_free(self, date_a, duree):
+        """Première date >= date_a à partir de laquelle la chambre est libre pendant `duree`."""
+        i = bisect_right(self.starts, date_a)
+        debut = date_a
+        if i > 0 and self.ends[i - 1] > debut:
+            debut = self.ends[i - 1]
+        while i < len(self.starts) and self.starts[i] < debut + duree:
+            debut = max(debut, self.ends[i])
+            i += 1
+        return debut
+
+
+class AvailabilityIndex:
+    """Un RoomIntervals par chambre (clé : Chambre.pk), plus un accès direct par Occupation.pk."""
+
+    def __init__(self):
+        self._rooms = {}
+        self._occupations = {}
+        self._lock = RLock()
+
+    @classmethod
+    def from_queryset(cls, queryset, chunk_size=10000):
+        index = cls()
+        rows = (queryset.order_by("num_ch_id", "date_a")
+                .values_list("pk", "num_ch_id", "date_a", "date_d")
+                .iterator(chunk_size=chunk_size))
+        for pk, chambre_id, date_a, date_d in rows:
+            room = index._rooms.get(chambre_id)
+            if room is None:
+                room = index._rooms[chambre_id] = RoomIntervals()
+            room.append(pk, date_a, date_d)
+            index._occupations[pk] = (chambre_id, date_a, date_d)
+        return index
+
+    def __len__(self):
+        return len(self._occupations)
+
+    def add(self, pk, chambre_id, date_a, date_d):
+        with self._lock:
+            # Une occupation modifiée remplace l'ancienne version
+            self.discard(pk)
+            room = self._rooms.get(chambre_id)
+            if room is None:
+                room = self._rooms[chambre_id] = RoomIntervals()
+            room.add(pk, date_a, date_d)
+            self._occupations[pk] = (chambre_id, date_a, date_d)
+
+    def discard(self, pk):
+        with self._lock:
+            ancienne = self._occupations.pop(pk, None)
+            if ancienne is None:
+                return False
+            chambre_id, date_a, _ = ancienne
+            room = self._rooms[chambre_id]
+            room.remove(pk, date_a)
+            if not room:
+                del self._rooms[chambre_id]
+            return True
+
+    def room(self, chambre_id):
+        return self._rooms.get(chambre_id) or RoomIntervals()
+
+    def is_free(self, chambre_id, date_a, date_d):
+        room = self._rooms.get(chambre_id)
+        return room is None or room.is_free(date_a, date_d)
+
+    def next_free(self, chambre_id, date_a, duree):
+        room = self._rooms.get(chambre_id)
+        return date_a if room is None else room.next_free(date_a, duree)
+
+
+# --- Instance partagée du processus ---
+_index = None
+_index_lock = RLock()
+
+
+def get_index():
+    """Index du processus, construit depuis Occupation au premier appel."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                from .models import Occupation
+                _index = AvailabilityIndex.from_queryset(Occupation.objects.all())
+    return _index
+
+
+def loaded_index():
+    """Index déjà construit, ou None (les signaux n'ont alors rien à mettre à jour)."""
+    return _index
+
+
+def reset_index():
+    global _index
+    with _index_lock:
+        _index = None
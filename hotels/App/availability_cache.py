@@ -0,0 +1,285 @@
+"""
+Cache des disponibilités par (hôtel, type de chambre, semaine ISO).
+
+Chaque entrée garde, pour chaque chambre du type, un masque de 7 bits des
+nuits occupées dans la semaine. Une recherche sur plusieurs semaines
+combine les entrées concernées ; les signaux sur Occupation et Chambre
+n'invalident que les semaines touchées.
+
+lot() sert plusieurs entrées à la fois et lit toutes les absentes en un
+seul appel au chargeur : pour une ville, charger_ville fait deux requêtes
+quel que soit le nombre d'hôtels.
+
+Réglage dans settings.py :
+
+    AVAILABILITY_CACHE = {"MAX_BYTES": 16 * 1024 * 1024, "TIMEOUT": 60}
+
+Une entrée est chargée hors du verrou. Chaque invalidation incrémente une
+génération (par semaine pour les occupations, par (hôtel, type) pour les
+chambres, globale pour vider) ; un chargement commencé avant une
+invalidation qui le concerne est rendu à l'appelant mais pas gardé.
+
+Les signaux ne voient que les écritures du processus courant : TIMEOUT
+borne la durée pendant laquelle une écriture faite ailleurs (admin, serveur
+d'actions, import) peut rester invisible.
+"""
+import sys
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from threading import RLock
+
+from django.conf import settings
+from django.utils import timezone
+
+MAX_BYTES = 16 * 1024 * 1024
+TIMEOUT = 60
+
+
+def _jour(valeur):
+    if isinstance(valeur, datetime):
+        return timezone.localtime(valeur).date() if timezone.is_aware(valeur) else valeur.date()
+    return valeur
+
+
+def semaines(date_a, date_d):
+    """Semaines ISO (année, semaine) couvertes par les nuits de [date_a, date_d)."""
+    jour, fin = _jour(date_a), _jour(date_d)
+    fin = max(fin, jour + timedelta(days=1))
+    jour -= timedelta(days=jour.weekday())
+    while jour < fin:
+        yield jour.isocalendar()[:2]
+        jour += timedelta(days=7)
+
+
+def nuits(date_a, nb_jours):
+    """{(année, semaine): masque des nuits du séjour dans la semaine (bit 0 = lundi)}."""
+    premier = _jour(date_a)
+    demande = {}
+    for i in range(nb_jours):
+        annee, num_semaine, jour_semaine = (premier + timedelta(days=i)).isocalendar()
+        demande[(annee, num_semaine)] = demande.get((annee, num_semaine), 0) | 1 << (jour_semaine - 1)
+    return demande
+
+
+def libres(semaines_demandees):
+    """Chambre.pk libres toutes les nuits demandées, à partir de [(masques de la semaine, masque demandé)]."""
+    resultat = None
+    for masques, masque in semaines_demandees:
+        semaine_libres = {pk for pk, occupe in masques.items() if not occupe & masque}
+        resultat = semaine_libres if resultat is None else resultat & semaine_libres
+    return sorted(resultat or ())
+
+
+class AvailabilityCache:
+    """LRU borné en mémoire ; compteurs de hits, misses, invalidations et évictions."""
+
+    def __init__(self, max_bytes=MAX_BYTES, timeout=TIMEOUT, chargeur=None):
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self._chargeur = chargeur or charger_semaine
+        self._entrees = OrderedDict()
+        self._tailles = {}
+        self._expirations = {}
+        self._par_type = {}
+        self._type_chambre = {}
+        # Générations des invalidations, voir _version
+        self._epoque = 0
+        self._gen_semaines = {}
+        self._gen_types = {}
+        self._lock = RLock()
+        self.octets = 0
+        self.hits = self.misses = self.invalidations = self.evictions = 0
+
+    # --- Entrées ---
+
+    def semaine(self, hotel_id, type_id, annee, num_semaine):
+        """{chambre_pk: masque des nuits occupées (bit 0 = lundi)} pour une semaine."""
+        cle = (hotel_id, type_id, annee, num_semaine)
+        return self.lot([cle], lambda manquantes: {cle: self._chargeur(*cle)})[cle]
+
+    def lot(self, cles, chargeur):
+        """{clé: masques} pour des clés (hôtel, type, année, semaine) ; les absentes sont
+        lues par un seul appel chargeur(clés absentes) -> {clé: masques}."""
+        resultat, versions = {}, {}
+        with self._lock:
+            maintenant = time.monotonic()
+            for cle in cles:
+                masques = self._entrees.get(cle)
+                if masques is not None and self._expirations[cle] > maintenant:
+                    self._entrees.move_to_end(cle)
+                    self.hits += 1
+                    resultat[cle] = masques
+                elif cle not in versions:
+                    self.misses += 1
+                    versions[cle] = self._version(cle)
+        if not versions:
+            return resultat
+        charges = chargeur(list(versions))
+        with self._lock:
+            for cle, version in versions.items():
+                masques = resultat[cle] = charges.get(cle, {})
+                # Invalidée pendant le chargement : la lecture peut précéder l'écriture, on ne la garde pas
+                if self._version(cle) == version:
+                    self._ajouter(cle, masques)
+        return resultat
+
+    def _version(self, cle):
+        return self._epoque, self._gen_semaines.get(cle[2:], 0), self._gen_types.get(cle[:2], 0)
+
+    def _ajouter(self, cle, masques):
+        if cle in self._entrees:
+            self._retirer(cle)
+        taille = sys.getsizeof(masques) + 64 * len(masques)
+        self._entrees[cle] = masques
+        self._tailles[cle] = taille
+        self._expirations[cle] = time.monotonic() + self.timeout
+        self.octets += taille
+        self._par_type.setdefault(cle[:2], set()).add(cle[2:])
+        for chambre_id in masques:
+            self._type_chambre[chambre_id] = cle[:2]
+        while self.octets > self.max_bytes and len(self._entrees) > 1:
+            self._retirer(next(iter(self._entrees)))
+            self.evictions += 1
+
+    def _retirer(self, cle):
+        self._entrees.pop(cle)
+        self._expirations.pop(cle)
+        self.octets -= self._tailles.pop(cle)
+        semaines_type = self._par_type.get(cle[:2])
+        if semaines_type is not None:
+            semaines_type.discard(cle[2:])
+            if not semaines_type:
+                del self._par_type[cle[:2]]
+
+    # --- Requêtes ---
+
+    def chambres_libres(self, hotel_id, type_id, date_a, nb_jours):
+        """Chambre.pk des chambres du type libres toutes les nuits du séjour."""
+        demande = nuits(date_a, nb_jours)
+        return libres([(self.semaine(hotel_id, type_id, *semaine), masque) for semaine, masque in demande.items()])
+
+    # --- Invalidation ---
+
+    def invalider_occupation(self, chambre_id, date_a, date_d):
+        with self._lock:
+            touchees = list(semaines(date_a, date_d))
+            # Même pour une chambre encore inconnue : un chargement en cours peut la concerner
+            for semaine in touchees:
+                self._gen_semaines[semaine] = self._gen_semaines.get(semaine, 0) + 1
+            type_cle = self._type_chambre.get(chambre_id)
+            if type_cle is None:
+                return
+            for semaine in touchees:
+                cle = type_cle + semaine
+                if cle in self._entrees:
+                    self._retirer(cle)
+                    self.invalidations += 1
+
+    def invalider_type(self, hotel_id, type_id):
+        with self._lock:
+            self._gen_types[(hotel_id, type_id)] = self._gen_types.get((hotel_id, type_id), 0) + 1
+            for semaine in list(self._par_type.get((hotel_id, type_id), ())):
+                self._retirer((hotel_id, type_id) + semaine)
+                self.invalidations += 1
+
+    def oublier_chambre(self, chambre_id):
+        with self._lock:
+            self._type_chambre.pop(chambre_id, None)
+
+    def vider(self):
+        with self._lock:
+            self._epoque += 1
+            self._entrees.clear()
+            self._tailles.clear()
+            self._expirations.clear()
+            self._par_type.clear()
+            self._type_chambre.clear()
+            self.octets = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entrees": len(self._entrees),
+                "octets": self.octets,
+                "max_octets": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "taux_hits": self.hits / total if total else 0.0,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+            }
+
+
+def charger_semaine(hotel_id, type_id, annee, num_semaine):
+    """Masques d'occupation d'une semaine, lus en base."""
+    from .models import Chambre, Occupation
+
+    lundi = datetime.fromisocalendar(annee, num_semaine, 1).date()
+    debut = timezone.make_aware(datetime.combine(lundi, datetime.min.time()))
+    fin = debut + timedelta(days=7)
+    masques = dict.fromkeys(Chambre.objects.filter(num_ho_id=hotel_id, num_ty_id=type_id)
+                            .values_list("pk", flat=True), 0)
+    occupations = (Occupation.objects
+                   .filter(num_ch__in=list(masques), date_a__lt=fin, date_d__gt=debut)
+                   .values_list("num_ch_id", "date_a", "date_d"))
+    for chambre_id, date_a, date_d in occupations:
+        premier = (_jour(date_a) - lundi).days
+        dernier = max((_jour(date_d) - lundi).days, premier + 1)
+        for j in range(max(premier, 0), min(dernier, 7)):
+            masques[chambre_id] |= 1 << j
+    return masques
+
+
+def charger_ville(ville, cles):
+    """Masques des clés (hôtel, type, année, semaine) des hôtels d'une ville, en deux requêtes."""
+    from .models import Chambre, Occupation
+
+    lundis = {semaine: datetime.fromisocalendar(*semaine, 1).date() for semaine in {cle[2:] for cle in cles}}
+    debut = timezone.make_aware(datetime.combine(min(lundis.values()), datetime.min.time()))
+    fin = timezone.make_aware(datetime.combine(max(lundis.values()), datetime.min.time())) + timedelta(days=7)
+    resultat = {cle: {} for cle in cles}
+    types = {}
+    for chambre_id, hotel_id, type_id in (Chambre.objects.filter(num_ho__ville_ho__iexact=ville)
+                                           .values_list("pk", "num_ho_id", "num_ty_id")):
+        types[chambre_id] = (hotel_id, type_id)
+        for semaine in lundis:
+            masques = resultat.get((hotel_id, type_id) + semaine)
+            if masques is not None:
+                masques[chambre_id] = 0
+    occupations = (Occupation.objects
+                   .filter(num_ho__ville_ho__iexact=ville, date_a__lt=fin, date_d__gt=debut)
+                   .values_list("num_ch_id", "date_a", "date_d"))
+    for chambre_id, date_a, date_d in occupations:
+        type_cle = types.get(chambre_id)
+        if type_cle is None:
+            continue
+        for semaine, lundi in lundis.items():
+            masques = resultat.get(type_cle + semaine)
+            if masques is None:
+                continue
+            premier = (_jour(date_a) - lundi).days
+            dernier = max((_jour(date_d) - lundi).days, premier + 1)
+            for j in range(max(premier, 0), min(dernier, 7)):
+                masques[chambre_id] |= 1 << j
+    return resultat
+
+
+_cache = None
+_cache_lock = RLock()
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                config = getattr(settings, "AVAILABILITY_CACHE", {})
+                _cache = AvailabilityCache(max_bytes=config.get("MAX_BYTES", MAX_BYTES),
+                                           timeout=config.get("TIMEOUT", TIMEOUT))
+    return _cache
+
+
+def loaded_cache():
+    return _cache
@@ -0,0 +1,223 @@
+"""
+Matrice d'occupation par hôtel : une ligne par nuit, un bit par chambre.
+
+Les chambres sont rangées par type, chaque TypeChambre occupe donc une plage
+contiguë de bits. « Quelles chambres du type T sont libres toutes les nuits
+de [date_a, date_a + nb_jours) ? » devient un OU binaire sur une tranche de
+la matrice, sans boucle par chambre.
+
+Pour un hôtel de 500 chambres sur deux ans : 730 x 63 octets ≈ 45 Ko.
+
+Seules les occupations qui finissent après le début du chargement (par
+défaut maintenant) sont chargées : une question sur des nuits antérieures
+lève ValueError plutôt que de répondre « libre » à tort.
+
+La matrice et sa date d'origine forment un seul tuple, remplacé d'un bloc
+quand la matrice s'agrandit : un lecteur sans verrou voit toujours une
+origine et une matrice qui vont ensemble.
+"""
+from datetime import datetime, timedelta
+from threading import RLock
+
+import numpy as np
+from django.utils import timezone
+
+HORIZON_JOURS = 730
+
+
+def _jour(valeur):
+    if isinstance(valeur, datetime):
+        return valeur.date()
+    return valeur
+
+
+class HotelBitmap:
+    """Occupation d'un hôtel, nuit par nuit, à partir de la date `origine`."""
+
+    def __init__(self, hotel_id, chambres, origine, nb_jours=HORIZON_JOURS):
+        # chambres : itérable de (chambre_pk, type_pk)
+        chambres = sorted(chambres, key=lambda c: (c[1], c[0]))
+        self.hotel_id = hotel_id
+        # Première nuit dont les occupations sont toutes dans la matrice
+        self.connu_depuis = _jour(origine)
+        self.chambre_ids = np.array([pk for pk, _ in chambres], dtype=np.int64)
+        self.lignes = {pk: i for i, (pk, _) in enumerate(chambres)}
+        self.types = {}
+        for i, (_, type_id) in enumerate(chambres):
+            debut, _ = self.types.get(type_id, (i, i))
+            self.types[type_id] = (debut, i + 1)
+        # (origine, matrice) : toujours remplacés ensemble
+        self._etat = (self.connu_depuis, np.zeros((nb_jours, (len(chambres) + 7) // 8), dtype=np.uint8))
+
+    @property
+    def origine(self):
+        return self._etat[0]
+
+    @property
+    def bits(self):
+        return self._etat[1]
+
+    @property
+    def nb_chambres(self):
+        return len(self.chambre_ids)
+
+    @property
+    def nb_jours(self):
+        return self.bits.shape[0]
+
+    @staticmethod
+    def _nuits(origine, date_a, date_d):
+        j0 = (_jour(date_a) - origine).days
+        j1 = (_jour(date_d) - origine).days
+        return j0, max(j1, j0 + 1)
+
+    def _etendre(self, j0, j1):
+        """Agrandit la matrice pour couvrir les nuits [j0, j1) ; renvoie le nouvel état et le décalage appliqué."""
+        origine, bits = self._etat
+        avant = max(0, -j0)
+        apres = max(0, j1 - bits.shape[0])
+        if apres:
+            # Croissance géométrique pour amortir les copies
+            apres = max(apres, bits.shape[0] // 2)
+        if avant or apres:
+            self._etat = (origine - timedelta(days=avant), np.pad(bits, ((avant, apres), (0, 0))))
+        return self._etat, avant
+
+    def _marquer(self, chambre_id, date_a, date_d, occupe):
+        ligne = self.lignes.get(chambre_id)
+        if ligne is None:
+            return False
+        j0, j1 = self._nuits(self.origine, date_a, date_d)
+        (_, bits), decalage = self._etendre(j0, j1)
+        j0, j1 = j0 + decalage, j1 + decalage
+        masque = np.uint8(0x80 >> (ligne & 7))
+        if occupe:
+            bits[j0:j1, ligne >> 3] |= masque
+        else:
+            bits[j0:j1, ligne >> 3] &= ~masque
+        return True
+
+    def occuper(self, chambre_id, date_a, date_d):
+        return self._marquer(chambre_id, date_a, date_d, True)
+
+    def liberer(self, chambre_id, date_a, date_d):
+        return self._marquer(chambre_id, date_a, date_d, False)
+
+    def chambres_libres(self, type_id, date_a, nb_jours):
+        """Chambre.pk des chambres du type libres pour toutes les nuits du séjour."""
+        if _jour(date_a) < self.connu_depuis:
+            raise ValueError(f"HotelBitmap : occupations chargées à partir du {self.connu_depuis} seulement")
+        if type_id not in self.types:
+            return self.chambre_ids[:0]
+        debut, fin = self.types[type_id]
+        origine, bits = self._etat
+        j0, j1 = self._nuits(origine, date_a, _jour(date_a) + timedelta(days=nb_jours))
+        # Les nuits hors de la matrice ne portent aucune occupation
+        j0, j1 = max(j0, 0), min(j1, bits.shape[0])
+        o0, o1 = debut >> 3, (fin + 7) >> 3
+        if j1 > j0:
+            occupe = np.bitwise_or.reduce(bits[j0:j1, o0:o1], axis=0)
+        else:
+            occupe = np.zeros(o1 - o0, dtype=np.uint8)
+        bits = np.unpackbits(occupe)[debut - 8 * o0:fin - 8 * o0]
+        return self.chambre_ids[debut:fin][bits == 0]
+
+    def nb_libres(self, type_id, date_a, nb_jours):
+        return len(self.chambres_libres(type_id, date_a, nb_jours))
+
+    def memoire(self):
+        return {
+            "hotel": self.hotel_id,
+            "chambres": self.nb_chambres,
+            "jours": self.nb_jours,
+            "octets_matrice": int(self.bits.nbytes),
+            "octets_index": int(self.chambre_ids.nbytes),
+        }
+
+
+class BitmapStore:
+    """Une HotelBitmap par hôtel, chargée depuis la base au premier accès.
+
+    depuis : instant à partir duquel les occupations sont chargées (par défaut
+    le moment du chargement) ; les nuits antérieures ne peuvent pas être interrogées.
+    """
+
+    def __init__(self, horizon=HORIZON_JOURS, depuis=None):
+        self.horizon = horizon
+        self.depuis = depuis
+        self._hotels = {}
+        self._lock = RLock()
+
+    def _charger(self, hotel_id):
+        from .models import Chambre, Occupation
+
+        depuis = self.depuis or timezone.now()
+        origine = timezone.localdate(depuis) if isinstance(depuis, datetime) else depuis
+        chambres = Chambre.objects.filter(num_ho_id=hotel_id).values_list("pk", "num_ty_id")
+        bitmap = HotelBitmap(hotel_id, chambres, origine, self.horizon)
+        occupations = (Occupation.objects
+                       .filter(num_ho_id=hotel_id, date_d__gt=depuis)
+                       .values_list("num_ch_id", "date_a", "date_d"))
+        for chambre_id, date_a, date_d in occupations.iterator():
+            bitmap.occuper(chambre_id, date_a, date_d)
+        return bitmap
+
+    def hotel(self, hotel_id):
+        bitmap = self._hotels.get(hotel_id)
+        if bitmap is None:
+            with self._lock:
+                bitmap = self._hotels.get(hotel_id)
+                if bitmap is None:
+                    bitmap = self._hotels[hotel_id] = self._charger(hotel_id)
+        return bitmap
+
+    def invalider(self, hotel_id):
+        with self._lock:
+            self._hotels.pop(hotel_id, None)
+
+    # --- Mises à jour incrémentales (appelées par le code de réservation et les signaux) ---
+
+    def occuper(self, hotel_id, chambre_id, date_a, date_d):
+        with self._lock:
+            bitmap = self._hotels.get(hotel_id)
+            if bitmap is not None and not bitmap.occuper(chambre_id, date_a, date_d):
+                # Chambre inconnue de la matrice : on la recharge au prochain accès
+                self.invalider(hotel_id)
+
+    def liberer(self, hotel_id, chambre_id, date_a, date_d):
+        with self._lock:
+            bitmap = self._hotels.get(hotel_id)
+            if bitmap is not None:
+                bitmap.liberer(chambre_id, date_a, date_d)
+
+    # --- Requêtes ---
+
+    def chambres_libres(self, hotel_id, type_id, date_a, nb_jours):
+        return self.hotel(hotel_id).chambres_libres(type_id, date_a, nb_jours)
+
+    def nb_libres(self, hotel_id, type_id, date_a, nb_jours):
+        return self.hotel(hotel_id).nb_libres(type_id, date_a, nb_jours)
+
+    def rapport_memoire(self):
+        hotels = [b.memoire() for b in list(self._hotels.values())]
+        return {
+            "hotels": hotels,
+            "total_octets": sum(h["octets_matrice"] + h["octets_index"] for h in hotels),
+        }
+
+
+_store = None
+_store_lock = RLock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = BitmapStore()
+    return _store
+
+
+def loaded_store():
+    return _store
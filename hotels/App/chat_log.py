@@ -0,0 +1,151 @@
+"""
+Journal structuré des tours de chat : un enregistrement JSON par message.
+
+Chaque vue de chat ouvre un tour (`with tour(sender, canal):`). Pendant le
+tour, rasa_client, nlu_gateway et response_cache y notent ce qu'ils savent
+(durées par étape, intention, résultat du cache) ; à la sortie, un seul
+enregistrement part sur le logger "App.chat" :
+
+    {"ts": "...", "niveau": "INFO", "sender": "9f2c…", "canal": "chat",
+     "cache": "miss", "intention": "rechercher_hotel", "reponses": 2,
+     "durees_ms": {"rasa": 212.4, "tracker": 3.1, "total": 221.0}}
+
+Le sender est haché : le journal ne permet pas de rejouer une conversation.
+
+L'écriture ne bloque jamais la requête : QueueJsonHandler met
+l'enregistrement dans une file bornée, un thread le formate et l'écrit ;
+si la file est pleine (disque ou collecteur trop lent), l'enregistrement
+est perdu et compté. Echantillonnage ne garde qu'une part des
+conversations (toujours les mêmes, par hachage du sender) mais garde tous
+les tours lents ou en erreur. Branchement dans settings.LOGGING.
+"""
+import atexit
+import contextvars
+import hashlib
+import json
+import logging
+import queue
+import sys
+import time
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener
+
+logger = logging.getLogger("App.chat")
+
+_tour = contextvars.ContextVar("tour", default=None)
+
+
+def hacher(sender):
+    return hashlib.blake2b(sender.encode(), digest_size=8).hexdigest()
+
+
+@contextmanager
+def tour(sender, canal):
+    """Tour de chat en cours ; journalisé à la sortie, en WARNING s'il a noté une erreur."""
+    donnees = {"sender": hacher(sender), "canal": canal, "durees_ms": {}}
+    jeton = _tour.set(donnees)
+    debut = time.perf_counter()
+    try:
+        yield donnees
+    except BaseException as e:
+        donnees.setdefault("erreur", type(e).__name__)
+        raise
+    finally:
+        donnees["durees_ms"]["total"] = round((time.perf_counter() - debut) * 1000, 1)
+        _tour.reset(jeton)
+        logger.log(logging.WARNING if "erreur" in donnees else logging.INFO, "tour", extra={"tour": donnees})
+
+
+def noter(**valeurs):
+    """Ajoute au tour en cours les champs connus (les None sont ignorés ; sans effet hors d'un tour)."""
+    donnees = _tour.get()
+    if donnees is not None:
+        donnees.update((cle, valeur) for cle, valeur in valeurs.items() if valeur is not None)
+
+
+@contextmanager
+def chrono(etape):
+    """Ajoute la durée du bloc à durees_ms[etape] du tour en cours."""
+    debut = time.perf_counter()
+    try:
+        yield
+    finally:
+        donnees = _tour.get()
+        if donnees is not None:
+            durees = donnees["durees_ms"]
+            durees[etape] = round(durees.get(etape, 0) + (time.perf_counter() - debut) * 1000, 1)
+
+
+# --- Branchement logging ---
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        donnees = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "niveau": record.levelname,
+            "logger": record.name,
+        }
+        donnees.update(getattr(record, "tour", None) or {"message": record.getMessage()})
+        if record.exc_info:
+            donnees["exception"] = self.formatException(record.exc_info)
+        return json.dumps(donnees, ensure_ascii=False, default=str)
+
+
+class Echantillonnage(logging.Filter):
+    """Garde la part `taux` des conversations, plus tous les tours en erreur ou plus lents que `lent_ms`."""
+
+    def __init__(self, taux=1.0, lent_ms=None):
+        super().__init__()
+        self.taux = taux
+        self.lent_ms = lent_ms
+
+    def filter(self, record):
+        donnees = getattr(record, "tour", None)
+        if donnees is None or record.levelno >= logging.WARNING or self.taux >= 1:
+            return True
+        if self.lent_ms is not None and donnees["durees_ms"].get("total", 0) >= self.lent_ms:
+            return True
+        return int(donnees["sender"][:8], 16) < self.taux * 0x100000000
+
+
+class QueueJsonHandler(QueueHandler):
+    """QueueHandler qui ne bloque jamais : file bornée, écriture et formatage dans le thread du listener.
+
+    Le formateur donné par la configuration (settings.LOGGING) est passé au
+    handler de sortie : le JSON est produit hors de la requête.
+    """
+
+    def __init__(self, fichier=None, taille_file=10000):
+        super().__init__(queue.Queue(taille_file))
+        self.sortie = logging.FileHandler(fichier, encoding="utf-8") if fichier else logging.StreamHandler(sys.stdout)
+        self.perdus = 0
+        self._listener = QueueListener(self.queue, self.sortie, respect_handler_level=True)
+        self._listener.start()
+        atexit.register(self.arreter)
+
+    def setFormatter(self, fmt):
+        self.sortie.setFormatter(fmt)
+
+    def prepare(self, record):
+        # Même processus : pas besoin de figer le message pour le sérialiser
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.perdus += 1
+
+    def arreter(self):
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+            self.sortie.close()
+
+    def stats(self):
+        return {"en_file": self.queue.qsize(), "perdus": self.perdus}
+
+
+def stats():
+    """Files des QueueJsonHandler du logger de chat (processus courant)."""
+    return [h.stats() for h in logger.handlers if isinstance(h, QueueJsonHandler)]
@@ -0,0 +1,64 @@
+"""
+Agrégat DailyOccupancy : chambres occupées par (hôtel, type de chambre, nuit).
+
+Chaque création, modification ou suppression d'Occupation ajoute ou retire
+une chambre sur les nuits concernées (voir App/signals.py). Les imports en
+masse, qui ne déclenchent pas les signaux, appellent reconstruire().
+"""
+from collections import Counter
+from datetime import datetime, timedelta
+
+from django.db import transaction
+from django.db.models import F
+
+
+def nuits(date_a, date_d):
+    """Nuits occupées par un séjour [date_a, date_d) : au moins une."""
+    premier = date_a.date() if isinstance(date_a, datetime) else date_a
+    dernier = date_d.date() if isinstance(date_d, datetime) else date_d
+    return [premier + timedelta(days=i) for i in range(max((dernier - premier).days, 1))]
+
+
+def appliquer(hotel_id, type_id, date_a, date_d, delta):
+    """Ajoute delta (+1 / -1) aux nuits du séjour."""
+    from .models import DailyOccupancy
+
+    jours = nuits(date_a, date_d)
+    with transaction.atomic():
+        lignes = DailyOccupancy.objects.filter(num_ho_id=hotel_id, num_ty_id=type_id, jour__in=jours)
+        existants = set(lignes.values_list("jour", flat=True))
+        if existants:
+            lignes.update(nb_occupees=F("nb_occupees") + delta)
+        # Un retrait sans ligne existante ne crée rien (hôtel en cours de suppression par exemple)
+        if delta > 0:
+            DailyOccupancy.objects.bulk_create([
+                DailyOccupancy(num_ho_id=hotel_id, num_ty_id=type_id, jour=jour, nb_occupees=delta)
+                for jour in jours if jour not in existants
+            ])
+
+
+def compter(occupations):
+    """Counter {(hotel, type, jour): nb} pour des (hotel, type, date_a, date_d)."""
+    compteur = Counter()
+    for hotel_id, type_id, date_a, date_d in occupations:
+        for jour in nuits(date_a, date_d):
+            compteur[(hotel_id, type_id, jour)] += 1
+    return compteur
+
+
+def reconstruire(batch_size=5000):
+    """Recalcule tout l'agrégat depuis Occupation."""
+    from .models import DailyOccupancy, Occupation
+
+    occupations = (Occupation.objects
+                   .values_list("num_ho_id", "num_ch__num_ty_id", "date_a", "date_d")
+                   .iterator(chunk_size=batch_size))
+    compteur = compter(occupations)
+    with transaction.atomic():
+        DailyOccupancy.objects.all().delete()
+        DailyOccupancy.objects.bulk_create(
+            (DailyOccupancy(num_ho_id=hotel_id, num_ty_id=type_id, jour=jour, nb_occupees=nb)
+             for (hotel_id, type_id, jour), nb in compteur.items()),
+            batch_size=batch_size,
+        )
+    return len(compteur)
@@ -1,121 +1,209 @@
+"""
+Générateur de jeux de données synthétiques (CSV) pour les fixtures et les tests de charge.
+
+    python main.py                                   # petit jeu : 5 hôtels, 50 clients
+    python main.py --hotels 10000 --clients 1000000 --occupations 50000000 --processes 8
+
+La génération est découpée en shards (tranches contiguës d'hôtels et de
+clients) répartis sur un pool de processus. Chaque shard a sa propre graine :
+à nombre de shards égal, le résultat ne dépend pas du nombre de processus.
+Chaque shard écrit ses lignes au fil de l'eau dans des fichiers partiels,
+concaténés ensuite dans l'ordre des shards.
+
+Les chambres d'un (hôtel, type) forment une plage contiguë de numéros ; pour
+chacune on ne garde que la fin de sa dernière occupation : une nouvelle
+occupation commence après, ce qui respecte C2 sans rien rechercher.
+"""
+import argparse
 import csv
-from datetime import datetime, timedelta
+import os
 import random
+import shutil
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
 
-# --- 1. Hotels ---
-hotels = [
-    {"num_ho": 1, "nom_ho": "Hotel Paris", "rue_adr_ho": "Rue de Rivoli", "ville_ho": "Paris", "nb_etoiles_ho": 4},
-    {"num_ho": 2, "nom_ho": "Hotel Nice", "rue_adr_ho": "Avenue des Fleurs", "ville_ho": "Nice", "nb_etoiles_ho": 5},
-    {"num_ho": 3, "nom_ho": "Hotel Lyon", "rue_adr_ho": "Rue de la Gare", "ville_ho": "Lyon", "nb_etoiles_ho": 3},
-    {"num_ho": 4, "nom_ho": "Hotel Marseille", "rue_adr_ho": "Boulevard Longchamp", "ville_ho": "Marseille", "nb_etoiles_ho": 4},
-    {"num_ho": 5, "nom_ho": "Hotel Bordeaux", "rue_adr_ho": "Cours Victor Hugo", "ville_ho": "Bordeaux", "nb_etoiles_ho": 5},
-]
+FORMAT_DATE = "%Y-%m-%d %H:%M:%S"
+ESSAIS_CLIENT = 100
 
-with open("Hotel.csv", "w", newline="") as f:
-    writer = csv.DictWriter(f, fieldnames=hotels[0].keys())
-    writer.writeheader()
-    writer.writerows(hotels)
+HOTELS = [
+    ("Hotel Paris", "Rue de Rivoli", "Paris", 4),
+    ("Hotel Nice", "Avenue des Fleurs", "Nice", 5),
+    ("Hotel Lyon", "Rue de la Gare", "Lyon", 3),
+    ("Hotel Marseille", "Boulevard Longchamp", "Marseille", 4),
+    ("Hotel Bordeaux", "Cours Victor Hugo", "Bordeaux", 5),
+]
+VILLES = ["Paris", "Nice", "Lyon", "Marseille", "Bordeaux", "Toulouse", "Lille", "Nantes", "Strasbourg", "Montpellier"]
+RUES = ["Rue de la Paix", "Avenue de la République", "Boulevard Victor Hugo", "Rue du Port", "Place de la Gare"]
 
-# --- 2. TypeChambre ---
-types_chambre = [
+TYPES_CHAMBRE = [
     {"num_ty": 1, "nom_ty": "Simple", "prix_ty": 80.00},
     {"num_ty": 2, "nom_ty": "Double", "prix_ty": 120.00},
     {"num_ty": 3, "nom_ty": "Suite", "prix_ty": 200.00},
 ]
 
-with open("TypeChambre.csv", "w", newline="") as f:
-    writer = csv.DictWriter(f, fieldnames=types_chambre[0].keys())
-    writer.writeheader()
-    writer.writerows(types_chambre)
-
-# --- 3. Chambres ---
-chambres = []
-num_ch = 101
-for h in hotels:
-    for ty in types_chambre:
-        for i in range(10):
-            chambres.append({"num_ch": num_ch, "num_ho": h["num_ho"], "num_ty": ty["num_ty"]})
-            num_ch += 1
-
-with open("Chambre.csv", "w", newline="") as f:
-    writer = csv.DictWriter(f, fieldnames=["num_ch", "num_ho", "num_ty"])
-    writer.writeheader()
-    writer.writerows(chambres)
-
-# --- 4. Clients ---
-clients = []
-for i in range(1, 51):
-    clients.append({
-        "num_cl": i,
-        "nom_cl": f"Nom{i}",
-        "prenom_cl": f"Prenom{i}",
-        "rue_adr_cl": f"{i} rue Exemple",
-        "ville_cl": f"Ville{i % 5 + 1}"
-    })
-
-with open("Client.csv", "w", newline="") as f:
-    writer = csv.DictWriter(f, fieldnames=clients[0].keys())
-    writer.writeheader()
-    writer.writerows(clients)
-
-# --- 5. Reservations et Occupations ---
-reservations = []
-occupations = []
-
-# Stockage pour éviter chevauchements
-occupations_by_chambre = {}  # {num_ch: [(date_a, date_d)]}
-reservation_keys = set()     # {(num_cl, num_ho, num_ty, date_a)}
-
-start_date = datetime(2025, 10, 1, 14, 0)
-
-for client in clients:
-    for _ in range(3):  # max 3 réservations par client
-        hotel = random.choice(hotels)
-        valid_types = list({c["num_ty"] for c in chambres if c["num_ho"] == hotel["num_ho"]})
-        type_ch_num = random.choice(valid_types)
-        valid_chambres = [c for c in chambres if c["num_ho"] == hotel["num_ho"] and c["num_ty"] == type_ch_num]
-        random.shuffle(valid_chambres)
-
-        nb_jours = random.randint(1, 5)
-        assigned = False
-        for chambre in valid_chambres:
-            # Calculer la prochaine date disponible pour cette chambre
-            last_end = max([d[1] for d in occupations_by_chambre.get(chambre["num_ch"], [])], default=start_date)
-            date_a = last_end + timedelta(days=1)
-            date_d = date_a + timedelta(days=nb_jours)
-
-            # Vérifier qu’aucune occupation ne chevauche (C2)
-            if all(date_d <= occ[0] or date_a >= occ[1] for occ in occupations_by_chambre.get(chambre["num_ch"], [])):
-                reservations.append({
-                    "num_cl": client["num_cl"],
-                    "num_ho": hotel["num_ho"],
-                    "num_ty": type_ch_num,
-                    "date_a": date_a.strftime("%Y-%m-%d %H:%M:%S"),
-                    "nb_jours": nb_jours,
-                    "nb_chambres": 1
-                })
-                occupations.append({
-                    "num_cl": client["num_cl"],
-                    "num_ho": hotel["num_ho"],
-                    "num_ch": chambre["num_ch"],
-                    "date_a": date_a.strftime("%Y-%m-%d %H:%M:%S"),
-                    "date_d": date_d.strftime("%Y-%m-%d %H:%M:%S")
-                })
-                occupations_by_chambre.setdefault(chambre["num_ch"], []).append((date_a, date_d))
-                assigned = True
-                break
-        if not assigned:
-            continue  # si aucune chambre dispo, on skip
-
-# --- Écriture CSV ---
-with open("Reservation.csv", "w", newline="") as f:
-    writer = csv.DictWriter(f, fieldnames=["num_cl", "num_ho", "num_ty", "date_a", "nb_jours", "nb_chambres"])
-    writer.writeheader()
-    writer.writerows(reservations)
-
-with open("Occupation.csv", "w", newline="") as f:
-    writer = csv.DictWriter(f, fieldnames=["num_cl", "num_ho", "num_ch", "date_a", "date_d"])
-    writer.writeheader()
-    writer.writerows(occupations)
-
-print("✅ Fichiers CSV générés correctement, sans chevauchement et respectant C1 et C2 !")
+FICHIERS = {
+    "Hotel.csv": ["num_ho", "nom_ho", "rue_adr_ho", "ville_ho", "nb_etoiles_ho"],
+    "Chambre.csv": ["num_ch", "num_ho", "num_ty"],
+    "Client.csv": ["num_cl", "nom_cl", "prenom_cl", "rue_adr_cl", "ville_cl"],
+    "Reservation.csv": ["num_cl", "num_ho", "num_ty", "date_a", "nb_jours", "nb_chambres"],
+    "Occupation.csv": ["num_cl", "num_ho", "num_ch", "date_a", "date_d"],
+}
+
+
+def tranches(total, nb):
+    """Découpe 1..total en nb plages (début, fin) contiguës, éventuellement vides."""
+    taille, reste = divmod(total, nb)
+    debut = 1
+    for i in range(nb):
+        fin = debut + taille + (i < reste)
+        yield debut, fin
+        debut = fin
+
+
+def hotel(num_ho, rng):
+    if num_ho <= len(HOTELS):
+        nom, rue, ville, etoiles = HOTELS[num_ho - 1]
+    else:
+        ville = VILLES[(num_ho - 1) % len(VILLES)]
+        nom, rue, etoiles = f"Hotel {ville} {num_ho}", f"{num_ho} {rng.choice(RUES)}", rng.randint(1, 5)
+    return num_ho, nom, rue, ville, etoiles
+
+
+class Dates:
+    """Dates formatées par décalage en jours depuis le départ (formatées une seule fois)."""
+
+    def __init__(self, depart):
+        self.depart = depart
+        self._textes = []
+
+    def __getitem__(self, jour):
+        while len(self._textes) <= jour:
+            self._textes.append((self.depart + timedelta(days=len(self._textes))).strftime(FORMAT_DATE))
+        return self._textes[jour]
+
+
+def generer_shard(args):
+    """Écrit les fichiers partiels d'un shard ; renvoie le nombre de lignes par fichier."""
+    (shard, dossier, seed, hotels, clients, nb_clients, occupations_par_hotel, reste,
+     chambres_par_type, depart, jours_max, ecart_max) = args
+    rng = random.Random(f"{seed}-{shard}")
+    dates = Dates(depart)
+    nb_types = len(TYPES_CHAMBRE)
+    chambres_par_hotel = nb_types * chambres_par_type
+    fichiers = {nom: open(os.path.join(dossier, f"{nom}.part{shard:04d}"), "w", newline="") for nom in FICHIERS}
+    writers = {nom: csv.writer(f) for nom, f in fichiers.items()}
+    lignes = Counter()
+    try:
+        w = writers["Client.csv"]
+        for num_cl in range(*clients):
+            w.writerow((num_cl, f"Nom{num_cl}", f"Prenom{num_cl}", f"{num_cl} rue Exemple", f"Ville{num_cl % 5 + 1}"))
+        lignes["Client.csv"] += clients[1] - clients[0]
+
+        w_hotel, w_chambre = writers["Hotel.csv"], writers["Chambre.csv"]
+        w_resa, w_occ = writers["Reservation.csv"], writers["Occupation.csv"]
+        for num_ho in range(*hotels):
+            w_hotel.writerow(hotel(num_ho, rng))
+            # Numéros de chambre globaux : plage fixe par hôtel, calculable sans coordination
+            premiere = 101 + (num_ho - 1) * chambres_par_hotel
+            for i in range(chambres_par_hotel):
+                w_chambre.writerow((premiere + i, num_ho, TYPES_CHAMBRE[i // chambres_par_type]["num_ty"]))
+
+            quota = occupations_par_hotel + (num_ho <= reste)
+            par_type = Counter(rng.randrange(nb_types) for _ in range(quota))
+            for t in range(nb_types):
+                num_ty = TYPES_CHAMBRE[t]["num_ty"]
+                debut_type = premiere + t * chambres_par_type
+                # Fin (en jours depuis le départ) de la dernière occupation de chaque chambre du type
+                fin = [0] * chambres_par_type
+                # (client, jour d'arrivée) déjà pris pour ce type : unicité de Reservation
+                pris = set()
+                for _ in range(par_type[t]):
+                    c = rng.randrange(chambres_par_type)
+                    date_a = fin[c] + rng.randint(0, ecart_max)
+                    nb_jours = rng.randint(1, jours_max)
+                    for _ in range(ESSAIS_CLIENT):
+                        num_cl = rng.randint(1, nb_clients)
+                        if (num_cl, date_a) not in pris:
+                            break
+                    else:
+                        continue  # trop peu de clients pour ce jour : séjour abandonné
+                    pris.add((num_cl, date_a))
+                    fin[c] = date_a + nb_jours
+                    texte_a = dates[date_a]
+                    w_resa.writerow((num_cl, num_ho, num_ty, texte_a, nb_jours, 1))
+                    w_occ.writerow((num_cl, num_ho, debut_type + c, texte_a, dates[fin[c]]))
+                lignes["Reservation.csv"] += len(pris)
+                lignes["Occupation.csv"] += len(pris)
+        lignes["Hotel.csv"] += hotels[1] - hotels[0]
+        lignes["Chambre.csv"] += (hotels[1] - hotels[0]) * chambres_par_hotel
+    finally:
+        for f in fichiers.values():
+            f.close()
+    return lignes
+
+
+def concatener(dossier, nb_shards):
+    for nom, entetes in FICHIERS.items():
+        with open(os.path.join(dossier, nom), "w", newline="") as sortie:
+            csv.writer(sortie).writerow(entetes)
+            for shard in range(nb_shards):
+                partiel = os.path.join(dossier, f"{nom}.part{shard:04d}")
+                with open(partiel, newline="") as f:
+                    shutil.copyfileobj(f, sortie)
+                os.remove(partiel)
+
+
+def generer(dossier=".", hotels=5, clients=50, occupations=150, chambres_par_type=10,
+            depart=datetime(2025, 10, 1, 14, 0), jours_max=5, ecart_max=3,
+            seed=0, shards=16, processes=None):
+    os.makedirs(dossier, exist_ok=True)
+    with open(os.path.join(dossier, "TypeChambre.csv"), "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=TYPES_CHAMBRE[0].keys())
+        writer.writeheader()
+        writer.writerows(TYPES_CHAMBRE)
+
+    # Première arrivée au plus tôt le lendemain du départ, comme l'ancien générateur
+    depart += timedelta(days=1)
+    shards = max(1, min(shards, hotels))
+    occupations_par_hotel, reste = divmod(occupations, hotels)
+    taches = [
+        (shard, dossier, seed, plage_hotels, plage_clients, clients, occupations_par_hotel, reste,
+         chambres_par_type, depart, jours_max, ecart_max)
+        for shard, (plage_hotels, plage_clients) in enumerate(zip(tranches(hotels, shards), tranches(clients, shards)))
+    ]
+    if processes == 1:
+        lignes = sum(map(generer_shard, taches), Counter())
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            lignes = sum(pool.map(generer_shard, taches), Counter())
+    concatener(dossier, shards)
+    lignes["TypeChambre.csv"] = len(TYPES_CHAMBRE)
+    return lignes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Génère les CSV de fixtures (respectant C1 et C2)")
+    parser.add_argument("--dossier", default=".")
+    parser.add_argument("--hotels", type=int, default=5)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--occupations", type=int, default=150)
+    parser.add_argument("--chambres-par-type", type=int, default=10)
+    parser.add_argument("--depart", type=datetime.fromisoformat, default=datetime(2025, 10, 1, 14, 0))
+    parser.add_argument("--jours-max", type=int, default=5, help="durée maximale d'un séjour")
+    parser.add_argument("--ecart-max", type=int, default=3, help="jours libres maximum entre deux séjours")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--shards", type=int, default=16)
+    parser.add_argument("--processes", type=int, default=None, help="taille du pool (défaut : nombre de CPU)")
+    args = parser.parse_args()
+
+    debut = time.perf_counter()
+    lignes = generer(args.dossier, args.hotels, args.clients, args.occupations, args.chambres_par_type,
+                     args.depart, args.jours_max, args.ecart_max, args.seed, args.shards, args.processes)
+    duree = time.perf_counter() - debut
+    for nom, nb in sorted(lignes.items()):
+        print(f"{nom:<16} {nb:>12}")
+    total = sum(lignes.values())
+    print(f"✅ {total} lignes générées en {duree:.1f}s ({total / duree:.0f} lignes/s), "
+          f"sans chevauchement et respectant C1 et C2 !")
@@ -0,0 +1,271 @@
+"""
+Répertoire de noms de lieux : reconnaissance exacte et approchée d'une ville.
+
+Construit une fois à partir d'une liste de noms (les villes du catalogue),
+il répond à trois questions :
+
+- exact(nom) : le nom tapé désigne-t-il un lieu connu ? Une table de
+  hachage contient, pour chaque nom, sa forme normalisée (texte.normaliser :
+  sans casse ni accents) sans séparateurs (« Saint-Étienne », « saint
+  etienne » et « saintetienne » se valent), la forme avec St/Ste et celle
+  aux lettres doublées simplifiées (« Marseile », « Lile ») ;
+- proches(nom) : les lieux à une distance d'édition bornée (Damerau : une
+  transposition de deux lettres voisines compte pour une faute). L'index
+  est celui de SymSpell : chaque nom y est rangé sous toutes les chaînes
+  obtenues en retirant jusqu'à DISTANCE_MAX lettres à ses PREFIXE premières
+  lettres, et de même pour ses PREFIXE dernières. Une recherche lit les
+  suppressions de la requête dans les deux index et ne calcule la distance
+  que pour les noms trouvés des deux côtés : quelques dizaines de lectures
+  de dictionnaire et une poignée de distances, quel que soit le nombre de
+  noms ;
+- citee(texte) : la ville citée dans une phrase. D'abord les noms exacts,
+  en mots entiers (KeywordMatcher), sinon les mots qui suivent « à », « au »,
+  « sur »... en tolérant les fautes.
+
+La tolérance dépend de la longueur du nom tapé : aucune faute sous 5
+lettres, une jusqu'à 8, deux au-delà. À distance égale, le nom le plus tôt
+dans la liste l'emporte.
+
+    villes = Gazetteer(["Paris", "Saint-Étienne", "Marseille"])
+    villes.chercher("st etienne")                  # 'Saint-Étienne'
+    villes.chercher("marsielle")                   # 'Marseille'
+    villes.citee("un hôtel à Marseile ce soir")    # 'Marseille'
+"""
+import re
+
+from .keyword_matcher import KeywordMatcher
+from .texte import normaliser
+
+DISTANCE_MAX = 2
+PREFIXE = 7
+# Au-delà, les numéros d'une suppression sont rangés en frozenset (intersections plus rapides)
+GRANDE_LISTE = 64
+
+# Mots après lesquels on cherche une ville mal orthographiée
+PREPOSITIONS = frozenset(["a", "au", "aux", "sur", "vers", "pres"])
+# Mots qui terminent le nom cherché après la préposition (« à marseile pour deux »)
+FINS_DE_NOM = frozenset(["pour", "avec", "ce", "cet", "cette", "demain", "dans", "pendant", "svp", "merci"])
+
+ABREVIATIONS = {"saint": "st", "sainte": "ste"}
+_DEVELOPPEMENTS = {abrege: mot for mot, abrege in ABREVIATIONS.items()}
+
+_MOT = re.compile(r"[^\W_]+")
+_DOUBLES = re.compile(r"(.)\1+")
+
+
+def mots(nom):
+    return _MOT.findall(normaliser(nom))
+
+
+def sans_doubles(texte):
+    return _DOUBLES.sub(r"\1", texte)
+
+
+def tolerance(longueur):
+    """Nombre de fautes admises pour un nom tapé de `longueur` lettres."""
+    return 0 if longueur < 5 else 1 if longueur <= 8 else 2
+
+
+def distance(a, b, maximum):
+    """Distance de Damerau restreinte entre a et b, ou maximum + 1 dès qu'elle le dépasse."""
+    if a == b:
+        return 0
+    if abs(len(a) - len(b)) > maximum:
+        return maximum + 1
+    # Début et fin communs ne changent rien à la distance
+    debut = 0
+    while debut < len(a) and debut < len(b) and a[debut] == b[debut]:
+        debut += 1
+    fin = 0
+    while fin < len(a) - debut and fin < len(b) - debut and a[-1 - fin] == b[-1 - fin]:
+        fin += 1
+    a, b = a[debut:len(a) - fin], b[debut:len(b) - fin]
+    if not a or not b:
+        return len(a) + len(b) if len(a) + len(b) <= maximum else maximum + 1
+    avant = None
+    ligne = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        courante = [i] * (len(b) + 1)
+        minimum = i
+        for j, cb in enumerate(b, 1):
+            valeur = min(ligne[j] + 1, courante[j - 1] + 1, ligne[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca != cb and ca == b[j - 2] and a[i - 2] == cb and avant[j - 2] + 1 < valeur:
+                valeur = avant[j - 2] + 1
+            courante[j] = valeur
+            if valeur < minimum:
+                minimum = valeur
+        if minimum > maximum:
+            return maximum + 1
+        avant, ligne = ligne, courante
+    return ligne[-1] if ligne[-1] <= maximum else maximum + 1
+
+
+def suppressions(texte, nombre):
+    """texte et toutes les chaînes obtenues en lui retirant jusqu'à `nombre` lettres."""
+    resultat = {texte}
+    # (chaîne, première position encore supprimable) : chaque combinaison n'est produite qu'une fois
+    niveau = [(texte, 0)]
+    for _ in range(nombre):
+        niveau = [(m[:i] + m[i + 1:], i) for m, debut in niveau for i in range(debut, len(m))]
+        resultat.update([m for m, _ in niveau])
+    return resultat
+
+
+def _indexer(index, cle, nombre, numero):
+    for suppression in suppressions(cle, nombre):
+        deja = index.get(suppression)
+        if deja is None:
+            index[suppression] = numero
+        elif type(deja) is int:
+            index[suppression] = [deja, numero]
+        else:
+            deja.append(numero)
+
+
+def _listes(index, cles):
+    """Numéros rangés sous chacune des clés présentes dans l'index."""
+    return [(numeros,) if type(numeros) is int else numeros
+            for numeros in map(index.get, cles) if numeros is not None]
+
+
+class Gazetteer:
+    """Noms de lieux, retrouvés sans casse ni accents, avec variantes et fautes de frappe."""
+
+    def __init__(self, noms, distance_max=DISTANCE_MAX, prefixe=PREFIXE):
+        self.noms = tuple(dict.fromkeys(noms))
+        self.distance_max = distance_max
+        self.prefixe = prefixe
+        formes = [self._formes(nom) for nom in self.noms]
+        # Forme compacte (sans séparateurs) -> numéro du nom ; les formes exactes
+        # passent avant les abréviations, elles-mêmes avant les lettres simplifiées
+        self._exacts = {}
+        for rang in range(3):
+            for numero, (compactes, _) in enumerate(formes):
+                for compacte in compactes[rang]:
+                    self._exacts.setdefault(compacte, numero)
+        self._compactes = [compactes[0][0] if compactes[0] else "" for compactes, _ in formes]
+        self._longueurs = [len(compacte) for compacte in self._compactes]
+        # Suppression -> numéro du nom, ou liste de numéros quand plusieurs noms la partagent,
+        # pour les PREFIXE premières lettres et pour les PREFIXE dernières. Un nom n'y est
+        # rangé qu'à la tolérance des requêtes qui peuvent l'atteindre : « nice » ne sera
+        # approché que par une requête de 5 lettres au plus, donc à une faute
+        self._debuts = {}
+        self._fins = {}
+        for numero, compacte in enumerate(self._compactes):
+            nombre = min(distance_max, tolerance(len(compacte) + distance_max))
+            if not compacte or len(compacte) + nombre < 5:
+                continue
+            _indexer(self._debuts, compacte[:prefixe], nombre, numero)
+            _indexer(self._fins, compacte[-prefixe:], nombre, numero)
+        for index in (self._debuts, self._fins):
+            for suppression, numeros in index.items():
+                if type(numeros) is list and len(numeros) > GRANDE_LISTE:
+                    index[suppression] = frozenset(numeros)
+        self._matcher = KeywordMatcher(
+            (phrase, numero) for numero, (_, phrases) in enumerate(formes) for phrase in phrases)
+
+    @staticmethod
+    def _formes(nom):
+        """([formes compactes exactes], [abrégées], [simplifiées]) et les phrases du KeywordMatcher."""
+        decoupe = mots(nom)
+        variantes = [decoupe]
+        for table in (ABREVIATIONS, _DEVELOPPEMENTS):
+            autre = [table.get(mot, mot) for mot in decoupe]
+            if autre not in variantes:
+                variantes.append(autre)
+        simplifiees = [[sans_doubles(mot) for mot in variante] for variante in variantes]
+        compactes = (["".join(decoupe)] if decoupe else [],
+                     ["".join(variante) for variante in variantes[1:]],
+                     ["".join(variante) for variante in simplifiees])
+        phrases = {" ".join(variante) for variante in variantes + simplifiees if variante}
+        return compactes, phrases
+
+    def __len__(self):
+        return len(self.noms)
+
+    def __contains__(self, nom):
+        return self.exact(nom) is not None
+
+    def _exact(self, nom):
+        compacte = "".join(mots(nom))
+        numero = self._exacts.get(compacte)
+        if numero is None:
+            numero = self._exacts.get(sans_doubles(compacte))
+        return numero
+
+    def exact(self, nom):
+        """Nom connu désigné par `nom` (casse, accents, séparateurs, St, lettres doublées), sinon None."""
+        numero = self._exact(nom)
+        return None if numero is None else self.noms[numero]
+
+    def _proches(self, compacte, maximum):
+        # Un nom proche partage une suppression avec la requête au début comme à la fin :
+        # seuls les noms trouvés des deux côtés sont candidats (« saint-malo » mal tapé a des
+        # milliers de voisins par le début, quelques-uns par la fin). Le côté le moins fourni
+        # devient un ensemble, les listes de l'autre y sont cherchées sans être copiées
+        debut, fin = compacte[:self.prefixe], compacte[-self.prefixe:]
+        cles = suppressions(debut, maximum)
+        debuts = _listes(self._debuts, cles)
+        fins = _listes(self._fins, cles if fin == debut else suppressions(fin, maximum))
+        if sum(map(len, fins)) < sum(map(len, debuts)):
+            debuts, fins = fins, debuts
+        retenus = set().union(*debuts)
+        candidats = set()
+        for numeros in fins:
+            candidats.update(retenus.intersection(numeros))
+        trouves = []
+        longueurs, longueur = self._longueurs, len(compacte)
+        for numero in candidats:
+            if abs(longueurs[numero] - longueur) > maximum:
+                continue
+            ecart = distance(compacte, self._compactes[numero], maximum)
+            if ecart <= maximum:
+                trouves.append((ecart, numero))
+        trouves.sort()
+        return trouves
+
+    def proches(self, nom):
+        """[(nom connu, distance)] à la tolérance près (voir tolerance), les plus proches d'abord."""
+        compacte = "".join(mots(nom))
+        if not compacte:
+            return []
+        maximum = min(tolerance(len(compacte)), self.distance_max)
+        return [(self.noms[numero], ecart) for ecart, numero in self._proches(compacte, maximum)]
+
+    def _resoudre(self, nom):
+        """(distance, numéro) du nom connu le plus proche de `nom`, ou None."""
+        numero = self._exact(nom)
+        if numero is not None:
+            return 0, numero
+        compacte = "".join(mots(nom))
+        if not compacte:
+            return None
+        trouves = self._proches(compacte, min(tolerance(len(compacte)), self.distance_max))
+        return trouves[0] if trouves else None
+
+    def chercher(self, nom):
+        """Nom connu le plus proche de `nom` (exact, sinon à la tolérance près), ou None."""
+        trouve = self._resoudre(nom)
+        return None if trouve is None else self.noms[trouve[1]]
+
+    def citee(self, texte):
+        """Premier lieu cité dans le texte en toutes lettres, sinon le plus proche d'un mot qui suit « à », « sur »..."""
+        trouves = self._matcher.trouver(texte)
+        if trouves:
+            return self.noms[trouves[0].valeur]
+        decoupe = mots(texte)
+        meilleur = None
+        for position, mot in enumerate(decoupe[:-1]):
+            if mot not in PREPOSITIONS:
+                continue
+            # Un nom peut faire plusieurs mots (« saint etiene ») : jusqu'à trois après la préposition
+            suite = []
+            for suivant in decoupe[position + 1:position + 4]:
+                if suivant in FINS_DE_NOM:
+                    break
+                suite.append(suivant)
+            for nombre in range(len(suite), 0, -1):
+                trouve = self._resoudre(" ".join(suite[:nombre]))
+                if trouve is not None and (meilleur is None or trouve[0] < meilleur[0]):
+                    meilleur = trouve
+        return None if meilleur is None else self.noms[meilleur[1]]
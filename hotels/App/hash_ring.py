@@ -0,0 +1,42 @@
+"""
+Anneau de hachage cohérent pour répartir les conversations entre serveurs Rasa.
+
+Chaque serveur occupe REPLIQUES points de l'anneau ; une clé va au premier
+point qui la suit. Ajouter ou retirer un serveur ne déplace qu'environ
+1/n des conversations, les autres gardent leur tracker sur le même nœud.
+"""
+import hashlib
+from bisect import bisect
+
+REPLIQUES = 128
+
+
+def _hash(texte):
+    return int.from_bytes(hashlib.blake2b(texte.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    def __init__(self, noeuds, repliques=REPLIQUES):
+        if not noeuds:
+            raise ValueError("HashRing : au moins un nœud est nécessaire")
+        self.noeuds = list(dict.fromkeys(noeuds))
+        points = sorted((_hash(f"{noeud}#{i}"), noeud) for noeud in self.noeuds for i in range(repliques))
+        self._hashes = [h for h, _ in points]
+        self._noeuds = [noeud for _, noeud in points]
+
+    def noeud(self, cle):
+        """Nœud responsable de la clé."""
+        return self._noeuds[bisect(self._hashes, _hash(cle)) % len(self._hashes)]
+
+    def noeuds_pour(self, cle, nb):
+        """Les nb premiers nœuds distincts qui suivent la clé : le responsable, puis ses remplaçants."""
+        nb = min(nb, len(self.noeuds))
+        debut = bisect(self._hashes, _hash(cle))
+        trouves = []
+        for i in range(len(self._noeuds)):
+            noeud = self._noeuds[(debut + i) % len(self._noeuds)]
+            if noeud not in trouves:
+                trouves.append(noeud)
+                if len(trouves) == nb:
+                    break
+        return trouves
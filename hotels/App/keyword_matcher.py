@@ -0,0 +1,119 @@
+"""
+Recherche de mots-clés en un seul passage sur le texte (automate d'Aho-Corasick).
+
+L'automate est construit une fois pour tout un vocabulaire ; chaque
+message est ensuite parcouru une seule fois, en temps linéaire quelle que
+soit la taille du vocabulaire. Texte et mots-clés passent par
+texte.normaliser : « Hôtel ÉCONOMIQUE » trouve « economique ».
+
+Seuls les mots entiers comptent : « un » ne se trouve ni dans « une » ni
+dans « aucun », « lyon » pas dans « lyonnais ». L'automate avance donc mot
+par mot plutôt que caractère par caractère (le découpage en mots est fait
+par une expression régulière) ; un mot-clé de plusieurs mots (« pas cher »,
+« low-cost ») est une suite de transitions. Quand des mots-clés se
+chevauchent, le plus à gauche puis le plus long l'emporte (« pas chers »
+plutôt que « pas cher »).
+
+    matcher = KeywordMatcher([("paris", "Paris"), ("pas cher", "budget")])
+    matcher.trouver("Un hôtel pas cher à PARIS")
+    # [Correspondance(debut=9, fin=17, mot='pas cher', valeur='budget'),
+    #  Correspondance(debut=20, fin=25, mot='paris', valeur='Paris')]
+"""
+import re
+from collections import deque, namedtuple
+
+from .texte import normaliser
+
+# debut et fin sont des positions dans le texte normalisé
+Correspondance = namedtuple("Correspondance", "debut fin mot valeur")
+
+_MOT = re.compile(r"[^\W_]+")
+
+
+class KeywordMatcher:
+    """Automate d'Aho-Corasick sur les mots d'un vocabulaire de (mot-clé, valeur)."""
+
+    def __init__(self, motifs):
+        self._transitions = [{}]
+        self._echec = [0]
+        # État final : nombre de mots du mot-clé et valeurs associées ; sinon None
+        self._finals = [None]
+        # État final le plus proche en suivant les liens d'échec (-1 : aucun)
+        self._sortie = [-1]
+        for mot, valeur in motifs:
+            self._ajouter(_MOT.findall(normaliser(mot)), valeur)
+        self._construire()
+        # Premier état final à signaler en arrivant dans un état : lui-même ou sa sortie
+        self._rapport = [etat if final is not None else sortie
+                         for etat, (final, sortie) in enumerate(zip(self._finals, self._sortie))]
+
+    def _ajouter(self, mots, valeur):
+        if not mots:
+            return
+        etat = 0
+        for mot in mots:
+            suivant = self._transitions[etat].get(mot)
+            if suivant is None:
+                suivant = self._transitions[etat][mot] = len(self._transitions)
+                self._transitions.append({})
+                self._echec.append(0)
+                self._finals.append(None)
+                self._sortie.append(-1)
+            etat = suivant
+        if self._finals[etat] is None:
+            self._finals[etat] = (len(mots), [])
+        self._finals[etat][1].append(valeur)
+
+    def _construire(self):
+        # Parcours en largeur : l'échec d'un état est calculé avant ceux de ses enfants
+        file = deque(self._transitions[0].values())
+        while file:
+            etat = file.popleft()
+            for mot, enfant in self._transitions[etat].items():
+                file.append(enfant)
+                repli = self._echec[etat]
+                while repli and mot not in self._transitions[repli]:
+                    repli = self._echec[repli]
+                cible = self._transitions[repli].get(mot, 0)
+                self._echec[enfant] = cible if cible != enfant else 0
+                cible = self._echec[enfant]
+                self._sortie[enfant] = cible if self._finals[cible] is not None else self._sortie[cible]
+
+    def __len__(self):
+        return sum(len(final[1]) for final in self._finals if final is not None)
+
+    def toutes(self, texte):
+        """Toutes les occurrences, chevauchements compris, par position de fin."""
+        texte = normaliser(texte)
+        transitions, echec, finals, sortie, rapport = (
+            self._transitions, self._echec, self._finals, self._sortie, self._rapport)
+        resultats = []
+        debuts = []
+        etat = 0
+        for position in _MOT.finditer(texte):
+            mot = position.group()
+            debuts.append(position.start())
+            suivant = transitions[etat].get(mot)
+            while suivant is None and etat:
+                etat = echec[etat]
+                suivant = transitions[etat].get(mot)
+            etat = suivant or 0
+            final = rapport[etat]
+            while final > 0:
+                nb_mots, valeurs = finals[final]
+                debut, fin = debuts[-nb_mots], position.end()
+                resultats.extend(Correspondance(debut, fin, texte[debut:fin], valeur) for valeur in valeurs)
+                final = sortie[final]
+        return resultats
+
+    def trouver(self, texte):
+        """Occurrences sans chevauchement (la plus à gauche, puis la plus longue), dans l'ordre du texte."""
+        resultats = []
+        fin = 0
+        for correspondance in sorted(self.toutes(texte), key=lambda c: (c.debut, -c.fin)):
+            if correspondance.debut >= fin:
+                fin = correspondance.fin
+            elif (correspondance.debut, correspondance.fin) != resultats[-1][:2]:
+                continue
+            resultats.append(correspondance)
+        return resultats
@@ -0,0 +1,55 @@
+from importlib import import_module
+
+from django.db import migrations, models
+
+# Ancienne version du trigger, rétablie si la migration est annulée
+C2_TRIGGER_BETWEEN = import_module('App.migrations.0003_triggers').C2_TRIGGER
+
+
+# --- (C2) Chevauchement testé sur des intervalles semi-ouverts [date_a, date_d) ---
+# Les occupations d'une chambre étant disjointes, seule la dernière arrivée
+# avant NEW.date_d peut chevaucher : une seule descente dans l'index
+# (num_ch_id, date_a, date_d), quelle que soit la taille de la table.
+# Un départ et une arrivée le même jour ne sont plus un chevauchement.
+C2_TRIGGER = """
+CREATE TRIGGER IF NOT EXISTS check_occupation_overlap
+BEFORE INSERT ON Occupation
+FOR EACH ROW
+WHEN EXISTS (
+    SELECT 1 FROM (
+        SELECT o.date_a, o.date_d FROM Occupation o
+        WHERE o.num_ch_id = NEW.num_ch_id
+          AND o.date_a < NEW.date_d
+        ORDER BY o.date_a DESC
+        LIMIT 1
+    ) o
+    WHERE o.date_a < NEW.date_d AND o.date_d > NEW.date_a
+)
+BEGIN
+    SELECT RAISE(ABORT, 'Erreur (C2): Chambre déjà occupée pendant cette période');
+END;
+"""
+
+DROP_C2_TRIGGER = "DROP TRIGGER IF EXISTS check_occupation_overlap;"
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('App', '0003_triggers'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chambre',
+            index=models.Index(fields=['num_ho', 'num_ty'], name='chambre_hotel_type'),
+        ),
+        migrations.AddIndex(
+            model_name='occupation',
+            index=models.Index(fields=['num_ch', 'date_a', 'date_d'], name='occupation_chambre_dates'),
+        ),
+        migrations.RunSQL(
+            sql=[DROP_C2_TRIGGER, C2_TRIGGER],
+            reverse_sql=[DROP_C2_TRIGGER, C2_TRIGGER_BETWEEN],
+        ),
+    ]
@@ -0,0 +1,126 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:20
+
+from importlib import import_module
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Ancienne version du trigger C1, rétablie si la migration est annulée
+C1_TRIGGER_CHAMBRE = import_module('App.migrations.0003_triggers').C1_TRIGGER
+
+
+# --- Remplissage initial du résumé à partir des chambres existantes ---
+REMPLIR_RESUME = """
+INSERT INTO HotelTypeChambre (num_ho_id, num_ty_id, nb_chambres, prix_ty)
+SELECT c.num_ho_id, c.num_ty_id, COUNT(*), t.prix_ty
+FROM Chambre c JOIN TypeChambre t ON t.num_ty = c.num_ty_id
+GROUP BY c.num_ho_id, c.num_ty_id;
+"""
+
+# --- Maintien du résumé à chaque INSERT / DELETE / UPDATE sur Chambre ---
+# Des triggers plutôt que des signaux : bulk_create et les imports SQL
+# passent aussi par là.
+CHAMBRE_INSERT_TRIGGER = """
+CREATE TRIGGER IF NOT EXISTS hotel_type_chambre_insert
+AFTER INSERT ON Chambre
+FOR EACH ROW
+BEGIN
+    INSERT OR IGNORE INTO HotelTypeChambre (num_ho_id, num_ty_id, nb_chambres, prix_ty)
+    SELECT NEW.num_ho_id, NEW.num_ty_id, 0, prix_ty FROM TypeChambre WHERE num_ty = NEW.num_ty_id;
+    UPDATE HotelTypeChambre SET nb_chambres = nb_chambres + 1
+    WHERE num_ho_id = NEW.num_ho_id AND num_ty_id = NEW.num_ty_id;
+END;
+"""
+
+CHAMBRE_DELETE_TRIGGER = """
+CREATE TRIGGER IF NOT EXISTS hotel_type_chambre_delete
+AFTER DELETE ON Chambre
+FOR EACH ROW
+BEGIN
+    UPDATE HotelTypeChambre SET nb_chambres = nb_chambres - 1
+    WHERE num_ho_id = OLD.num_ho_id AND num_ty_id = OLD.num_ty_id;
+    DELETE FROM HotelTypeChambre
+    WHERE num_ho_id = OLD.num_ho_id AND num_ty_id = OLD.num_ty_id AND nb_chambres <= 0;
+END;
+"""
+
+CHAMBRE_UPDATE_TRIGGER = """
+CREATE TRIGGER IF NOT EXISTS hotel_type_chambre_update
+AFTER UPDATE OF num_ho_id, num_ty_id ON Chambre
+FOR EACH ROW
+WHEN OLD.num_ho_id != NEW.num_ho_id OR OLD.num_ty_id != NEW.num_ty_id
+BEGIN
+    UPDATE HotelTypeChambre SET nb_chambres = nb_chambres - 1
+    WHERE num_ho_id = OLD.num_ho_id AND num_ty_id = OLD.num_ty_id;
+    DELETE FROM HotelTypeChambre
+    WHERE num_ho_id = OLD.num_ho_id AND num_ty_id = OLD.num_ty_id AND nb_chambres <= 0;
+    INSERT OR IGNORE INTO HotelTypeChambre (num_ho_id, num_ty_id, nb_chambres, prix_ty)
+    SELECT NEW.num_ho_id, NEW.num_ty_id, 0, prix_ty FROM TypeChambre WHERE num_ty = NEW.num_ty_id;
+    UPDATE HotelTypeChambre SET nb_chambres = nb_chambres + 1
+    WHERE num_ho_id = NEW.num_ho_id AND num_ty_id = NEW.num_ty_id;
+END;
+"""
+
+TYPE_PRIX_TRIGGER = """
+CREATE TRIGGER IF NOT EXISTS hotel_type_chambre_prix
+AFTER UPDATE OF prix_ty ON TypeChambre
+FOR EACH ROW
+BEGIN
+    UPDATE HotelTypeChambre SET prix_ty = NEW.prix_ty WHERE num_ty_id = NEW.num_ty;
+END;
+"""
+
+# --- (C1) Recherche dans le résumé via l'index unique (num_ho_id, num_ty_id) ---
+C1_TRIGGER = """
+CREATE TRIGGER IF NOT EXISTS check_reservation_type_exists
+BEFORE INSERT ON Reservation
+FOR EACH ROW
+WHEN NOT EXISTS (
+    SELECT 1 FROM HotelTypeChambre
+    WHERE HotelTypeChambre.num_ho_id = NEW.num_ho_id
+      AND HotelTypeChambre.num_ty_id = NEW.num_ty_id
+)
+BEGIN
+    SELECT RAISE(ABORT, 'Erreur (C1): Hôtel ne possède aucune chambre de ce type');
+END;
+"""
+
+DROP_C1_TRIGGER = "DROP TRIGGER IF EXISTS check_reservation_type_exists;"
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('App', '0004_occupation_overlap_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HotelTypeChambre',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nb_chambres', models.IntegerField()),
+                ('prix_ty', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('num_ho', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='App.hotel')),
+                ('num_ty', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='App.typechambre')),
+            ],
+            options={
+                'db_table': 'HotelTypeChambre',
+                'unique_together': {('num_ho', 'num_ty')},
+            },
+        ),
+        migrations.RunSQL(REMPLIR_RESUME, reverse_sql=migrations.RunSQL.noop),
+        migrations.RunSQL(
+            sql=[CHAMBRE_INSERT_TRIGGER, CHAMBRE_DELETE_TRIGGER, CHAMBRE_UPDATE_TRIGGER, TYPE_PRIX_TRIGGER],
+            reverse_sql=[
+                "DROP TRIGGER IF EXISTS hotel_type_chambre_insert;",
+                "DROP TRIGGER IF EXISTS hotel_type_chambre_delete;",
+                "DROP TRIGGER IF EXISTS hotel_type_chambre_update;",
+                "DROP TRIGGER IF EXISTS hotel_type_chambre_prix;",
+            ],
+        ),
+        migrations.RunSQL(
+            sql=[DROP_C1_TRIGGER, C1_TRIGGER],
+            reverse_sql=[DROP_C1_TRIGGER, C1_TRIGGER_CHAMBRE],
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:23
+
+from collections import Counter
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Copie figée du calcul de App/daily_occupancy.py (nuits, compter) telle
+# qu'à cette migration : le module peut évoluer sans changer son effet.
+def remplir_agregat(apps, schema_editor):
+    Occupation = apps.get_model('App', 'Occupation')
+    DailyOccupancy = apps.get_model('App', 'DailyOccupancy')
+    occupations = Occupation.objects.values_list('num_ho_id', 'num_ch__num_ty_id', 'date_a', 'date_d')
+    compteur = Counter()
+    for hotel_id, type_id, date_a, date_d in occupations.iterator():
+        premier, dernier = date_a.date(), date_d.date()
+        # Nuits occupées par le séjour [date_a, date_d) : au moins une
+        for i in range(max((dernier - premier).days, 1)):
+            compteur[(hotel_id, type_id, premier + timedelta(days=i))] += 1
+    DailyOccupancy.objects.bulk_create(
+        (DailyOccupancy(num_ho_id=hotel_id, num_ty_id=type_id, jour=jour, nb_occupees=nb)
+         for (hotel_id, type_id, jour), nb in compteur.items()),
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('App', '0005_hoteltypechambre'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyOccupancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jour', models.DateField()),
+                ('nb_occupees', models.IntegerField(default=0)),
+                ('num_ho', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='App.hotel')),
+                ('num_ty', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='App.typechambre')),
+            ],
+            options={
+                'db_table': 'DailyOccupancy',
+                'indexes': [models.Index(fields=['jour', 'num_ho', 'nb_occupees'], name='daily_occupancy_jour')],
+                'unique_together': {('num_ho', 'num_ty', 'jour')},
+            },
+        ),
+        migrations.RunPython(remplir_agregat, migrations.RunPython.noop),
+    ]
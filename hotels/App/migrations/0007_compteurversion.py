@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:50
+
+from django.db import migrations, models
+
+# --- Version des données servies par le bot ---
+# Incrémentée par des triggers plutôt que par des signaux : les écritures
+# du serveur d'actions, de l'admin, de bulk_create et des imports SQL
+# comptent aussi. Le cache de réponses (App/response_cache.py) la met
+# dans ses clés.
+TABLES_DONNEES = ('Hotel', 'TypeChambre', 'Chambre', 'Reservation', 'Occupation')
+OPERATIONS = ('INSERT', 'UPDATE', 'DELETE')
+
+
+def trigger_version(table, operation):
+    return f"""
+CREATE TRIGGER IF NOT EXISTS version_donnees_{table.lower()}_{operation.lower()}
+AFTER {operation} ON {table}
+FOR EACH ROW
+BEGIN
+    UPDATE CompteurVersion SET valeur = valeur + 1 WHERE nom = 'donnees';
+END;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('App', '0006_dailyoccupancy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompteurVersion',
+            fields=[
+                ('nom', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('valeur', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'CompteurVersion',
+            },
+        ),
+        migrations.RunSQL(
+            "INSERT INTO CompteurVersion (nom, valeur) VALUES ('donnees', 0);",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            sql=[trigger_version(table, operation) for table in TABLES_DONNEES for operation in OPERATIONS],
+            reverse_sql=[f"DROP TRIGGER IF EXISTS version_donnees_{table.lower()}_{operation.lower()};"
+                         for table in TABLES_DONNEES for operation in OPERATIONS],
+        ),
+    ]
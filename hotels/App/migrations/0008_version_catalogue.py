@@ -0,0 +1,38 @@
+from django.db import migrations
+
+# --- Version du catalogue (hôtels, types, chambres) ---
+# Séparée de 'donnees' : les réservations et occupations, très fréquentes,
+# ne doivent pas faire recharger le catalogue en mémoire du serveur
+# d'actions (actions/catalogue.py).
+TABLES_CATALOGUE = ('Hotel', 'TypeChambre', 'Chambre')
+OPERATIONS = ('INSERT', 'UPDATE', 'DELETE')
+
+
+def trigger_version(table, operation):
+    return f"""
+CREATE TRIGGER IF NOT EXISTS version_catalogue_{table.lower()}_{operation.lower()}
+AFTER {operation} ON {table}
+FOR EACH ROW
+BEGIN
+    UPDATE CompteurVersion SET valeur = valeur + 1 WHERE nom = 'catalogue';
+END;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('App', '0007_compteurversion'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "INSERT INTO CompteurVersion (nom, valeur) VALUES ('catalogue', 0);",
+            reverse_sql="DELETE FROM CompteurVersion WHERE nom = 'catalogue';",
+        ),
+        migrations.RunSQL(
+            sql=[trigger_version(table, operation) for table in TABLES_CATALOGUE for operation in OPERATIONS],
+            reverse_sql=[f"DROP TRIGGER IF EXISTS version_catalogue_{table.lower()}_{operation.lower()};"
+                         for table in TABLES_CATALOGUE for operation in OPERATIONS],
+        ),
+    ]
@@ -33,11 +33,31 @@ class Chambre(models.Model):
     class Meta:
         db_table = 'Chambre'
         unique_together = (('num_ch', 'num_ho'),)
+        indexes = [
+            # Chambres d'un type dans un hôtel (chargement d'une semaine dans availability_cache) ;
+            # le trigger C1 lit le résumé HotelTypeChambre depuis la migration 0005
+            models.Index(fields=['num_ho', 'num_ty'], name='chambre_hotel_type'),
+        ]
 
     def __str__(self):
         return f"Chambre {self.num_ch} ({self.num_ho.nom_ho})"
 
 
+class HotelTypeChambre(models.Model):
+    """Résumé (hôtel, type de chambre) tenu à jour par les triggers de la migration 0005."""
+    num_ho = models.ForeignKey(Hotel, on_delete=models.CASCADE)
+    num_ty = models.ForeignKey(TypeChambre, on_delete=models.CASCADE)
+    nb_chambres = models.IntegerField()
+    prix_ty = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        db_table = 'HotelTypeChambre'
+        unique_together = (('num_ho', 'num_ty'),)
+
+    def __str__(self):
+        return f"{self.num_ho} : {self.nb_chambres} x {self.num_ty}"
+
+
 class Client(models.Model):
     num_cl = models.AutoField(primary_key=True)
     nom_cl = models.CharField(max_length=100)
@@ -78,6 +98,41 @@ class Occupation(models.Model):
     class Meta:
         db_table = 'Occupation'
         unique_together = (('num_cl', 'num_ho', 'num_ch', 'date_a'),)
+        indexes = [
+            # Utilisé par le trigger C2 (chevauchement sur une même chambre)
+            models.Index(fields=['num_ch', 'date_a', 'date_d'], name='occupation_chambre_dates'),
+        ]
 
     def __str__(self):
         return f"Occupation {self.num_ch} du {self.date_a} au {self.date_d}"
+
+
+class DailyOccupancy(models.Model):
+    """Nombre de chambres occupées par hôtel, type et nuit, tenu à jour par App/signals.py."""
+    num_ho = models.ForeignKey(Hotel, on_delete=models.CASCADE)
+    num_ty = models.ForeignKey(TypeChambre, on_delete=models.CASCADE)
+    jour = models.DateField()
+    nb_occupees = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'DailyOccupancy'
+        unique_together = (('num_ho', 'num_ty', 'jour'),)
+        indexes = [
+            # Couvrant : la série temporelle se lit sans accéder à la table
+            models.Index(fields=['jour', 'num_ho', 'nb_occupees'], name='daily_occupancy_jour'),
+        ]
+
+    def __str__(self):
+        return f"{self.num_ho} {self.num_ty} le {self.jour} : {self.nb_occupees}"
+
+
+class CompteurVersion(models.Model):
+    """Compteur incrémenté par les triggers de la migration 0007 à chaque écriture sur les tables suivies."""
+    nom = models.CharField(max_length=50, primary_key=True)
+    valeur = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'CompteurVersion'
+
+    def __str__(self):
+        return f"{self.nom} : {self.valeur}"
@@ -0,0 +1,222 @@
+"""
+Passerelle NLU : les messages qui arrivent au même moment sont analysés par lots.
+
+Sans elle, chaque message déclenche sa propre inférence NLU dans Rasa. Avec
+NLU_GATEWAY["ENABLED"], rasa_client confie d'abord le texte à cette
+passerelle :
+
+- les textes reçus pendant WINDOW_MS millisecondes (au plus MAX_BATCH)
+  forment un lot ; tant que les travailleurs sont occupés, le lot suivant
+  continue de grossir au lieu de partir ;
+- un processus travailleur local charge le modèle Rasa (MODEL) une seule
+  fois et fait passer tout le lot dans le graphe NLU en un seul appel ;
+- chaque conversation récupère son intention et ses entités, envoyées à
+  Rasa sous la forme du raccourci « /intention@confiance{entités} » : Rasa
+  saute alors sa propre NLU et n'exécute que le dialogue. Le texte
+  d'origine suit dans metadata["texte"] (canal actions.canal.RestMetadata,
+  à déclarer dans credentials.yml en même temps qu'ENABLED).
+
+Une analyse qui dépasse TIMEOUT secondes (travailleur en panne ou
+saturé) est abandonnée : rasa_client envoie alors le texte brut à Rasa.
+
+Réglage dans settings.py :
+
+    NLU_GATEWAY = {
+        "ENABLED": False,
+        "MODEL": BASE_DIR / "models",   # dossier ou archive .tar.gz de rasa train
+        "WORKERS": 1,                   # processus d'inférence
+        "WINDOW_MS": 5,
+        "MAX_BATCH": 32,
+        "TIMEOUT": 1,                   # secondes, attente du lot comprise
+    }
+"""
+import asyncio
+import json
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+
+WORKERS = 1
+WINDOW_MS = 5
+MAX_BATCH = 32
+TIMEOUT = 1
+
+_batchers = weakref.WeakKeyDictionary()
+_travailleur = None
+
+
+def config():
+    nlu = getattr(settings, "NLU_GATEWAY", {})
+    return {
+        "ENABLED": nlu.get("ENABLED", False),
+        "MODEL": str(nlu.get("MODEL", "models")),
+        "WORKERS": nlu.get("WORKERS", WORKERS),
+        "WINDOW_MS": nlu.get("WINDOW_MS", WINDOW_MS),
+        "MAX_BATCH": nlu.get("MAX_BATCH", MAX_BATCH),
+        "TIMEOUT": nlu.get("TIMEOUT", TIMEOUT),
+    }
+
+
+class MicroBatcher:
+    """Regroupe les soumissions concurrentes en lots passés à `traiter` (coroutine liste -> liste)."""
+
+    def __init__(self, traiter, fenetre=WINDOW_MS / 1000, taille_max=MAX_BATCH, paralleles=1):
+        self.traiter = traiter
+        self.fenetre = fenetre
+        self.taille_max = taille_max
+        self.paralleles = paralleles
+        self.lots = self.messages = 0
+        self._attente = []
+        self._en_vol = 0
+        self._minuteur = None
+        self._taches = set()
+
+    async def soumettre(self, element):
+        futur = asyncio.get_running_loop().create_future()
+        self._attente.append((element, futur))
+        if len(self._attente) >= self.taille_max:
+            self._vider()
+        elif self._minuteur is None and self._en_vol < self.paralleles:
+            self._minuteur = asyncio.get_running_loop().call_later(self.fenetre, self._vider)
+        return await futur
+
+    def _vider(self):
+        if self._minuteur is not None:
+            self._minuteur.cancel()
+            self._minuteur = None
+        # Appelants partis (annulation, TIMEOUT) : leur texte n'est pas analysé
+        self._attente = [(element, futur) for element, futur in self._attente if not futur.done()]
+        # Travailleurs occupés : les messages attendent la fin d'un lot (voir _traiter)
+        while self._attente and self._en_vol < self.paralleles:
+            lot, self._attente = self._attente[:self.taille_max], self._attente[self.taille_max:]
+            self._en_vol += 1
+            tache = asyncio.ensure_future(self._traiter(lot))
+            self._taches.add(tache)
+            tache.add_done_callback(self._taches.discard)
+
+    async def _traiter(self, lot):
+        try:
+            resultats = await self.traiter([element for element, _ in lot])
+        except Exception as e:
+            for _, futur in lot:
+                if not futur.cancelled():
+                    futur.set_exception(e)
+        else:
+            self.lots += 1
+            self.messages += len(lot)
+            for (_, futur), resultat in zip(lot, resultats):
+                # Le client a pu partir pendant l'analyse
+                if not futur.cancelled():
+                    futur.set_result(resultat)
+        finally:
+            self._en_vol -= 1
+            self._vider()
+
+    def stats(self):
+        return {
+            "lots": self.lots,
+            "messages": self.messages,
+            "taille_moyenne": round(self.messages / self.lots, 1) if self.lots else None,
+            "en_attente": len(self._attente),
+            "en_vol": self._en_vol,
+        }
+
+
+# --- Travailleur d'inférence ---
+
+_analyser_lot = None
+
+
+def charger_rasa(modele):
+    """Charge le modèle entraîné (dans le processus travailleur) ; renvoie l'analyse d'une liste de textes."""
+    from rasa.core.agent import Agent
+    from rasa.core.channels import UserMessage
+    from rasa.engine.constants import PLACEHOLDER_MESSAGE, PLACEHOLDER_TRACKER
+    from rasa.shared.core.trackers import DialogueStateTracker
+
+    agent = Agent.load(modele)
+    processeur = agent.processor
+    cible = processeur.model_metadata.nlu_target
+    tracker = DialogueStateTracker.from_events("nlu_gateway", [], slots=agent.domain.slots)
+
+    def analyser(textes):
+        # Un seul passage dans le graphe pour tout le lot (tokenizers, featurizers, DIET)
+        sortie = processeur.graph_runner.run(
+            inputs={PLACEHOLDER_MESSAGE: [UserMessage(texte) for texte in textes], PLACEHOLDER_TRACKER: tracker},
+            targets=[cible],
+        )[cible]
+        return [
+            {"text": texte, "intent": {"name": None, "confidence": 0.0}, "entities": [],
+             **message.as_dict(only_output_properties=True)}
+            for texte, message in zip(textes, sortie)
+        ]
+
+    return analyser
+
+
+def _initialiser(charger, modele):
+    global _analyser_lot
+    _analyser_lot = charger(modele)
+
+
+def _analyser(textes):
+    return _analyser_lot(textes)
+
+
+class TravailleurLocal:
+    """Processus d'inférence qui gardent le modèle chargé ; `charger(modele)` s'exécute dans chacun."""
+
+    def __init__(self, modele, processus=WORKERS, charger=charger_rasa):
+        self.processus = processus
+        self._pool = ProcessPoolExecutor(processus, initializer=_initialiser, initargs=(charger, modele))
+
+    async def analyser(self, textes):
+        return await asyncio.get_running_loop().run_in_executor(self._pool, _analyser, textes)
+
+    def arreter(self):
+        self._pool.shutdown(cancel_futures=True)
+
+
+def get_travailleur():
+    global _travailleur
+    if _travailleur is None:
+        conf = config()
+        _travailleur = TravailleurLocal(conf["MODEL"], conf["WORKERS"])
+    return _travailleur
+
+
+def get_batcher():
+    """Batcher de la boucle courante, branché sur le travailleur du processus."""
+    loop = asyncio.get_running_loop()
+    batcher = _batchers.get(loop)
+    if batcher is None:
+        conf = config()
+        travailleur = get_travailleur()
+        batcher = _batchers[loop] = MicroBatcher(travailleur.analyser, conf["WINDOW_MS"] / 1000,
+                                                 conf["MAX_BATCH"], travailleur.processus)
+    return batcher
+
+
+async def analyser(texte):
+    """Intention et entités du texte, analysé avec les messages arrivés en même temps.
+
+    Lève asyncio.TimeoutError au-delà de TIMEOUT secondes.
+    """
+    return await asyncio.wait_for(get_batcher().soumettre(texte), config()["TIMEOUT"])
+
+
+def raccourci(analyse):
+    """Message « /intention@confiance{entités} » que Rasa traite sans repasser par sa NLU."""
+    intention = (analyse.get("intent") or {}).get("name")
+    if not intention:
+        return None
+    entites = {}
+    for entite in analyse.get("entities", []):
+        entites.setdefault(entite["entity"], []).append(entite["value"])
+    confiance = analyse["intent"].get("confidence") or 0.0
+    return f"/{intention}@{confiance:.4f}" + (json.dumps(entites, ensure_ascii=False) if entites else "")
+
+
+def stats():
+    return [batcher.stats() for batcher in _batchers.values()]
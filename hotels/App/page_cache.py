@@ -0,0 +1,76 @@
+"""
+Cache en mémoire des pages statiques (accueil, page de chat).
+
+Ces pages ne dépendent ni du visiteur ni de la base : le HTML est rendu une
+fois par processus et par gabarit, avec son ETag. Un navigateur qui revient
+envoie If-None-Match et reçoit un 304 sans corps ; Cache-Control: no-cache
+l'oblige à revalider à chaque visite, donc un nouveau déploiement (nouveaux
+noms hachés des statiques, voir storage) est vu tout de suite.
+
+Seul le rendu est évité : la vue s'exécute toujours (la page de chat crée
+le sender dans la session), et les cookies posés par les middlewares
+s'ajoutent à la réponse en cache comme à une autre.
+
+Réglage dans settings.py :
+
+    PAGE_CACHE = {
+        "ENABLED": False,   # désactivé : render() à chaque requête
+    }
+"""
+import hashlib
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.shortcuts import render
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response
+
+_pages = {}
+_lock = threading.Lock()
+_stats = {"rendus": 0, "servis": 0, "non_modifies": 0}
+
+
+def config():
+    page_cache = getattr(settings, "PAGE_CACHE", {})
+    return {
+        "ENABLED": page_cache.get("ENABLED", False),
+    }
+
+
+def page(gabarit, request):
+    """(contenu, etag) du gabarit, rendu au premier appel."""
+    courant = _pages.get(gabarit)
+    if courant is None:
+        with _lock:
+            courant = _pages.get(gabarit)
+            if courant is None:
+                contenu = render_to_string(gabarit, request=request).encode()
+                courant = _pages[gabarit] = (contenu, '"%s"' % hashlib.blake2b(contenu, digest_size=16).hexdigest())
+                _stats["rendus"] += 1
+    return courant
+
+
+def rendre(request, gabarit):
+    """Comme render(request, gabarit) pour une page sans contexte, mais servie depuis le cache."""
+    if not config()["ENABLED"]:
+        return render(request, gabarit)
+    contenu, etag = page(gabarit, request)
+    reponse = get_conditional_response(request, etag=etag)
+    if reponse is None:
+        reponse = HttpResponse(contenu)
+        _stats["servis"] += 1
+    else:
+        _stats["non_modifies"] += 1
+    reponse.headers["ETag"] = etag
+    reponse.headers["Cache-Control"] = "no-cache"
+    return reponse
+
+
+def vider():
+    with _lock:
+        _pages.clear()
+
+
+def stats():
+    return {"pages": len(_pages), **_stats}
@@ -0,0 +1,163 @@
+"""
+Appels vers un serveur Rasa : limite de concurrence, attente bornée et disjoncteur.
+
+Chaque serveur (URL) a son Backend :
+
+- au plus `limite` appels en cours par processus ; au-delà, un appel attend
+  au plus `attente_max` secondes puis échoue (Surcharge) au lieu de
+  s'empiler sans fin quand Rasa ralentit ;
+- un disjoncteur s'ouvre après `seuil` échecs consécutifs : les appels
+  échouent aussitôt (CircuitOuvert) pendant `delai_reouverture` secondes,
+  puis un seul appel d'essai décide de la refermeture.
+
+Les latences récentes donnent le p95 utilisé pour les relances (voir
+rasa_client.envoyer) et, avec les compteurs, alimentent /chat/metriques/.
+"""
+import asyncio
+import time
+import weakref
+from collections import deque
+from contextlib import asynccontextmanager
+
+import aiohttp
+
+FENETRE_LATENCES = 200
+MIN_ECHANTILLONS = 20
+
+
+class BackendIndisponible(Exception):
+    pass
+
+
+class CircuitOuvert(BackendIndisponible):
+    pass
+
+
+class Surcharge(BackendIndisponible):
+    pass
+
+
+class CircuitBreaker:
+    FERME = "ferme"
+    OUVERT = "ouvert"
+    SEMI_OUVERT = "semi_ouvert"
+
+    def __init__(self, seuil=5, delai_reouverture=10, horloge=time.monotonic):
+        self.seuil = seuil
+        self.delai_reouverture = delai_reouverture
+        self._horloge = horloge
+        self.etat = self.FERME
+        self.echecs_consecutifs = 0
+        self.ouvertures = 0
+        self._reouverture = 0.0
+        self._sonde = False
+
+    def autorise(self):
+        if self.etat == self.OUVERT and self._horloge() >= self._reouverture:
+            self.etat = self.SEMI_OUVERT
+        if self.etat == self.SEMI_OUVERT:
+            # Un seul appel d'essai à la fois
+            if self._sonde:
+                return False
+            self._sonde = True
+        return self.etat != self.OUVERT
+
+    def succes(self):
+        self.etat = self.FERME
+        self.echecs_consecutifs = 0
+        self._sonde = False
+
+    def echec(self):
+        self.echecs_consecutifs += 1
+        self._sonde = False
+        if self.etat == self.SEMI_OUVERT or self.echecs_consecutifs >= self.seuil:
+            if self.etat != self.OUVERT:
+                self.ouvertures += 1
+            self.etat = self.OUVERT
+            self._reouverture = self._horloge() + self.delai_reouverture
+
+    def abandon(self):
+        """Appel annulé sans verdict (relance gagnante, client parti)."""
+        self._sonde = False
+
+
+class Backend:
+    def __init__(self, url, limite=100, attente_max=2, breaker=None):
+        self.url = url
+        self.limite = limite
+        self.attente_max = attente_max
+        self.breaker = breaker or CircuitBreaker()
+        self.latences = deque(maxlen=FENETRE_LATENCES)
+        self.en_cours = self.en_attente = 0
+        self.appels = self.echecs = self.surcharges = self.rejets = 0
+        # Un sémaphore asyncio appartient à une boucle d'événements
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def _semaphore(self):
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.limite)
+        return semaphore
+
+    @asynccontextmanager
+    async def creneau(self):
+        """Réserve une place pour un appel ; lève BackendIndisponible si le backend ne peut pas le prendre."""
+        if not self.breaker.autorise():
+            self.rejets += 1
+            raise CircuitOuvert(f"Circuit ouvert pour {self.url}")
+        semaphore = self._semaphore()
+        self.en_attente += 1
+        try:
+            await asyncio.wait_for(semaphore.acquire(), self.attente_max)
+        except asyncio.TimeoutError:
+            self.surcharges += 1
+            self.breaker.abandon()
+            raise Surcharge(f"Aucune place libre pour {self.url} après {self.attente_max}s") from None
+        except BaseException:
+            self.breaker.abandon()
+            raise
+        finally:
+            self.en_attente -= 1
+
+        self.en_cours += 1
+        self.appels += 1
+        debut = time.monotonic()
+        try:
+            yield
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            self.echecs += 1
+            self.breaker.echec()
+            raise
+        except BaseException:
+            self.breaker.abandon()
+            raise
+        else:
+            self.latences.append(time.monotonic() - debut)
+            self.breaker.succes()
+        finally:
+            self.en_cours -= 1
+            semaphore.release()
+
+    def percentile(self, p):
+        if len(self.latences) < MIN_ECHANTILLONS:
+            return None
+        valeurs = sorted(self.latences)
+        return valeurs[min(len(valeurs) - 1, int(p / 100 * len(valeurs)))]
+
+    def stats(self):
+        p50, p95 = self.percentile(50), self.percentile(95)
+        return {
+            "url": self.url,
+            "disjoncteur": self.breaker.etat,
+            "ouvertures": self.breaker.ouvertures,
+            "en_cours": self.en_cours,
+            "en_attente": self.en_attente,
+            "limite": self.limite,
+            "appels": self.appels,
+            "echecs": self.echecs,
+            "surcharges": self.surcharges,
+            "rejets": self.rejets,
+            "latence_p50_ms": None if p50 is None else round(p50 * 1000, 1),
+            "latence_p95_ms": None if p95 is None else round(p95 * 1000, 1),
+        }
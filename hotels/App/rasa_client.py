@@ -0,0 +1,268 @@
+"""
+Client HTTP asynchrone vers le webhook REST de Rasa.
+
+Une seule ClientSession aiohttp par boucle d'événements (donc par processus
+ASGI) : les connexions vers Rasa restent ouvertes (keep-alive) et sont
+partagées par toutes les conversations en cours, dans la limite de
+POOL_SIZE. Les délais bornent l'attente d'un aller-retour NLU + actions.
+
+Chaque visiteur a son propre sender (tiré au hasard et gardé dans sa
+session Django), donc son propre tracker côté Rasa. Les senders sont
+répartis entre les serveurs de SERVERS par hachage cohérent : une
+conversation reste sur le nœud qui détient son tracker.
+
+Chaque appel passe par le Backend de son serveur (rasa_backend) : place
+limitée à POOL_SIZE appels, attente bornée, disjoncteur. Quand le serveur
+ne peut pas répondre, les vues renvoient EXCUSE au lieu d'attendre.
+
+Avec HEDGING, envoyer() relance la requête vers le serveur suivant de
+l'anneau si la réponse tarde au-delà du p95 observé (ou HEDGE_DELAY tant
+qu'il n'y a pas assez de mesures), et garde la première réponse. À
+n'activer qu'avec un tracker store partagé entre les serveurs Rasa : le
+message est alors traité deux fois par le tracker de la conversation.
+
+Réglage dans settings.py :
+
+    RASA = {
+        "SERVERS": ["http://localhost:5005/webhooks/rest/webhook"],
+        "TIMEOUT": 30,          # secondes, aller-retour complet
+        "CONNECT_TIMEOUT": 2,
+        "POOL_SIZE": 100,       # appels simultanés par serveur et par processus
+        "QUEUE_TIMEOUT": 2,     # attente maximale d'une place libre
+        "BREAKER_THRESHOLD": 5, # échecs consécutifs avant ouverture du disjoncteur
+        "BREAKER_RESET": 10,    # secondes avant un appel d'essai
+        "HEDGING": False,
+        "HEDGE_DELAY": 0.5,
+        "API_TOKEN": None,      # jeton de l'API HTTP (rasa run --enable-api --auth-token)
+    }
+
+Avec NLU_GATEWAY["ENABLED"], le texte est d'abord analysé par lots par la
+passerelle NLU (nlu_gateway) et Rasa ne reçoit que l'intention déjà prédite.
+
+La vue asynchrone n'a d'intérêt que servie par ASGI (uvicorn projet.asgi:application) ;
+sous WSGI chaque requête a sa propre boucle et donc sa propre session.
+"""
+import asyncio
+import json
+import uuid
+import weakref
+from urllib.parse import quote, urlsplit
+
+import aiohttp
+from django.conf import settings
+
+from . import chat_log, nlu_gateway
+from .hash_ring import HashRing
+from .rasa_backend import Backend, BackendIndisponible, CircuitBreaker  # noqa: F401
+
+URL = "http://localhost:5005/webhooks/rest/webhook"
+TIMEOUT = 30
+CONNECT_TIMEOUT = 2
+POOL_SIZE = 100
+QUEUE_TIMEOUT = 2
+BREAKER_THRESHOLD = 5
+BREAKER_RESET = 10
+HEDGE_DELAY = 0.5
+SESSION_KEY = "rasa_sender"
+
+EXCUSE = ("Désolé, notre assistant est momentanément surchargé. "
+          "Merci de réessayer dans quelques instants.")
+
+_sessions = weakref.WeakKeyDictionary()
+_anneau = None
+_backends = {}
+_relances = {"lancees": 0, "gagnees": 0}
+
+
+def config():
+    rasa = getattr(settings, "RASA", {})
+    return {
+        "SERVERS": list(rasa.get("SERVERS") or [rasa.get("URL", URL)]),
+        "TIMEOUT": rasa.get("TIMEOUT", TIMEOUT),
+        "CONNECT_TIMEOUT": rasa.get("CONNECT_TIMEOUT", CONNECT_TIMEOUT),
+        "POOL_SIZE": rasa.get("POOL_SIZE", POOL_SIZE),
+        "QUEUE_TIMEOUT": rasa.get("QUEUE_TIMEOUT", QUEUE_TIMEOUT),
+        "BREAKER_THRESHOLD": rasa.get("BREAKER_THRESHOLD", BREAKER_THRESHOLD),
+        "BREAKER_RESET": rasa.get("BREAKER_RESET", BREAKER_RESET),
+        "HEDGING": rasa.get("HEDGING", False),
+        "HEDGE_DELAY": rasa.get("HEDGE_DELAY", HEDGE_DELAY),
+        "API_TOKEN": rasa.get("API_TOKEN"),
+    }
+
+
+def get_session():
+    """Session partagée de la boucle courante, créée au premier appel."""
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        conf = config()
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=conf["POOL_SIZE"] * len(conf["SERVERS"]),
+                                           limit_per_host=conf["POOL_SIZE"]),
+            timeout=aiohttp.ClientTimeout(total=conf["TIMEOUT"], sock_connect=conf["CONNECT_TIMEOUT"]),
+            raise_for_status=True,
+        )
+        _sessions[loop] = session
+    return session
+
+
+async def fermer():
+    session = _sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None:
+        await session.close()
+
+
+def anneau():
+    global _anneau
+    serveurs = config()["SERVERS"]
+    courant = _anneau
+    if courant is None or courant.noeuds != serveurs:
+        courant = _anneau = HashRing(serveurs)
+    return courant
+
+
+def serveur(sender):
+    """URL du serveur Rasa qui détient la conversation."""
+    return anneau().noeud(sender)
+
+
+def backend(url):
+    courant = _backends.get(url)
+    if courant is None:
+        conf = config()
+        courant = _backends[url] = Backend(
+            url, limite=conf["POOL_SIZE"], attente_max=conf["QUEUE_TIMEOUT"],
+            breaker=CircuitBreaker(conf["BREAKER_THRESHOLD"], conf["BREAKER_RESET"]),
+        )
+    return courant
+
+
+async def _poster(url, payload):
+    async with backend(url).creneau():
+        async with get_session().post(url, json=payload) as response:
+            return await response.json()
+
+
+async def _payload(sender, message):
+    payload = {"sender": sender, "message": message}
+    if not nlu_gateway.config()["ENABLED"]:
+        return payload
+    try:
+        with chat_log.chrono("nlu"):
+            analyse = await nlu_gateway.analyser(message)
+    except Exception:
+        # Passerelle en panne ou trop lente : Rasa fait l'analyse lui-même
+        return payload
+    intention = analyse.get("intent") or {}
+    chat_log.noter(intention=intention.get("name"), confiance=intention.get("confidence"))
+    raccourci = nlu_gateway.raccourci(analyse)
+    if raccourci is None:
+        return payload
+    return {"sender": sender, "message": raccourci, "metadata": {"texte": message}}
+
+
+async def envoyer(sender, message):
+    """Liste des messages renvoyés par Rasa pour un message utilisateur.
+
+    Lève BackendIndisponible (surcharge, disjoncteur ouvert) ou une erreur aiohttp.
+    """
+    payload = await _payload(sender, message)
+    with chat_log.chrono("rasa"):
+        return await _envoyer(sender, payload)
+
+
+async def _envoyer(sender, payload):
+    conf = config()
+    noeuds = anneau().noeuds_pour(sender, 2) if conf["HEDGING"] else [serveur(sender)]
+    if len(noeuds) < 2:
+        return await _poster(noeuds[0], payload)
+
+    primaire = asyncio.ensure_future(_poster(noeuds[0], payload))
+    taches = {primaire}
+    try:
+        fini, _ = await asyncio.wait(taches, timeout=backend(noeuds[0]).percentile(95) or conf["HEDGE_DELAY"])
+        if fini and primaire.exception() is None:
+            return primaire.result()
+        # Réponse lente : relance en parallèle ; échec du primaire : bascule
+        erreur = primaire.exception() if fini else None
+        if fini:
+            taches = set()
+        _relances["lancees"] += 1
+        chat_log.noter(relance=True)
+        secours = asyncio.ensure_future(_poster(noeuds[1], payload))
+        taches.add(secours)
+        while taches:
+            fini, taches = await asyncio.wait(taches, return_when=asyncio.FIRST_COMPLETED)
+            for tache in fini:
+                if tache.exception() is None:
+                    if tache is secours:
+                        _relances["gagnees"] += 1
+                    return tache.result()
+                erreur = tache.exception()
+        raise erreur
+    finally:
+        for tache in taches:
+            tache.cancel()
+
+
+async def flux(sender, message):
+    """Messages de Rasa un par un, dès qu'ils sont émis (canal REST avec ?stream=true)."""
+    payload = await _payload(sender, message)
+    url = serveur(sender)
+    async with backend(url).creneau():
+        async with get_session().post(url, params={"stream": "true"}, json=payload) as response:
+            async for ligne in response.content:
+                ligne = ligne.strip()
+                if ligne:
+                    yield json.loads(ligne)
+
+
+# --- API HTTP de Rasa (tracker) ---
+
+def _api(sender, chemin):
+    """URL et paramètres d'un appel à l'API HTTP du serveur qui détient la conversation."""
+    url = serveur(sender)
+    morceaux = urlsplit(url)
+    cible = f"{morceaux.scheme}://{morceaux.netloc}/conversations/{quote(sender, safe='')}{chemin}"
+    token = config()["API_TOKEN"]
+    return url, cible, {"token": token} if token else {}
+
+
+async def tracker(sender):
+    """État de la conversation : slots et événements depuis le dernier redémarrage."""
+    url, cible, params = _api(sender, "/tracker")
+    async with backend(url).creneau():
+        async with get_session().get(cible, params={**params, "include_events": "AFTER_RESTART"}) as response:
+            return await response.json()
+
+
+async def ajouter_evenements(sender, evenements):
+    """Ajoute des événements au tracker sans faire tourner NLU, politiques ni actions."""
+    url, cible, params = _api(sender, "/tracker/events")
+    async with backend(url).creneau():
+        async with get_session().post(cible, params={**params, "include_events": "NONE"}, json=evenements) as response:
+            await response.read()
+
+
+def metriques():
+    return {
+        "backends": [b.stats() for b in _backends.values()],
+        "relance_active": config()["HEDGING"],
+        "relances": dict(_relances),
+        "nlu": nlu_gateway.stats(),
+    }
+
+
+# --- Identifiant de conversation ---
+
+async def sender_id(request):
+    """Sender propre au visiteur, conservé dans sa session (survit au changement de clé de session)."""
+    sender = await request.session.aget(SESSION_KEY)
+    if sender is None:
+        sender = uuid.uuid4().hex
+        await request.session.aset(SESSION_KEY, sender)
+    return sender
+
+
+def sender_id_sync(request):
+    return request.session.setdefault(SESSION_KEY, uuid.uuid4().hex)
@@ -0,0 +1,282 @@
+"""
+Cache des réponses du bot, devant les appels à Rasa du chat : vues chat/
+et chat/stream/, WebSocket /ws/chat/.
+
+« bonjour », « hôtels à Paris », « pas cher »… donnent toujours les mêmes
+réponses tant que la conversation est dans le même état. La clé combine :
+
+- le texte normalisé (texte.normaliser : minuscules, sans accents, espaces réduits) ;
+- une empreinte des slots SLOTS de la conversation avant le message ;
+- la version des données (versions.DONNEES), incrémentée par trigger à
+  chaque écriture sur les hôtels, chambres, réservations et occupations,
+  relue au plus toutes les VERSION_TTL secondes.
+
+Sur un miss, le message part chez Rasa, puis on relit le tracker pour
+garder avec les réponses les événements du tour (intention, actions,
+slots, messages du bot). Sur un hit, ces événements sont ajoutés tels quels
+au tracker : Rasa ne refait ni NLU, ni politique, ni action, et la
+conversation se retrouve dans l'état où l'aurait mise le traitement
+complet. Les slots de chaque conversation sont gardés dans sa session.
+En flux, un hit renvoie d'un coup les messages mis en cache ; un miss les
+relaie dès que Rasa les émet.
+
+Les tours d'une même conversation passent un par un (un verrou par sender
+et par boucle) : la relecture du tracker ne doit pas attraper le tour d'un
+autre message. Un tour qui ne correspond pas au message envoyé (autre
+processus sur la même conversation) n'est pas mis en cache.
+
+Il faut l'API HTTP de Rasa (rasa run --enable-api, jeton dans
+RASA["API_TOKEN"]). Tant que le tracker ne peut pas être lu, l'état de la
+conversation est inconnu et elle se passe du cache ; la lecture est
+retentée à chaque message.
+
+Réglage dans settings.py :
+
+    RESPONSE_CACHE = {
+        "ENABLED": False,
+        "MAX_ENTRIES": 10000,
+        "TIMEOUT": 300,     # secondes ; borne aussi la durée d'une variante de réponse tirée au hasard
+        "VERSION_TTL": 0.5,
+        "SLOTS": ["ville", "prix", "personnes"],
+    }
+"""
+import asyncio
+import hashlib
+import json
+import time
+import weakref
+from collections import OrderedDict
+from threading import RLock
+
+import aiohttp
+from django.conf import settings
+
+from . import chat_log, rasa_client, versions
+from .texte import normaliser
+
+MAX_ENTRIES = 10000
+TIMEOUT = 300
+SLOTS = ("ville", "prix", "personnes")
+VERSION_TTL = 0.5
+SESSION_SLOTS = "rasa_slots"
+
+_version = (None, 0.0)
+# Boucle d'événements -> {sender: asyncio.Lock}, vidé des verrous que plus personne n'attend
+_verrous = weakref.WeakKeyDictionary()
+
+
+def config():
+    cache = getattr(settings, "RESPONSE_CACHE", {})
+    return {
+        "ENABLED": cache.get("ENABLED", False),
+        "MAX_ENTRIES": cache.get("MAX_ENTRIES", MAX_ENTRIES),
+        "TIMEOUT": cache.get("TIMEOUT", TIMEOUT),
+        "SLOTS": list(cache.get("SLOTS", SLOTS)),
+        "VERSION_TTL": cache.get("VERSION_TTL", VERSION_TTL),
+    }
+
+
+class ResponseCache:
+    """LRU borné en nombre d'entrées, avec durée de vie ; compteurs de hits, misses, évictions et expirations."""
+
+    def __init__(self, max_entries=MAX_ENTRIES, timeout=TIMEOUT):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._entrees = OrderedDict()
+        self._lock = RLock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def obtenir(self, cle):
+        with self._lock:
+            entree = self._entrees.get(cle)
+            if entree is not None:
+                expiration, valeur = entree
+                if expiration > time.monotonic():
+                    self._entrees.move_to_end(cle)
+                    self.hits += 1
+                    return valeur
+                del self._entrees[cle]
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def enregistrer(self, cle, valeur):
+        with self._lock:
+            self._entrees[cle] = (time.monotonic() + self.timeout, valeur)
+            self._entrees.move_to_end(cle)
+            while len(self._entrees) > self.max_entries:
+                self._entrees.popitem(last=False)
+                self.evictions += 1
+
+    def vider(self):
+        with self._lock:
+            self._entrees.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entrees": len(self._entrees),
+                "max_entrees": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "taux_hits": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+def empreinte(slots):
+    return hashlib.blake2b(json.dumps(slots, sort_keys=True, default=str).encode(), digest_size=8).hexdigest()
+
+
+def cle(texte, slots, version):
+    return normaliser(texte), empreinte(slots), version
+
+
+def _dernier_tour(evenements, message):
+    """Événements du dernier tour (depuis le dernier message utilisateur), sans horodatage.
+
+    Liste vide si ce dernier message n'est pas `message` (texte tapé, ou
+    metadata["texte"] quand la passerelle NLU a envoyé un raccourci).
+    """
+    debut = max((i for i, e in enumerate(evenements) if e.get("event") == "user"), default=None)
+    if debut is None:
+        return []
+    utilisateur = evenements[debut]
+    textes = (utilisateur.get("text") or "", (utilisateur.get("metadata") or {}).get("texte") or "")
+    if normaliser(message) not in map(normaliser, textes):
+        return []
+    return [{k: v for k, v in e.items() if k not in ("timestamp", "message_id")} for e in evenements[debut:]]
+
+
+def _intention(evenements):
+    for evenement in evenements:
+        if evenement.get("event") == "user":
+            return ((evenement.get("parse_data") or {}).get("intent") or {}).get("name")
+    return None
+
+
+def _rejouer(evenements, message):
+    """Le tour mis en cache, avec le texte tapé cette fois-ci."""
+    return [{**e, "text": message, "parse_data": {**e.get("parse_data", {}), "text": message}}
+            if e.get("event") == "user" else e
+            for e in evenements]
+
+
+_cache = None
+_cache_lock = RLock()
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                conf = config()
+                _cache = ResponseCache(conf["MAX_ENTRIES"], conf["TIMEOUT"])
+    return _cache
+
+
+def loaded_cache():
+    return _cache
+
+
+def stats():
+    return None if _cache is None else _cache.stats()
+
+
+async def version_donnees():
+    """Version des données, relue en base au plus toutes les VERSION_TTL secondes."""
+    global _version
+    valeur, lue = _version
+    if valeur is None or time.monotonic() - lue > config()["VERSION_TTL"]:
+        valeur = await versions.alire()
+        _version = (valeur, time.monotonic())
+    return valeur
+
+
+def verrou(sender):
+    """Verrou des tours de la conversation `sender` dans la boucle courante."""
+    verrous = _verrous.get(asyncio.get_running_loop())
+    if verrous is None:
+        verrous = _verrous[asyncio.get_running_loop()] = weakref.WeakValueDictionary()
+    v = verrous.get(sender)
+    if v is None:
+        v = verrous[sender] = asyncio.Lock()
+    return v
+
+
+async def _envoyes(sender, message):
+    for msg in await rasa_client.envoyer(sender, message):
+        yield msg
+
+
+async def _noter_slots(session, slots, sauver):
+    await session.aset(SESSION_SLOTS, slots)
+    if sauver:
+        await session.asave()
+
+
+async def repondre(request, sender, message):
+    """Réponses de Rasa au message, depuis le cache quand la conversation est dans un état déjà vu."""
+    return [msg async for msg in flux(request.session, sender, message, source=_envoyes)]
+
+
+async def flux(session, sender, message, source=None, sauver=False):
+    """Messages de Rasa un par un, comme rasa_client.flux, depuis le cache quand c'est possible.
+
+    sauver : enregistrer la session quand les slots changent (réponse déjà
+    partie en flux, ou session sans middleware comme sur la WebSocket).
+    """
+    conf = config()
+    source = source or rasa_client.flux
+    if not conf["ENABLED"]:
+        async for msg in source(sender, message):
+            yield msg
+        return
+
+    async with verrou(sender):
+        # Conversation neuve : tous les slots vides ; None : état inconnu, pas de cache
+        slots = await session.aget(SESSION_SLOTS, dict.fromkeys(conf["SLOTS"]))
+        cache = get_cache()
+        cle_message = None
+        if slots is None:
+            chat_log.noter(cache="contourne")
+        else:
+            cle_message = cle(message, slots, await version_donnees())
+            entree = cache.obtenir(cle_message)
+            if entree is not None:
+                try:
+                    with chat_log.chrono("tracker"):
+                        await rasa_client.ajouter_evenements(sender, _rejouer(entree["evenements"], message))
+                except (rasa_client.BackendIndisponible, aiohttp.ClientError, asyncio.TimeoutError):
+                    pass
+                else:
+                    chat_log.noter(cache="hit", intention=_intention(entree["evenements"]))
+                    if entree["slots"] != slots:
+                        await _noter_slots(session, entree["slots"], sauver)
+                    for msg in entree["reponses"]:
+                        yield msg
+                    return
+            chat_log.noter(cache="miss")
+
+        reponses = []
+        async for msg in source(sender, message):
+            reponses.append(msg)
+            yield msg
+        try:
+            with chat_log.chrono("tracker"):
+                etat = await rasa_client.tracker(sender)
+        except (rasa_client.BackendIndisponible, aiohttp.ClientError, asyncio.TimeoutError):
+            if slots is not None:
+                await _noter_slots(session, None, sauver)
+            return
+        # Relu avec succès : l'état est de nouveau connu, même après un échec précédent
+        slots_apres = {nom: etat.get("slots", {}).get(nom) for nom in conf["SLOTS"]}
+        evenements = _dernier_tour(etat.get("events") or [], message)
+        chat_log.noter(intention=_intention(evenements))
+        if cle_message is not None and evenements:
+            cache.enregistrer(cle_message, {"reponses": reponses, "evenements": evenements, "slots": slots_apres})
+        if slots_apres != slots:
+            await _noter_slots(session, slots_apres, sauver)
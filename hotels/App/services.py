@@ -0,0 +1,104 @@
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count, Exists, F, FloatField, OuterRef, Sum
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from . import availability_cache
+from .models import Chambre, DailyOccupancy, Hotel, HotelTypeChambre, Occupation
+
+# Les arrivées et les départs se font à 14h (voir fixtures/main.py)
+HEURE_ARRIVEE = time(14, 0)
+
+
+def fenetre_sejour(jour, nb_jours):
+    """(date_a, date_d) d'un séjour de nb_jours nuits à partir du jour donné."""
+    date_a = timezone.make_aware(datetime.combine(jour, HEURE_ARRIVEE))
+    return date_a, date_a + timedelta(days=nb_jours)
+
+
+def chambres_libres_par_hotel(ville, date_a, date_d):
+    """Nombre de chambres libres par (hôtel, type de chambre) d'une ville pour un séjour.
+
+    Une seule requête agrégée : les chambres sont filtrées par anti-jointure
+    (NOT EXISTS) sur les occupations qui chevauchent [date_a, date_d).
+    Version sans cache de disponibilites_ville, qui sert de référence aux
+    benchmarks.
+    """
+    occupee = Occupation.objects.filter(num_ch=OuterRef("pk"), date_a__lt=date_d, date_d__gt=date_a)
+    return list(
+        Chambre.objects
+        .filter(num_ho__ville_ho__iexact=ville)
+        .filter(~Exists(occupee))
+        .values("num_ho", "num_ho__nom_ho", "num_ho__nb_etoiles_ho",
+                "num_ty", "num_ty__nom_ty", "num_ty__prix_ty")
+        .annotate(nb_libres=Count("pk"))
+        .order_by("num_ho", "num_ty")
+    )
+
+
+def disponibilites_ville(ville, jour, nb_jours):
+    """Même résultat que chambres_libres_par_hotel, servi par le cache de disponibilités.
+
+    La liste des (hôtel, type) de la ville est lue dans le résumé
+    HotelTypeChambre ; les semaines absentes du cache sont chargées pour
+    toute la ville en un seul lot (deux requêtes), quel que soit le nombre
+    d'hôtels.
+    """
+    cache = availability_cache.get_cache()
+    resume = list(HotelTypeChambre.objects
+                  .filter(num_ho__ville_ho__iexact=ville)
+                  .values_list("num_ho", "num_ho__nom_ho", "num_ho__nb_etoiles_ho",
+                               "num_ty", "num_ty__nom_ty", "prix_ty")
+                  .order_by("num_ho", "num_ty"))
+    if not resume:
+        return []
+    demande = availability_cache.nuits(jour, nb_jours)
+    masques = cache.lot([(ligne[0], ligne[3]) + semaine for ligne in resume for semaine in demande],
+                        lambda manquantes: availability_cache.charger_ville(ville, manquantes))
+    resultats = []
+    for hotel_id, nom_ho, nb_etoiles, type_id, nom_ty, prix_ty in resume:
+        nb_libres = len(availability_cache.libres(
+            [(masques[(hotel_id, type_id) + semaine], masque) for semaine, masque in demande.items()]))
+        if nb_libres:
+            resultats.append({
+                "num_ho": hotel_id, "num_ho__nom_ho": nom_ho, "num_ho__nb_etoiles_ho": nb_etoiles,
+                "num_ty": type_id, "num_ty__nom_ty": nom_ty, "num_ty__prix_ty": prix_ty,
+                "nb_libres": nb_libres,
+            })
+    return resultats
+
+
+def annoter_prix_moyen(hotels):
+    """Ajoute prix_moyen (prix moyen par chambre) calculé sur le résumé HotelTypeChambre."""
+    return hotels.annotate(
+        prix_moyen=Cast(Sum(F("hoteltypechambre__nb_chambres") * F("hoteltypechambre__prix_ty")), FloatField())
+        / Sum("hoteltypechambre__nb_chambres"),
+    )
+
+
+def hotels_proposant(nom_type, ville=None):
+    """Hôtels ayant au moins une chambre du type donné (ex : « Suite »), éventuellement dans une ville."""
+    resume = HotelTypeChambre.objects.filter(num_ty__nom_ty__iexact=nom_type)
+    if ville:
+        resume = resume.filter(num_ho__ville_ho__iexact=ville)
+    return Hotel.objects.filter(num_ho__in=resume.values("num_ho"))
+
+
+def series_occupation(debut, fin, hotel_id=None):
+    """{hotel: {"chambres": total, "jours": [(jour, occupées), ...]}} entre debut et fin inclus."""
+    lignes = DailyOccupancy.objects.filter(jour__gte=debut, jour__lte=fin)
+    capacites = HotelTypeChambre.objects.all()
+    if hotel_id is not None:
+        lignes = lignes.filter(num_ho_id=hotel_id)
+        capacites = capacites.filter(num_ho_id=hotel_id)
+    series = {
+        hotel: {"chambres": total, "jours": []}
+        for hotel, total in capacites.values("num_ho").annotate(total=Sum("nb_chambres")).values_list("num_ho", "total")
+    }
+    points = (lignes.values("num_ho", "jour").annotate(occupees=Sum("nb_occupees"))
+              .order_by("num_ho", "jour").values_list("num_ho", "jour", "occupees"))
+    for hotel, jour, occupees in points:
+        if occupees:
+            series.setdefault(hotel, {"chambres": 0, "jours": []})["jours"].append((jour, occupees))
+    return series
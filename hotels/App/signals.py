@@ -0,0 +1,141 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import availability, availability_cache, bitmap, daily_occupancy
+from .models import Chambre, Occupation
+
+
+# --- Valeurs avant modification ---
+# Une occupation ou une chambre modifiée doit d'abord être retirée des
+# structures en mémoire avec ses anciennes valeurs.
+
+@receiver(pre_save, sender=Occupation)
+def memoriser_occupation(sender, instance, raw=False, **kwargs):
+    instance._avant = None
+    if not raw and instance.pk is not None:
+        instance._avant = (sender.objects.filter(pk=instance.pk)
+                           .values_list("num_ho_id", "num_ch_id", "date_a", "date_d").first())
+
+
+@receiver(pre_save, sender=Chambre)
+def memoriser_chambre(sender, instance, raw=False, **kwargs):
+    instance._avant = None
+    if not raw and instance.pk is not None:
+        instance._avant = (sender.objects.filter(pk=instance.pk)
+                           .values_list("num_ho_id", "num_ty_id").first())
+
+
+# --- Index de disponibilité et matrices d'occupation ---
+# Les mises à jour sont appliquées après le commit pour ne pas garder
+# en mémoire une occupation dont la transaction a été annulée.
+
+@receiver(post_save, sender=Occupation)
+def occupation_enregistree(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    pk, hotel_id, chambre_id = instance.pk, instance.num_ho_id, instance.num_ch_id
+    date_a, date_d = instance.date_a, instance.date_d
+    avant = getattr(instance, "_avant", None)
+
+    def maj():
+        index = availability.loaded_index()
+        if index is not None:
+            index.add(pk, chambre_id, date_a, date_d)
+        store = bitmap.loaded_store()
+        if store is not None:
+            if avant is not None:
+                store.liberer(*avant)
+            store.occuper(hotel_id, chambre_id, date_a, date_d)
+        cache = availability_cache.loaded_cache()
+        if cache is not None:
+            if avant is not None:
+                cache.invalider_occupation(*avant[1:])
+            cache.invalider_occupation(chambre_id, date_a, date_d)
+
+    transaction.on_commit(maj)
+
+
+@receiver(post_delete, sender=Occupation)
+def occupation_supprimee(sender, instance, **kwargs):
+    pk, hotel_id, chambre_id = instance.pk, instance.num_ho_id, instance.num_ch_id
+    date_a, date_d = instance.date_a, instance.date_d
+
+    def maj():
+        index = availability.loaded_index()
+        if index is not None:
+            index.discard(pk)
+        store = bitmap.loaded_store()
+        if store is not None:
+            store.liberer(hotel_id, chambre_id, date_a, date_d)
+        cache = availability_cache.loaded_cache()
+        if cache is not None:
+            cache.invalider_occupation(chambre_id, date_a, date_d)
+
+    transaction.on_commit(maj)
+
+
+@receiver(post_save, sender=Chambre)
+@receiver(post_delete, sender=Chambre)
+def chambre_modifiee(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    chambre_id = instance.pk
+    types = {(instance.num_ho_id, instance.num_ty_id)}
+    avant = getattr(instance, "_avant", None)
+    if avant is not None:
+        types.add(avant)
+
+    def maj():
+        store = bitmap.loaded_store()
+        if store is not None:
+            for hotel_id, _ in types:
+                store.invalider(hotel_id)
+        cache = availability_cache.loaded_cache()
+        if cache is not None:
+            cache.oublier_chambre(chambre_id)
+            for hotel_id, type_id in types:
+                cache.invalider_type(hotel_id, type_id)
+
+    transaction.on_commit(maj)
+
+
+# --- Agrégat DailyOccupancy ---
+# Mis à jour dans la transaction de l'écriture : il est annulé avec elle.
+
+def _type_chambre(chambre_id):
+    return Chambre.objects.filter(pk=chambre_id).values_list("num_ty_id", flat=True).first()
+
+
+@receiver(post_save, sender=Occupation)
+def occupation_agregat(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    nouvelle = (instance.num_ho_id, instance.num_ch_id, instance.date_a, instance.date_d)
+    avant = getattr(instance, "_avant", None)
+    if avant == nouvelle:
+        return
+    if avant is not None:
+        hotel_id, chambre_id, date_a, date_d = avant
+        daily_occupancy.appliquer(hotel_id, _type_chambre(chambre_id), date_a, date_d, -1)
+    hotel_id, chambre_id, date_a, date_d = nouvelle
+    daily_occupancy.appliquer(hotel_id, _type_chambre(chambre_id), date_a, date_d, 1)
+
+
+@receiver(post_delete, sender=Occupation)
+def occupation_agregat_suppression(sender, instance, **kwargs):
+    type_id = _type_chambre(instance.num_ch_id)
+    if type_id is not None:
+        daily_occupancy.appliquer(instance.num_ho_id, type_id, instance.date_a, instance.date_d, -1)
+
+
+@receiver(post_save, sender=Chambre)
+def chambre_agregat(sender, instance, raw=False, **kwargs):
+    avant = getattr(instance, "_avant", None)
+    if raw or avant is None or avant[1] == instance.num_ty_id:
+        return
+    # Changement de type : les occupations de la chambre passent sur le nouveau type
+    occupations = Occupation.objects.filter(num_ch=instance).values_list("num_ho_id", "date_a", "date_d")
+    for hotel_id, date_a, date_d in occupations:
+        daily_occupancy.appliquer(hotel_id, avant[1], date_a, date_d, -1)
+        daily_occupancy.appliquer(hotel_id, instance.num_ty_id, date_a, date_d, 1)
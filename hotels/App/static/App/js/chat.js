@@ -0,0 +1,215 @@
+const chatBox = document.getElementById('chat-box');
+const input = document.getElementById('message-input');
+const currentTimeElement = document.getElementById('current-time');
+
+// Afficher l'heure actuelle
+function updateTime() {
+    const now = new Date();
+    currentTimeElement.textContent = now.toLocaleTimeString('fr-FR', {
+        hour: '2-digit',
+        minute: '2-digit'
+    });
+}
+updateTime();
+setInterval(updateTime, 60000);
+
+function addMessage(text, sender = 'bot') {
+    const messageDiv = document.createElement('div');
+    messageDiv.className = `message ${sender}-msg`;
+
+    const now = new Date();
+    const timeString = now.toLocaleTimeString('fr-FR', {
+        hour: '2-digit',
+        minute: '2-digit'
+    });
+
+    messageDiv.innerHTML = `
+        ${text}
+        <div class="message-time">${timeString}</div>
+    `;
+
+    chatBox.appendChild(messageDiv);
+    chatBox.scrollTop = chatBox.scrollHeight;
+}
+
+function showTypingIndicator() {
+    const typingDiv = document.createElement('div');
+    typingDiv.className = 'typing-indicator message';
+    typingDiv.id = 'typing-indicator';
+    typingDiv.innerHTML = `
+        Assistant tape...
+        <div class="typing-dots">
+            <span></span>
+            <span></span>
+            <span></span>
+        </div>
+    `;
+    chatBox.appendChild(typingDiv);
+    chatBox.scrollTop = chatBox.scrollHeight;
+}
+
+function hideTypingIndicator() {
+    const typingIndicator = document.getElementById('typing-indicator');
+    if (typingIndicator) {
+        typingIndicator.remove();
+    }
+}
+
+async function sendMessage() {
+    const message = input.value.trim();
+    if (!message) return;
+
+    // Ajouter le message de l'utilisateur
+    addMessage(message, 'user');
+    input.value = '';
+    input.focus();
+
+    // Afficher l'indicateur de frappe
+    showTypingIndicator();
+
+    // Connexion persistante si elle est ouverte, sinon requête HTTP en flux
+    if (socket && socket.readyState === WebSocket.OPEN) {
+        messagesSocket = 0;
+        enAttente = true;
+        socket.send(JSON.stringify({ conversation: CONVERSATION, message: message }));
+        return;
+    }
+
+    try {
+        const formData = new URLSearchParams();
+        formData.append('message', message);
+
+        // Réponse en flux (server-sent events) : chaque message du bot
+        // est affiché dès que Rasa l'émet
+        const response = await fetch('/chat/stream/', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/x-www-form-urlencoded'
+            },
+            body: formData
+        });
+
+        if (!response.ok || !response.body) {
+            const data = await response.json();
+            hideTypingIndicator();
+            addMessage(`❌ ${data.error || "Erreur du serveur"}`, 'bot');
+            return;
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let tampon = '';
+        let nbMessages = 0;
+        let termine = false;
+
+        while (!termine) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            tampon += decoder.decode(value, { stream: true });
+
+            // Les événements sont séparés par une ligne vide
+            let fin;
+            while ((fin = tampon.indexOf('\n\n')) !== -1) {
+                const evenement = lireEvenement(tampon.slice(0, fin));
+                tampon = tampon.slice(fin + 2);
+
+                if (evenement.type === 'fin') {
+                    termine = true;
+                    break;
+                }
+                hideTypingIndicator();
+                if (evenement.type === 'erreur') {
+                    addMessage(`❌ ${evenement.data.error}`, 'bot');
+                    nbMessages++;
+                } else if (evenement.data.text && evenement.data.text.trim() !== '') {
+                    addMessage(evenement.data.text, 'bot');
+                    nbMessages++;
+                }
+                showTypingIndicator();
+            }
+        }
+
+        hideTypingIndicator();
+        if (nbMessages === 0) {
+            addMessage("Désolé, je n'ai pas pu traiter votre demande.", 'bot');
+        }
+    } catch (error) {
+        hideTypingIndicator();
+        addMessage("❌ Erreur de connexion. Vérifiez que le serveur est démarré.", 'bot');
+        console.error('Error:', error);
+    }
+}
+
+// --- WebSocket : une seule connexion pour toute la conversation ---
+const CONVERSATION = 'chat';
+let socket = null;
+let messagesSocket = 0;
+let enAttente = false;
+
+function ouvrirSocket() {
+    const protocole = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
+    socket = new WebSocket(`${protocole}//${window.location.host}/ws/chat/`);
+
+    socket.onmessage = function(event) {
+        const data = JSON.parse(event.data);
+        if (data.conversation !== CONVERSATION) return;
+
+        hideTypingIndicator();
+        if (data.fin) {
+            enAttente = false;
+            if (messagesSocket === 0) {
+                addMessage("Désolé, je n'ai pas pu traiter votre demande.", 'bot');
+            }
+            return;
+        }
+        if (data.error) {
+            addMessage(`❌ ${data.error}`, 'bot');
+        } else if (data.text && data.text.trim() !== '') {
+            addMessage(data.text, 'bot');
+        }
+        messagesSocket++;
+        showTypingIndicator();
+    };
+
+    // Serveur sans WebSocket (runserver WSGI) ou connexion perdue :
+    // les messages repassent par /chat/stream/ et on retente plus tard
+    socket.onclose = function() {
+        socket = null;
+        if (enAttente) {
+            enAttente = false;
+            hideTypingIndicator();
+            addMessage("❌ Connexion perdue. Renvoyez votre message.", 'bot');
+        }
+        setTimeout(ouvrirSocket, 5000);
+    };
+}
+ouvrirSocket();
+
+function lireEvenement(bloc) {
+    let type = 'message';
+    let data = '';
+    bloc.split('\n').forEach(ligne => {
+        if (ligne.startsWith('event:')) {
+            type = ligne.slice(6).trim();
+        } else if (ligne.startsWith('data:')) {
+            data += ligne.slice(5).trim();
+        }
+    });
+    return { type, data: data ? JSON.parse(data) : {} };
+}
+
+// Permettre l'envoi avec la touche Entrée
+input.addEventListener('keypress', function(e) {
+    if (e.key === 'Enter') {
+        sendMessage();
+    }
+});
+
+// Focus automatique sur l'input
+input.focus();
+
+// Animation d'apparition du chat
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelector('.chat-container').style.animation =
+        'messageSlide 0.5s ease-out';
+});
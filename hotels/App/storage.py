@@ -0,0 +1,136 @@
+"""
+Fichiers statiques : noms hachés et variantes précompressées.
+
+`manage.py collectstatic` copie les fichiers dans STATIC_ROOT sous un nom
+qui contient l'empreinte de leur contenu (chat.3f9a1c2b7d4e.css) ; le tag
+{% static %} renvoie ce nom. Un fichier modifié change donc d'URL et le
+navigateur peut garder l'ancien un an sans jamais le revalider. À côté de
+chaque fichier texte, collectstatic écrit aussi chat.3f9a1c2b7d4e.css.gz
+(et .br si le paquet brotli est installé), une fois pour toutes au lieu
+d'une compression par requête.
+
+Derrière nginx, ce sont ces fichiers qu'il sert directement :
+
+    location /static/ {
+        alias /chemin/vers/hotels/staticfiles/;
+        gzip_static on;
+        brotli_static on;   # module ngx_brotli
+        location ~ "\\.[0-9a-f]{12}\\.\\w+$" {
+            add_header Cache-Control "public, max-age=31536000, immutable";
+        }
+    }
+
+Sans serveur web devant Django (uvicorn seul), la vue statique les sert
+avec servir(), qui choisit la variante d'après Accept-Encoding.
+
+Réglage dans settings_prod.py (seulement là : le manifeste n'existe
+qu'après collectstatic, et sans lui {% static %} échoue) :
+
+    STATIC_ROOT = BASE_DIR / 'staticfiles'
+    STORAGES = {
+        ...,
+        'staticfiles': {'BACKEND': 'App.storage.CompressedManifestStorage'},
+    }
+"""
+import gzip
+import posixpath
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.http import Http404
+from django.views.static import serve
+
+try:
+    import brotli
+except ImportError:  # variantes .br facultatives
+    brotli = None
+
+EXTENSIONS = {".css", ".js", ".map", ".svg", ".html", ".json", ".txt", ".xml"}
+TAILLE_MIN = 256        # en dessous, l'en-tête Content-Encoding coûte plus qu'il ne rapporte
+CACHE_IMMUABLE = "public, max-age=31536000, immutable"
+CACHE_COURT = "public, max-age=3600"
+
+# (manifeste, ensemble de ses noms hachés) : recalculé seulement si le manifeste est rechargé
+_haches = (None, frozenset())
+
+
+def _gzip(donnees):
+    # mtime=0 : même contenu, même fichier d'un déploiement à l'autre
+    return gzip.compress(donnees, compresslevel=9, mtime=0)
+
+
+def _brotli(donnees):
+    return brotli.compress(donnees, quality=11)
+
+
+def compresseurs():
+    """(suffixe, fonction) des variantes produites, de la préférée à la moins bonne."""
+    return ([(".br", _brotli)] if brotli is not None else []) + [(".gz", _gzip)]
+
+
+class CompressedManifestStorage(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage qui écrit en plus les variantes .br et .gz des fichiers hachés."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for nom in sorted(set(self.hashed_files.values())):
+            if posixpath.splitext(nom)[1] in EXTENSIONS:
+                self.compresser(nom)
+
+    def compresser(self, nom):
+        with self.open(nom) as fichier:
+            donnees = fichier.read()
+        if len(donnees) < TAILLE_MIN:
+            return
+        for suffixe, compresser in compresseurs():
+            compresse = compresser(donnees)
+            if len(compresse) < len(donnees):
+                with open(self.path(nom + suffixe), "wb") as sortie:
+                    sortie.write(compresse)
+
+
+# --- Service sans serveur web ---
+
+def encodages_acceptes(request):
+    acceptes = set()
+    for morceau in request.headers.get("Accept-Encoding", "").split(","):
+        nom, _, parametres = morceau.strip().partition(";")
+        if parametres.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            acceptes.add(nom.strip().lower())
+    return acceptes
+
+
+def noms_haches():
+    """Noms hachés du manifeste de staticfiles_storage (vide sans stockage à manifeste)."""
+    global _haches
+    manifeste = getattr(staticfiles_storage, "hashed_files", None)
+    if manifeste is None:
+        return frozenset()
+    if _haches[0] is not manifeste:
+        _haches = (manifeste, frozenset(manifeste.values()))
+    return _haches[1]
+
+
+def immuable(nom):
+    """Le nom est-il un nom haché du manifeste (donc jamais réécrit avec un autre contenu) ?"""
+    return nom in noms_haches()
+
+
+def servir(request, chemin, racine):
+    """Fichier `chemin` de `racine`, en variante .br ou .gz quand le client l'accepte."""
+    chemin = posixpath.normpath(chemin).lstrip("/")
+    acceptes = encodages_acceptes(request)
+    response = None
+    for suffixe, encodage in ((".br", "br"), (".gz", "gzip")):
+        if encodage in acceptes:
+            try:
+                response = serve(request, chemin + suffixe, document_root=racine)
+                break
+            except Http404:
+                continue
+    if response is None:
+        response = serve(request, chemin, document_root=racine)
+    response.headers["Vary"] = "Accept-Encoding"
+    response.headers["Cache-Control"] = CACHE_IMMUABLE if immuable(chemin) else CACHE_COURT
+    return response
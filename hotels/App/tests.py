@@ -1,3 +1,978 @@
-from django.test import TestCase
+import asyncio
+import sys
+from collections import Counter, namedtuple
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import aiohttp
+from django.db import IntegrityError, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from actions import mots_cles
+from actions.catalogue import Catalogue, FicheHotel, IndexPrix, TypeOffert
+
+from . import availability_cache, rasa_client, response_cache
+from .allocation import BEST_FIT, FIRST_FIT, RoomAllocator
+from .availability import AvailabilityIndex, RoomIntervals
+from .availability_cache import AvailabilityCache
+from .bitmap import HotelBitmap
+from .daily_occupancy import compter, nuits
+from .gazetteer import Gazetteer, distance
+from .hash_ring import HashRing
+from .keyword_matcher import KeywordMatcher
+from .models import Chambre, Client, DailyOccupancy, Hotel, HotelTypeChambre, Occupation, Reservation, TypeChambre
+from .nlu_gateway import MicroBatcher
+from .rasa_backend import Backend, CircuitBreaker, CircuitOuvert
+
+
+def jour(n, heure=12):
+    """Instant du n-ième jour après le 1er juin 2026."""
+    return timezone.make_aware(datetime(2026, 6, 1, heure) + timedelta(days=n))
+
+
+class CatalogueMixin:
+    @classmethod
+    def setUpTestData(cls):
+        cls.hotel = Hotel.objects.create(nom_ho="Hôtel du Port", rue_adr_ho="1 quai", ville_ho="Nice", nb_etoiles_ho=3)
+        cls.autre_hotel = Hotel.objects.create(nom_ho="Hôtel Bellecour", rue_adr_ho="2 place", ville_ho="Lyon",
+                                               nb_etoiles_ho=4)
+        cls.simple = TypeChambre.objects.create(nom_ty="Simple", prix_ty=Decimal("60.00"))
+        cls.double = TypeChambre.objects.create(nom_ty="Double", prix_ty=Decimal("90.00"))
+        cls.client_ = Client.objects.create(nom_cl="Martin", prenom_cl="Léa", rue_adr_cl="3 rue", ville_cl="Nice")
+
+    def resume(self):
+        """{(hôtel, type): (nb_chambres, prix)} lu dans HotelTypeChambre."""
+        return {(h, t): (nb, prix) for h, t, nb, prix in
+                HotelTypeChambre.objects.values_list("num_ho_id", "num_ty_id", "nb_chambres", "prix_ty")}
+
+
+class HotelTypeChambreTriggerTests(CatalogueMixin, TestCase):
+    """Triggers de la migration 0005 sur Chambre et TypeChambre."""
+
+    def test_insertion(self):
+        Chambre.objects.create(num_ch=1, num_ho=self.hotel, num_ty=self.simple)
+        Chambre.objects.create(num_ch=2, num_ho=self.hotel, num_ty=self.simple)
+        Chambre.objects.create(num_ch=3, num_ho=self.hotel, num_ty=self.double)
+        self.assertEqual(self.resume(), {
+            (self.hotel.pk, self.simple.pk): (2, Decimal("60.00")),
+            (self.hotel.pk, self.double.pk): (1, Decimal("90.00")),
+        })
+
+    def test_bulk_create(self):
+        Chambre.objects.bulk_create([Chambre(num_ch=i, num_ho=self.hotel, num_ty=self.double) for i in range(1, 6)])
+        self.assertEqual(self.resume(), {(self.hotel.pk, self.double.pk): (5, Decimal("90.00"))})
+
+    def test_suppression(self):
+        chambre = Chambre.objects.create(num_ch=1, num_ho=self.hotel, num_ty=self.simple)
+        Chambre.objects.create(num_ch=2, num_ho=self.hotel, num_ty=self.simple)
+        chambre.delete()
+        self.assertEqual(self.resume(), {(self.hotel.pk, self.simple.pk): (1, Decimal("60.00"))})
+        Chambre.objects.filter(num_ho=self.hotel).delete()
+        self.assertEqual(self.resume(), {})
+
+    def test_changement_de_type(self):
+        chambre = Chambre.objects.create(num_ch=1, num_ho=self.hotel, num_ty=self.simple)
+        Chambre.objects.create(num_ch=2, num_ho=self.hotel, num_ty=self.simple)
+        chambre.num_ty = self.double
+        chambre.save()
+        self.assertEqual(self.resume(), {
+            (self.hotel.pk, self.simple.pk): (1, Decimal("60.00")),
+            (self.hotel.pk, self.double.pk): (1, Decimal("90.00")),
+        })
+
+    def test_changement_d_hotel(self):
+        chambre = Chambre.objects.create(num_ch=1, num_ho=self.hotel, num_ty=self.simple)
+        Chambre.objects.filter(pk=chambre.pk).update(num_ho=self.autre_hotel)
+        self.assertEqual(self.resume(), {(self.autre_hotel.pk, self.simple.pk): (1, Decimal("60.00"))})
+
+    def test_mise_a_jour_sans_changement(self):
+        chambre = Chambre.objects.create(num_ch=1, num_ho=self.hotel, num_ty=self.simple)
+        chambre.num_ch = 101
+        chambre.save()
+        self.assertEqual(self.resume(), {(self.hotel.pk, self.simple.pk): (1, Decimal("60.00"))})
+
+    def test_changement_de_prix(self):
+        Chambre.objects.create(num_ch=1, num_ho=self.hotel, num_ty=self.simple)
+        Chambre.objects.create(num_ch=1, num_ho=self.autre_hotel, num_ty=self.simple)
+        Chambre.objects.create(num_ch=2, num_ho=self.hotel, num_ty=self.double)
+        TypeChambre.objects.filter(pk=self.simple.pk).update(prix_ty=Decimal("65.50"))
+        self.assertEqual(self.resume(), {
+            (self.hotel.pk, self.simple.pk): (1, Decimal("65.50")),
+            (self.autre_hotel.pk, self.simple.pk): (1, Decimal("65.50")),
+            (self.hotel.pk, self.double.pk): (1, Decimal("90.00")),
+        })
+
+    def test_type_absent_a_l_insertion(self):
+        # Les clés étrangères SQLite ne sont vérifiées qu'au commit : une chambre peut être
+        # insérée avant son TypeChambre (import dans le désordre). Le trigger d'insertion ne
+        # trouve alors pas de prix et n'écrit rien, et le résumé reste sans cette ligne
+        num_ty = TypeChambre.objects.order_by("-pk").values_list("pk", flat=True)[0] + 1
+        Chambre.objects.create(num_ch=1, num_ho=self.hotel, num_ty_id=num_ty)
+        TypeChambre.objects.create(num_ty=num_ty, nom_ty="Suite", prix_ty=Decimal("200.00"))
+        self.assertEqual(self.resume(), {})
+        # La chambre suivante du même type crée la ligne, sans compter la première
+        Chambre.objects.create(num_ch=2, num_ho=self.hotel, num_ty_id=num_ty)
+        self.assertEqual(self.resume(), {(self.hotel.pk, num_ty): (1, Decimal("200.00"))})
+
+
+class ReservationTriggerTests(CatalogueMixin, TestCase):
+    """Trigger C1 (migration 0005) : l'hôtel doit avoir une chambre du type réservé."""
+
+    def reserver(self, type_chambre):
+        return Reservation.objects.create(num_cl=self.client_, num_ho=self.hotel, num_ty=type_chambre,
+                                          date_a=jour(0), nb_jours=2, nb_chambres=1)
+
+    def test_type_present(self):
+        Chambre.objects.create(num_ch=1, num_ho=self.hotel, num_ty=self.simple)
+        self.reserver(self.simple)
+        self.assertEqual(Reservation.objects.count(), 1)
+
+    def test_type_absent(self):
+        Chambre.objects.create(num_ch=1, num_ho=self.hotel, num_ty=self.simple)
+        with self.assertRaisesMessage(IntegrityError, "C1"), transaction.atomic():
+            self.reserver(self.double)
+
+    def test_type_retire(self):
+        chambre = Chambre.objects.create(num_ch=1, num_ho=self.hotel, num_ty=self.simple)
+        chambre.delete()
+        with self.assertRaisesMessage(IntegrityError, "C1"), transaction.atomic():
+            self.reserver(self.simple)
+
+
+class AvailabilityIndexTests(SimpleTestCase):
+
+    def test_intervalles_semi_ouverts(self):
+        room = RoomIntervals()
+        room.add(1, 10, 15)
+        room.add(2, 20, 25)
+        self.assertTrue(room.is_free(15, 20))
+        self.assertTrue(room.is_free(0, 10))
+        self.assertTrue(room.is_free(25, 30))
+        self.assertFalse(room.is_free(14, 16))
+        self.assertFalse(room.is_free(0, 30))
+        self.assertFalse(room.is_free(21, 22))
+
+    def test_trou_et_prochaine_date_libre(self):
+        room = RoomIntervals()
+        room.add(1, 10, 15)
+        room.add(2, 20, 25)
+        self.assertEqual(room.gap(16, 18), (15, 20))
+        self.assertEqual(room.gap(0, 5), (None, 10))
+        self.assertEqual(room.gap(30, 31), (25, None))
+        self.assertIsNone(room.gap(12, 13))
+        self.assertEqual(room.next_free(11, 3), 15)
+        self.assertEqual(room.next_free(11, 6), 25)
+        self.assertEqual(room.next_free(0, 10), 0)
+
+    def test_ajout_remplacement_et_retrait(self):
+        index = AvailabilityIndex()
+        index.add(1, 7, 10, 15)
+        self.assertFalse(index.is_free(7, 12, 13))
+        # Même pk : l'occupation modifiée remplace l'ancienne
+        index.add(1, 7, 30, 35)
+        self.assertTrue(index.is_free(7, 12, 13))
+        self.assertFalse(index.is_free(7, 31, 32))
+        self.assertEqual(len(index), 1)
+        self.assertTrue(index.discard(1))
+        self.assertFalse(index.discard(1))
+        self.assertTrue(index.is_free(7, 31, 32))
+        self.assertEqual(len(index), 0)
+
+    def test_chambre_inconnue(self):
+        index = AvailabilityIndex()
+        self.assertTrue(index.is_free(42, 0, 100))
+        self.assertEqual(index.next_free(42, 5, 3), 5)
+
+
+class HotelBitmapTests(SimpleTestCase):
+
+    def setUp(self):
+        # Neuf chambres du type 10 (sur deux octets) et une du type 20
+        self.bitmap = HotelBitmap(1, [(pk, 10) for pk in range(1, 10)] + [(50, 20)], date(2026, 6, 1), nb_jours=30)
+
+    def libres(self, type_id, date_a, nb_jours):
+        return sorted(self.bitmap.chambres_libres(type_id, date_a, nb_jours).tolist())
+
+    def test_occuper_et_liberer(self):
+        self.bitmap.occuper(9, jour(2), jour(4))
+        self.assertEqual(self.libres(10, date(2026, 6, 3), 1), list(range(1, 9)))
+        # Départ le matin du 5 juin : la chambre est libre cette nuit-là
+        self.assertEqual(self.libres(10, date(2026, 6, 5), 1), list(range(1, 10)))
+        self.bitmap.liberer(9, jour(2), jour(4))
+        self.assertEqual(self.libres(10, date(2026, 6, 3), 1), list(range(1, 10)))
+
+    def test_types_separes(self):
+        self.bitmap.occuper(50, jour(0), jour(1))
+        self.assertEqual(self.libres(20, date(2026, 6, 1), 1), [])
+        self.assertEqual(self.libres(10, date(2026, 6, 1), 1), list(range(1, 10)))
+        self.assertEqual(self.libres(99, date(2026, 6, 1), 1), [])
+
+    def test_chambre_inconnue(self):
+        self.assertFalse(self.bitmap.occuper(77, jour(0), jour(1)))
+
+    def test_agrandissement(self):
+        self.bitmap.occuper(1, jour(40), jour(42))
+        self.assertGreaterEqual(self.bitmap.nb_jours, 42)
+        self.assertEqual(self.libres(10, date(2026, 7, 12), 1), list(range(2, 10)))
+        # Une occupation commencée avant l'origine décale la matrice, pas les nuits connues
+        self.bitmap.occuper(2, jour(-3), jour(1))
+        self.assertEqual(self.bitmap.origine, date(2026, 5, 29))
+        self.assertEqual(self.libres(10, date(2026, 6, 1), 1), [1] + list(range(3, 10)))
+        self.assertEqual(self.libres(10, date(2026, 7, 12), 1), list(range(2, 10)))
+
+    def test_nuits_passees_refusees(self):
+        with self.assertRaises(ValueError):
+            self.bitmap.chambres_libres(10, date(2026, 5, 31), 2)
+
+
+class OccupationTriggerTests(CatalogueMixin, TestCase):
+    """Trigger C2 (migration 0004) : intervalles semi-ouverts [date_a, date_d) par chambre."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.chambre = Chambre.objects.create(num_ch=1, num_ho=cls.hotel, num_ty=cls.simple)
+        cls.voisine = Chambre.objects.create(num_ch=2, num_ho=cls.hotel, num_ty=cls.simple)
+
+    def occuper(self, chambre, date_a, date_d):
+        return Occupation.objects.create(num_cl=self.client_, num_ho=self.hotel, num_ch=chambre,
+                                         date_a=date_a, date_d=date_d)
+
+    def test_chevauchements_refuses(self):
+        self.occuper(self.chambre, jour(5), jour(10))
+        for date_a, date_d in [(jour(4), jour(6)), (jour(9), jour(12)), (jour(6), jour(8)),
+                               (jour(3), jour(12)), (jour(5), jour(10))]:
+            with self.subTest(date_a=date_a, date_d=date_d):
+                with self.assertRaisesMessage(IntegrityError, "C2"), transaction.atomic():
+                    self.occuper(self.chambre, date_a, date_d)
+
+    def test_depart_et_arrivee_le_meme_jour(self):
+        self.occuper(self.chambre, jour(5), jour(10))
+        self.occuper(self.chambre, jour(10), jour(12))
+        self.occuper(self.chambre, jour(2), jour(5))
+        self.assertEqual(Occupation.objects.filter(num_ch=self.chambre).count(), 3)
+
+    def test_autre_chambre(self):
+        self.occuper(self.chambre, jour(5), jour(10))
+        self.occuper(self.voisine, jour(5), jour(10))
+        self.assertEqual(Occupation.objects.count(), 2)
+
+    def test_trou_entre_deux_occupations(self):
+        self.occuper(self.chambre, jour(1), jour(3))
+        self.occuper(self.chambre, jour(8), jour(9))
+        self.occuper(self.chambre, jour(3), jour(8))
+        with self.assertRaisesMessage(IntegrityError, "C2"), transaction.atomic():
+            self.occuper(self.chambre, jour(2), jour(4))
+
+
+Demande = namedtuple("Demande", "num_cl_id num_ho_id num_ty_id date_a nb_jours nb_chambres")
+
+
+class RoomAllocatorTests(SimpleTestCase):
+
+    def setUp(self):
+        # Hôtel 1 : chambres 1 à 3 du type 10, chambre 4 du type 20
+        self.chambres = [(1, 1, 10), (2, 1, 10), (3, 1, 10), (4, 1, 20)]
+        self.index = AvailabilityIndex()
+
+    def test_best_fit_prend_le_trou_le_plus_serre(self):
+        # Chambre 1 libre du jour 5 au jour 8, chambre 2 du jour 5 au jour 20, chambre 3 sans occupation
+        self.index.add(101, 1, jour(0), jour(5))
+        self.index.add(102, 1, jour(8), jour(10))
+        self.index.add(103, 2, jour(0), jour(5))
+        self.index.add(104, 2, jour(20), jour(22))
+        allocateur = RoomAllocator(self.chambres, index=self.index, strategie=BEST_FIT)
+        self.assertEqual(allocateur.choisir(1, 10, jour(5), jour(8)), [1])
+        self.assertEqual(allocateur.choisir(1, 10, jour(5), jour(9)), [2])
+        self.assertEqual(allocateur.choisir(1, 10, jour(5), jour(9), nb_chambres=2), [2, 3])
+
+    def test_pas_assez_de_chambres(self):
+        allocateur = RoomAllocator(self.chambres, index=self.index)
+        self.assertIsNone(allocateur.allouer(1, 20, jour(0), jour(2), nb_chambres=2))
+        self.assertIsNone(allocateur.allouer(2, 10, jour(0), jour(2)))
+        self.assertEqual(len(self.index), 0)
+
+    def test_allouer_occupe_les_chambres(self):
+        allocateur = RoomAllocator(self.chambres, index=self.index)
+        self.assertEqual(allocateur.allouer(1, 20, jour(0), jour(2)), [4])
+        self.assertIsNone(allocateur.allouer(1, 20, jour(1), jour(3)))
+        self.assertEqual(allocateur.allouer(1, 20, jour(2), jour(3)), [4])
+
+    def test_first_fit_reproductible(self):
+        premiers = RoomAllocator(self.chambres, strategie=FIRST_FIT, seed=3).choisir(1, 10, jour(0), jour(1), 2)
+        seconds = RoomAllocator(self.chambres, strategie=FIRST_FIT, seed=3).choisir(1, 10, jour(0), jour(1), 2)
+        self.assertEqual(premiers, seconds)
+        self.assertEqual(len(set(premiers)), 2)
+
+    def test_lot_plus_longs_dabord(self):
+        allocateur = RoomAllocator([(4, 1, 20)], index=self.index)
+        courte = Demande(1, 1, 20, jour(0), 1, 1)
+        longue = Demande(2, 1, 20, jour(0), 5, 1)
+        affectations, refusees = allocateur.allouer_lot([courte, longue])
+        self.assertEqual([a.reservation for a in affectations], [longue])
+        self.assertEqual(refusees, [courte])
+
+    def test_lot_dans_l_ordre(self):
+        allocateur = RoomAllocator([(4, 1, 20)], index=self.index)
+        courte = Demande(1, 1, 20, jour(0), 1, 1)
+        longue = Demande(2, 1, 20, jour(0), 5, 1)
+        affectations, refusees = allocateur.allouer_lot([courte, longue], plus_longs_dabord=False)
+        self.assertEqual([a.reservation for a in affectations], [courte])
+        self.assertEqual(refusees, [longue])
+
+
+class AvailabilityCacheTests(CatalogueMixin, TestCase):
+    """Cache par semaine ISO, invalidé par les signaux après le commit."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.chambre = Chambre.objects.create(num_ch=1, num_ho=cls.hotel, num_ty=cls.simple)
+        cls.voisine = Chambre.objects.create(num_ch=2, num_ho=cls.hotel, num_ty=cls.simple)
+
+    def setUp(self):
+        # Les signaux invalident le cache chargé du processus : celui du test le remplace
+        self.cache = AvailabilityCache()
+        patcher = mock.patch.object(availability_cache, "_cache", self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def libres(self, date_a, nb_jours):
+        return self.cache.chambres_libres(self.hotel.pk, self.simple.pk, date_a, nb_jours)
+
+    def occuper(self, chambre, date_a, date_d):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Occupation.objects.create(num_cl=self.client_, num_ho=self.hotel, num_ch=chambre,
+                                             date_a=date_a, date_d=date_d)
+
+    def test_hit_apres_miss(self):
+        self.assertEqual(self.libres(date(2026, 6, 2), 2), [self.chambre.pk, self.voisine.pk])
+        self.assertEqual((self.cache.misses, self.cache.hits), (1, 0))
+        self.assertEqual(self.libres(date(2026, 6, 3), 1), [self.chambre.pk, self.voisine.pk])
+        self.assertEqual((self.cache.misses, self.cache.hits), (1, 1))
+
+    def test_invalidation_apres_enregistrement_et_suppression(self):
+        self.libres(date(2026, 6, 2), 2)
+        occupation = self.occuper(self.chambre, jour(2), jour(4))
+        self.assertEqual(self.cache.invalidations, 1)
+        self.assertEqual(self.libres(date(2026, 6, 2), 2), [self.voisine.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            occupation.delete()
+        self.assertEqual(self.libres(date(2026, 6, 2), 2), [self.chambre.pk, self.voisine.pk])
+        self.assertEqual((self.cache.misses, self.cache.invalidations), (3, 2))
+
+    def test_chargement_concurrent_non_garde(self):
+        cle = (self.hotel.pk, self.simple.pk, 2026, 23)
+
+        def chargeur(cles):
+            # Lecture faite avant une écriture validée pendant le chargement
+            charges = {c: availability_cache.charger_semaine(*c) for c in cles}
+            self.occuper(self.chambre, jour(2), jour(4))
+            return charges
+
+        self.assertEqual(self.cache.lot([cle], chargeur)[cle], {self.chambre.pk: 0, self.voisine.pk: 0})
+        self.assertEqual(self.cache.stats()["entrees"], 0)
+        self.assertEqual(self.libres(date(2026, 6, 3), 1), [self.voisine.pk])
+
+    def test_sejour_sur_deux_semaines(self):
+        # Samedi 6 juin pour trois nuits : deux en semaine 23, une en semaine 24
+        self.assertEqual(availability_cache.nuits(date(2026, 6, 6), 3), {(2026, 23): 0b1100000, (2026, 24): 0b1})
+        self.occuper(self.chambre, jour(7), jour(8))
+        self.assertEqual(self.libres(date(2026, 6, 6), 3), [self.voisine.pk])
+        self.assertEqual(self.cache.misses, 2)
+        self.assertEqual(self.libres(date(2026, 6, 6), 2), [self.chambre.pk, self.voisine.pk])
+        self.assertEqual((self.cache.misses, self.cache.hits), (2, 1))
+
+
+class AvailabilityCacheEvictionTests(SimpleTestCase):
+
+    def test_eviction_lru(self):
+        masques = {1: 0}
+        taille = sys.getsizeof(masques) + 64 * len(masques)
+        cache = AvailabilityCache(max_bytes=2 * taille, chargeur=lambda *cle: dict(masques))
+        cache.semaine(1, 1, 2026, 23)
+        cache.semaine(1, 1, 2026, 24)
+        # La semaine 23, relue, devient la plus récente : la 24 part à la place
+        cache.semaine(1, 1, 2026, 23)
+        cache.semaine(1, 1, 2026, 25)
+        self.assertEqual(cache.evictions, 1)
+        self.assertLessEqual(cache.octets, cache.max_bytes)
+        cache.semaine(1, 1, 2026, 23)
+        self.assertEqual((cache.hits, cache.misses), (2, 3))
+        cache.semaine(1, 1, 2026, 24)
+        self.assertEqual((cache.misses, cache.evictions), (4, 2))
+
+
+class DailyOccupancyTests(CatalogueMixin, TestCase):
+    """Agrégat DailyOccupancy tenu à jour par App/signals.py."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.chambre = Chambre.objects.create(num_ch=1, num_ho=cls.hotel, num_ty=cls.simple)
+        cls.voisine = Chambre.objects.create(num_ch=2, num_ho=cls.hotel, num_ty=cls.simple)
+        cls.suite = Chambre.objects.create(num_ch=3, num_ho=cls.hotel, num_ty=cls.double)
+
+    def agregat(self):
+        return {(t, j): nb for t, j, nb in
+                DailyOccupancy.objects.filter(nb_occupees__gt=0).values_list("num_ty_id", "jour", "nb_occupees")}
+
+    def occuper(self, chambre, date_a, date_d):
+        return Occupation.objects.create(num_cl=self.client_, num_ho=self.hotel, num_ch=chambre,
+                                         date_a=date_a, date_d=date_d)
+
+    def test_creation(self):
+        self.occuper(self.chambre, jour(0), jour(2))
+        self.occuper(self.voisine, jour(1), jour(2))
+        self.assertEqual(self.agregat(), {
+            (self.simple.pk, date(2026, 6, 1)): 1,
+            (self.simple.pk, date(2026, 6, 2)): 2,
+        })
+
+    def test_modification_et_suppression(self):
+        occupation = self.occuper(self.chambre, jour(0), jour(2))
+        occupation.date_a, occupation.date_d = jour(3), jour(4)
+        occupation.save()
+        self.assertEqual(self.agregat(), {(self.simple.pk, date(2026, 6, 4)): 1})
+        occupation.delete()
+        self.assertEqual(self.agregat(), {})
+
+    def test_changement_de_type_de_chambre(self):
+        self.occuper(self.chambre, jour(0), jour(1))
+        self.chambre.num_ty = self.double
+        self.chambre.save()
+        self.assertEqual(self.agregat(), {(self.double.pk, date(2026, 6, 1)): 1})
+
+    def test_compter(self):
+        # Un séjour arrivé et reparti le même jour compte une nuit
+        occupations = [(1, 2, jour(0), jour(2)), (1, 2, jour(1), jour(1, heure=18))]
+        self.assertEqual(compter(occupations), {
+            (1, 2, date(2026, 6, 1)): 1,
+            (1, 2, date(2026, 6, 2)): 2,
+        })
+        self.assertEqual(nuits(date(2026, 6, 1), date(2026, 6, 4)),
+                         [date(2026, 6, 1), date(2026, 6, 2), date(2026, 6, 3)])
+
+
+class ImportParLotsTests(CatalogueMixin, TestCase):
+
+    def test_ligne_fautive_isolee(self):
+        # Script autonome : il appelle django.setup() à l'import
+        from .fixtures.import_stream import inserer_lot
+
+        Chambre.objects.create(num_ch=5, num_ho=self.hotel, num_ty=self.simple)
+        # Lignes 2 à 9 du CSV ; la ligne 6 reprend une chambre existante (unicité num_ch, num_ho)
+        lot = [(numero, Chambre(num_ch=numero - 1, num_ho=self.hotel, num_ty=self.simple)) for numero in range(2, 10)]
+        rejets = []
+        self.assertEqual(inserer_lot(Chambre, lot, rejets), 7)
+        self.assertEqual([numero for numero, _ in rejets], [6])
+        self.assertIn("UNIQUE", rejets[0][1])
+        self.assertEqual(sorted(Chambre.objects.values_list("num_ch", flat=True)), list(range(1, 9)))
+
+
+class HashRingTests(SimpleTestCase):
+    NOEUDS = [f"http://rasa-{i}:5005" for i in range(4)]
+    CLES = [f"sender-{i}" for i in range(10_000)]
+
+    def repartition(self, anneau):
+        return {cle: anneau.noeud(cle) for cle in self.CLES}
+
+    def test_affectation_stable(self):
+        # Même affectation d'un processus à l'autre, quel que soit l'ordre des nœuds
+        self.assertEqual(self.repartition(HashRing(self.NOEUDS)), self.repartition(HashRing(self.NOEUDS[::-1])))
+
+    def test_ajout_d_un_noeud(self):
+        avant = self.repartition(HashRing(self.NOEUDS))
+        nouveau = "http://rasa-4:5005"
+        apres = self.repartition(HashRing(self.NOEUDS + [nouveau]))
+        deplacees = [cle for cle in self.CLES if avant[cle] != apres[cle]]
+        # Seules les clés reprises par le nouveau nœud bougent, environ 1/5 d'entre elles
+        self.assertEqual({apres[cle] for cle in deplacees}, {nouveau})
+        self.assertLess(len(deplacees), 0.3 * len(self.CLES))
+
+    def test_retrait_d_un_noeud(self):
+        avant = self.repartition(HashRing(self.NOEUDS))
+        retire = self.NOEUDS[1]
+        apres = self.repartition(HashRing([noeud for noeud in self.NOEUDS if noeud != retire]))
+        self.assertEqual([cle for cle in self.CLES if avant[cle] != apres[cle]],
+                         [cle for cle in self.CLES if avant[cle] == retire])
+
+    def test_repartition_equilibree(self):
+        part = len(self.CLES) / len(self.NOEUDS)
+        charges = Counter(self.repartition(HashRing(self.NOEUDS)).values())
+        self.assertEqual(set(charges), set(self.NOEUDS))
+        for noeud, nb in charges.items():
+            with self.subTest(noeud=noeud):
+                self.assertLess(abs(nb - part), 0.2 * part)
+
+    def test_remplacants(self):
+        anneau = HashRing(self.NOEUDS)
+        noeuds = anneau.noeuds_pour("sender-1", 3)
+        self.assertEqual(noeuds[0], anneau.noeud("sender-1"))
+        self.assertEqual(len(set(noeuds)), 3)
+        self.assertEqual(sorted(anneau.noeuds_pour("sender-1", 10)), sorted(self.NOEUDS))
+
+    def test_sans_noeud(self):
+        with self.assertRaises(ValueError):
+            HashRing([])
+
+
+class Horloge:
+    """Horloge manuelle pour le disjoncteur."""
+
+    def __init__(self):
+        self.instant = 0.0
+
+    def __call__(self):
+        return self.instant
+
+
+class CircuitBreakerTests(SimpleTestCase):
+
+    def setUp(self):
+        self.horloge = Horloge()
+        self.breaker = CircuitBreaker(seuil=3, delai_reouverture=10, horloge=self.horloge)
+
+    def ouvrir(self):
+        for _ in range(3):
+            self.assertTrue(self.breaker.autorise())
+            self.breaker.echec()
+
+    def test_ouverture_apres_le_seuil(self):
+        self.breaker.echec()
+        self.breaker.echec()
+        self.assertEqual(self.breaker.etat, CircuitBreaker.FERME)
+        self.breaker.echec()
+        self.assertEqual(self.breaker.etat, CircuitBreaker.OUVERT)
+        self.assertEqual(self.breaker.ouvertures, 1)
+        self.assertFalse(self.breaker.autorise())
+
+    def test_succes_remet_le_compte_a_zero(self):
+        self.breaker.echec()
+        self.breaker.echec()
+        self.breaker.succes()
+        self.breaker.echec()
+        self.assertEqual(self.breaker.etat, CircuitBreaker.FERME)
+
+    def test_semi_ouvert_apres_le_delai(self):
+        self.ouvrir()
+        self.horloge.instant = 9.9
+        self.assertFalse(self.breaker.autorise())
+        self.horloge.instant = 10
+        # Un seul appel d'essai passe
+        self.assertTrue(self.breaker.autorise())
+        self.assertEqual(self.breaker.etat, CircuitBreaker.SEMI_OUVERT)
+        self.assertFalse(self.breaker.autorise())
+
+    def test_refermeture_sur_succes(self):
+        self.ouvrir()
+        self.horloge.instant = 10
+        self.assertTrue(self.breaker.autorise())
+        self.breaker.succes()
+        self.assertEqual(self.breaker.etat, CircuitBreaker.FERME)
+        self.assertTrue(self.breaker.autorise())
+        self.assertTrue(self.breaker.autorise())
+
+    def test_reouverture_sur_echec_de_l_essai(self):
+        self.ouvrir()
+        self.horloge.instant = 10
+        self.assertTrue(self.breaker.autorise())
+        self.breaker.echec()
+        self.assertEqual((self.breaker.etat, self.breaker.ouvertures), (CircuitBreaker.OUVERT, 2))
+        self.horloge.instant = 19.9
+        self.assertFalse(self.breaker.autorise())
+
+    def test_abandon_libere_l_essai(self):
+        self.ouvrir()
+        self.horloge.instant = 10
+        self.assertTrue(self.breaker.autorise())
+        self.breaker.abandon()
+        self.assertTrue(self.breaker.autorise())
+
+    async def test_backend(self):
+        backend = Backend("http://rasa", breaker=self.breaker)
+        for _ in range(3):
+            with self.assertRaises(aiohttp.ClientError):
+                async with backend.creneau():
+                    raise aiohttp.ClientConnectionError()
+        with self.assertRaises(CircuitOuvert):
+            async with backend.creneau():
+                pass
+        self.assertEqual((backend.appels, backend.echecs, backend.rejets), (3, 3, 1))
+        self.horloge.instant = 10
+        async with backend.creneau():
+            pass
+        self.assertEqual(self.breaker.etat, CircuitBreaker.FERME)
+
+
+@override_settings(RASA={"SERVERS": ["http://rasa-0/webhook", "http://rasa-1/webhook"],
+                         "HEDGING": True, "HEDGE_DELAY": 0.2})
+class RelanceTests(SimpleTestCase):
+    """rasa_client._envoyer avec HEDGING ; _poster est remplacé par un faux serveur."""
+
+    SENDER = "sender-1"
+
+    def setUp(self):
+        for patcher in (mock.patch.object(rasa_client, "_anneau", None),
+                        mock.patch.dict(rasa_client._backends, clear=True),
+                        mock.patch.dict(rasa_client._relances, {"lancees": 0, "gagnees": 0}),
+                        mock.patch.object(rasa_client, "_poster", self.poster)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.primaire, self.secours = rasa_client.anneau().noeuds_pour(self.SENDER, 2)
+        # {url: (délai, erreur)} du faux serveur, et instant de chaque appel
+        self.reponses = {}
+        self.appels = {}
+
+    async def poster(self, url, payload):
+        loop = asyncio.get_running_loop()
+        self.appels[url] = loop.time()
+        delai, erreur = self.reponses[url]
+        await asyncio.sleep(delai)
+        if erreur is not None:
+            raise erreur
+        return [{"text": url}]
+
+    async def test_pas_de_relance_avant_le_delai(self):
+        self.reponses = {self.primaire: (0.05, None), self.secours: (0, None)}
+        self.assertEqual(await rasa_client._envoyer(self.SENDER, {}), [{"text": self.primaire}])
+        self.assertEqual(list(self.appels), [self.primaire])
+        self.assertEqual(rasa_client._relances, {"lancees": 0, "gagnees": 0})
+
+    async def test_relance_apres_le_delai(self):
+        self.reponses = {self.primaire: (1, None), self.secours: (0, None)}
+        self.assertEqual(await rasa_client._envoyer(self.SENDER, {}), [{"text": self.secours}])
+        self.assertGreaterEqual(self.appels[self.secours] - self.appels[self.primaire], 0.2)
+        self.assertEqual(rasa_client._relances, {"lancees": 1, "gagnees": 1})
+
+    async def test_primaire_plus_rapide_que_la_relance(self):
+        self.reponses = {self.primaire: (0.3, None), self.secours: (1, None)}
+        self.assertEqual(await rasa_client._envoyer(self.SENDER, {}), [{"text": self.primaire}])
+        self.assertEqual(rasa_client._relances, {"lancees": 1, "gagnees": 0})
+
+    async def test_bascule_sur_echec_du_primaire(self):
+        self.reponses = {self.primaire: (0, aiohttp.ClientConnectionError()), self.secours: (0, None)}
+        self.assertEqual(await rasa_client._envoyer(self.SENDER, {}), [{"text": self.secours}])
+        self.assertLess(self.appels[self.secours] - self.appels[self.primaire], 0.2)
+
+    async def test_echec_des_deux(self):
+        self.reponses = {self.primaire: (0, aiohttp.ClientConnectionError()),
+                         self.secours: (0, aiohttp.ServerDisconnectedError())}
+        with self.assertRaises(aiohttp.ServerDisconnectedError):
+            await rasa_client._envoyer(self.SENDER, {})
+
+    @override_settings(RASA={"SERVERS": ["http://rasa-0/webhook", "http://rasa-1/webhook"], "HEDGING": False})
+    async def test_sans_relance(self):
+        self.reponses = {self.primaire: (0.3, None), self.secours: (0, None)}
+        self.assertEqual(await rasa_client._envoyer(self.SENDER, {}), [{"text": self.primaire}])
+        self.assertEqual(list(self.appels), [self.primaire])
+
+
+class MicroBatcherTests(SimpleTestCase):
+
+    def setUp(self):
+        self.lots = []
+        self.erreur = None
+        self.liberer = None
+
+    async def traiter(self, textes):
+        self.lots.append(textes)
+        if self.liberer is not None:
+            await self.liberer.wait()
+        if self.erreur is not None:
+            raise self.erreur
+        return [texte.upper() for texte in textes]
+
+    async def test_lot_plein(self):
+        batcher = MicroBatcher(self.traiter, fenetre=60, taille_max=3)
+        resultats = await asyncio.wait_for(asyncio.gather(*(batcher.soumettre(t) for t in "abcd")), 1)
+        # Le quatrième part seul : le travailleur était occupé quand le premier lot est parti
+        self.assertEqual(resultats, ["A", "B", "C", "D"])
+        self.assertEqual(self.lots, [["a", "b", "c"], ["d"]])
+
+    async def test_fin_de_fenetre(self):
+        batcher = MicroBatcher(self.traiter, fenetre=0.05, taille_max=10)
+        taches = [asyncio.ensure_future(batcher.soumettre(t)) for t in "ab"]
+        await asyncio.sleep(0.01)
+        self.assertEqual(self.lots, [])
+        self.assertEqual(await asyncio.gather(*taches), ["A", "B"])
+        self.assertEqual(self.lots, [["a", "b"]])
+        self.assertEqual(batcher.stats()["taille_moyenne"], 2)
+
+    async def test_erreur_transmise_a_tout_le_lot(self):
+        self.erreur = RuntimeError("travailleur en panne")
+        batcher = MicroBatcher(self.traiter, fenetre=0.01, taille_max=10)
+        resultats = await asyncio.gather(*(batcher.soumettre(t) for t in "abc"), return_exceptions=True)
+        self.assertEqual(resultats, [self.erreur] * 3)
+        self.assertEqual(batcher.stats()["lots"], 0)
+
+    async def test_annulation(self):
+        self.liberer = asyncio.Event()
+        batcher = MicroBatcher(self.traiter, fenetre=0.01, taille_max=10)
+        premier = asyncio.ensure_future(batcher.soumettre("a"))
+        await asyncio.sleep(0.02)
+        self.assertEqual(self.lots, [["a"]])
+        # Travailleur occupé : b et c attendent ; b est annulé avant le départ de leur lot
+        en_attente = [asyncio.ensure_future(batcher.soumettre(t)) for t in "bc"]
+        await asyncio.sleep(0)
+        en_attente[0].cancel()
+        # a est annulé pendant son analyse : son résultat n'est pas remis
+        premier.cancel()
+        self.liberer.set()
+        self.assertEqual(await en_attente[1], "C")
+        self.assertEqual(self.lots, [["a"], ["c"]])
+        self.assertEqual(batcher.stats()["en_attente"], 0)
+
+
+class SessionFactice:
+    """Session Django réduite aux méthodes asynchrones utilisées par response_cache."""
+
+    def __init__(self):
+        self.donnees = {}
+
+    async def aget(self, cle, defaut=None):
+        return self.donnees.get(cle, defaut)
+
+    async def aset(self, cle, valeur):
+        self.donnees[cle] = valeur
+
+    async def asave(self):
+        pass
+
+
+TOUR_NICE = [
+    {"event": "user", "timestamp": 3.0, "message_id": "m2", "text": "Hôtels à Nice",
+     "parse_data": {"text": "Hôtels à Nice", "intent": {"name": "chercher_hotel", "confidence": 0.98}},
+     "metadata": {}},
+    {"event": "slot", "timestamp": 3.1, "name": "ville", "value": "Nice"},
+    {"event": "action", "timestamp": 3.2, "name": "action_rechercher_hotel"},
+    {"event": "bot", "timestamp": 3.3, "text": "Voici les hôtels de Nice."},
+    {"event": "action", "timestamp": 3.4, "name": "action_listen"},
+]
+TRACKER_NICE = {
+    "slots": {"ville": "Nice", "prix": None, "personnes": None},
+    "events": [{"event": "user", "timestamp": 1.0, "text": "bonjour", "parse_data": {}},
+               {"event": "bot", "timestamp": 1.1, "text": "Bonjour !"}] + TOUR_NICE,
+}
+
+
+class DernierTourTests(SimpleTestCase):
+
+    def test_dernier_tour_sans_horodatage(self):
+        tour = response_cache._dernier_tour(TRACKER_NICE["events"], "hotels a nice")
+        self.assertEqual([e["event"] for e in tour], ["user", "slot", "action", "bot", "action"])
+        self.assertFalse(any("timestamp" in e or "message_id" in e for e in tour))
+        self.assertEqual(tour[1], {"event": "slot", "name": "ville", "value": "Nice"})
+
+    def test_autre_message(self):
+        # Le dernier tour est celui d'un autre message (autre processus sur la conversation)
+        self.assertEqual(response_cache._dernier_tour(TRACKER_NICE["events"], "bonjour"), [])
+        self.assertEqual(response_cache._dernier_tour([], "bonjour"), [])
+
+    def test_raccourci_de_la_passerelle_nlu(self):
+        evenements = [{**TOUR_NICE[0], "text": '/chercher_hotel@0.9800{"ville": ["Nice"]}',
+                       "metadata": {"texte": "Hôtels à Nice"}}] + TOUR_NICE[1:]
+        self.assertEqual(len(response_cache._dernier_tour(evenements, "hôtels à nice")), 5)
+
+    def test_rejouer(self):
+        tour = response_cache._dernier_tour(TRACKER_NICE["events"], "Hôtels à Nice")
+        rejoue = response_cache._rejouer(tour, "hotels a NICE")
+        self.assertEqual(rejoue[0]["text"], "hotels a NICE")
+        self.assertEqual(rejoue[0]["parse_data"],
+                         {"text": "hotels a NICE", "intent": {"name": "chercher_hotel", "confidence": 0.98}})
+        self.assertEqual(rejoue[1:], tour[1:])
+        # Le tour en cache n'est pas modifié
+        self.assertEqual(tour[0]["text"], "Hôtels à Nice")
+
+
+@override_settings(RESPONSE_CACHE={"ENABLED": True})
+class ResponseCacheFluxTests(SimpleTestCase):
+    """response_cache.flux avec un faux Rasa : miss, puis rejeu du tour sur un hit."""
+
+    def setUp(self):
+        self.envois = []
+        self.rejeux = []
+        for patcher in (mock.patch.object(response_cache, "_cache", None),
+                        mock.patch.object(response_cache, "version_donnees", mock.AsyncMock(return_value=1)),
+                        mock.patch.object(rasa_client, "tracker", mock.AsyncMock(return_value=TRACKER_NICE)),
+                        mock.patch.object(rasa_client, "ajouter_evenements", self.ajouter_evenements)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def source(self, sender, message):
+        self.envois.append((sender, message))
+        yield {"recipient_id": sender, "text": "Voici les hôtels de Nice."}
+
+    async def ajouter_evenements(self, sender, evenements):
+        self.rejeux.append((sender, evenements))
+
+    async def repondre(self, session, sender, message):
+        return [msg async for msg in response_cache.flux(session, sender, message, source=self.source)]
+
+    async def test_rejeu_sur_hit(self):
+        premiere = SessionFactice()
+        reponses = await self.repondre(premiere, "sender-1", "Hôtels à Nice")
+        self.assertEqual(premiere.donnees[response_cache.SESSION_SLOTS],
+                         {"ville": "Nice", "prix": None, "personnes": None})
+
+        seconde = SessionFactice()
+        self.assertEqual(await self.repondre(seconde, "sender-2", "hotels a nice"), reponses)
+        self.assertEqual(self.envois, [("sender-1", "Hôtels à Nice")])
+        [(sender, evenements)] = self.rejeux
+        self.assertEqual(sender, "sender-2")
+        self.assertEqual(evenements[0]["text"], "hotels a nice")
+        self.assertIn({"event": "slot", "name": "ville", "value": "Nice"}, evenements)
+        self.assertEqual(seconde.donnees[response_cache.SESSION_SLOTS],
+                         {"ville": "Nice", "prix": None, "personnes": None})
+        self.assertEqual(response_cache.get_cache().stats()["hits"], 1)
+
+    async def test_autres_slots_miss(self):
+        await self.repondre(SessionFactice(), "sender-1", "Hôtels à Nice")
+        session = SessionFactice()
+        session.donnees[response_cache.SESSION_SLOTS] = {"ville": "Lyon", "prix": None, "personnes": None}
+        await self.repondre(session, "sender-2", "Hôtels à Nice")
+        self.assertEqual(self.envois, [("sender-1", "Hôtels à Nice"), ("sender-2", "Hôtels à Nice")])
+        self.assertEqual(self.rejeux, [])
+        self.assertEqual(response_cache.get_cache().stats()["hits"], 0)
+
+
+def fiche(num_ho, ville, etoiles, prix):
+    return FicheHotel(num_ho, f"Hôtel {num_ho}", ville, etoiles, prix, prix, prix, 10, 2,
+                      (TypeOffert("Double", prix, 10, 2),))
+
+
+class IndexPrixTests(SimpleTestCase):
+
+    def setUp(self):
+        # 25 hôtels à 50, 52… 98 € ; Nice un sur deux, 3 étoiles un sur trois
+        self.fiches = [fiche(i, "Nice" if i % 2 else "Lyon", 3 if i % 3 == 0 else 4, 50 + 2 * (i - 1))
+                       for i in range(1, 26)]
+        self.catalogue = Catalogue(1, reversed(self.fiches))
+
+    def test_page_vide(self):
+        self.assertEqual(IndexPrix(()).page(100), ((), 0))
+        index = self.catalogue.index_prix()
+        self.assertEqual(index.page(49), ((), 0))
+        # Au-delà de la dernière page : rien, mais le total reste connu
+        self.assertEqual(index.page(100, numero=4, taille=10), ((), 25))
+        self.assertEqual(self.catalogue.index_prix("Bordeaux").page(100), ((), 0))
+
+    def test_derniere_page_partielle(self):
+        index = self.catalogue.index_prix()
+        hotels, total = index.page(100, numero=3, taille=10)
+        self.assertEqual(total, 25)
+        self.assertEqual([h.num_ho for h in hotels], list(range(21, 26)))
+        hotels, total = index.page(70, numero=2, taille=10)
+        self.assertEqual(total, 11)
+        self.assertEqual([h.num_ho for h in hotels], [11])
+
+    def test_ville_et_etoiles(self):
+        index = self.catalogue.index_prix("NICE", 3)
+        attendus = [f for f in self.fiches if f.ville_ho == "Nice" and f.nb_etoiles_ho == 3]
+        self.assertEqual(index.page(100, taille=10), (tuple(attendus), len(attendus)))
+        hotels, total = index.page(80, taille=2)
+        self.assertEqual([h.num_ho for h in hotels], [3, 9])
+        self.assertEqual(total, 3)
+        # Du moins cher au plus cher, numéro d'hôtel en cas d'égalité
+        egalite = IndexPrix([fiche(7, "Nice", 3, 60), fiche(2, "Nice", 3, 60), fiche(5, "Nice", 3, 55)])
+        self.assertEqual([h.num_ho for h in egalite.page(60)[0]], [5, 2, 7])
+
+
+class KeywordMatcherTests(SimpleTestCase):
+    # Table de correction de benchmarks/bench_keyword_matcher.py :
+    # message, (première ville du texte, capacité, budget, nombre)
+    CAS = [
+        ("Un hôtel à Lyon pour 2 personnes", ("Lyon", True, False, True)),
+        ("Aucune chambre libre à Nice ?", ("Nice", False, False, False)),
+        ("Je suis lyonnais, un hôtel à Paris", ("Paris", False, False, True)),
+        ("Hôtel à Marseille ou sinon Paris", ("Marseille", False, False, False)),
+        ("hotel economique a bordeaux", ("Bordeaux", False, True, False)),
+        ("HÔTEL PAS CHER À LILLE", ("Lille", False, True, False)),
+        ("12 nuits à Toulouse", ("Toulouse", False, False, False)),
+        ("Et ensuite, que proposez-vous ?", (None, False, False, False)),
+        ("Je voyage seule", (None, True, False, False)),
+        ("Des chambres doubles à Nice", ("Nice", True, False, False)),
+        ("Quelque chose de bon marché", (None, False, True, False)),
+        ("Réserver pour cinq", (None, False, False, True)),
+    ]
+    VILLES = ["Paris", "Nice", "Lyon", "Marseille", "Toulouse", "Bordeaux", "Lille"]
+
+    def test_table_de_correction(self):
+        matcher = KeywordMatcher(
+            [(ville, ("ville", ville)) for ville in self.VILLES]
+            + [(mot, (mots_cles.CAPACITE, mot)) for mot in mots_cles.MOTS_CAPACITE]
+            + [(mot, (mots_cles.BUDGET, mot)) for mot in mots_cles.MOTS_PAS_CHERS]
+            + [(mot, (mots_cles.NOMBRE, n)) for mot, n in mots_cles.NOMBRES.items()]
+        )
+        for message, attendu in self.CAS:
+            with self.subTest(message=message):
+                trouves = {}
+                for correspondance in matcher.trouver(message):
+                    categorie, valeur = correspondance.valeur
+                    trouves.setdefault(categorie, []).append(valeur)
+                ville = next(iter(trouves.get("ville", ())), None)
+                self.assertEqual((ville, mots_cles.CAPACITE in trouves, mots_cles.BUDGET in trouves,
+                                  mots_cles.NOMBRE in trouves), attendu)
+                # Même verdict pour les mots-clés de l'automate partagé des actions
+                mots = mots_cles.analyser(message)
+                self.assertEqual((mots_cles.CAPACITE in mots, mots_cles.BUDGET in mots, mots_cles.NOMBRE in mots),
+                                 attendu[1:])
+
+    def test_plus_a_gauche_puis_plus_long(self):
+        matcher = KeywordMatcher([("paris", "Paris"), ("pas cher", "budget"), ("pas chers", "budgets")])
+        self.assertEqual([(c.mot, c.valeur) for c in matcher.trouver("Des hôtels PAS CHERS à Paris")],
+                         [("pas chers", "budgets"), ("paris", "Paris")])
+
+
+class GazetteerTests(SimpleTestCase):
+
+    def setUp(self):
+        self.villes = Gazetteer(["Paris", "Nice", "Saint-Étienne", "Marseille", "Aix-en-Provence",
+                                 "Le Puy-en-Velay", "Strasbourg", "Montpellier"])
+
+    def test_exact(self):
+        self.assertEqual(self.villes.exact("Paris"), "Paris")
+        self.assertEqual(self.villes.chercher("Marseille"), "Marseille")
+        self.assertIn("Nice", self.villes)
+        self.assertNotIn("Lyon", self.villes)
+        self.assertIsNone(self.villes.chercher("Lyon"))
+
+    def test_casse_accents_et_separateurs(self):
+        for nom in ("SAINT-ETIENNE", "saint étienne", "saintetienne", "St Étienne", "st-etienne"):
+            with self.subTest(nom=nom):
+                self.assertEqual(self.villes.exact(nom), "Saint-Étienne")
+        self.assertEqual(self.villes.exact("MARSEILE"), "Marseille")
+
+    def test_distance_1(self):
+        self.assertEqual(self.villes.proches("Strasbourh"), [("Strasbourg", 1)])
+        # Transposition de deux lettres voisines : une seule faute
+        self.assertEqual(self.villes.proches("Montpellire"), [("Montpellier", 1)])
+        self.assertEqual(distance("montpellire", "montpellier", 2), 1)
+        self.assertEqual(distance("montpeiller", "montpellier", 2), 2)
+
+    def test_distance_2(self):
+        self.assertEqual(self.villes.proches("Stasbourh"), [("Strasbourg", 2)])
+        self.assertEqual(self.villes.proches("Stazbourh"), [])
+        self.assertEqual(self.villes.proches("aix en provanse"), [("Aix-en-Provence", 2)])
+
+    def test_tolerance_selon_la_longueur(self):
+        # Aucune faute sous 5 lettres, une jusqu'à 8, deux au-delà
+        self.assertIsNone(self.villes.chercher("Nica"))
+        self.assertIsNone(self.villes.chercher("Pari"))
+        self.assertEqual(self.villes.chercher("Parus"), "Paris")
+        self.assertIsNone(self.villes.chercher("Parvus"))
+        self.assertEqual(self.villes.proches("Montpelier"), [("Montpellier", 1)])
+        self.assertEqual(self.villes.proches("Marsaile"), [])
+
+    def test_citee(self):
+        self.assertEqual(self.villes.citee("Un hôtel au Puy en Velay pour deux"), "Le Puy-en-Velay")
+        self.assertEqual(self.villes.citee("je cherche une chambre à saint etienne ce soir"), "Saint-Étienne")
+        # Première ville du texte en toutes lettres
+        self.assertEqual(self.villes.citee("Marseille ou sinon Paris"), "Marseille")
+        # Fautes tolérées après une préposition seulement
+        self.assertEqual(self.villes.citee("un hôtel à saint etiene pour deux"), "Saint-Étienne")
+        self.assertEqual(self.villes.citee("un hôtel à Marseile ce soir"), "Marseille")
+        self.assertIsNone(self.villes.citee("Strasbourh est loin"))
+        self.assertIsNone(self.villes.citee("Un hôtel pas cher"))
@@ -0,0 +1,27 @@
+"""
+Normalisation du texte tapé par les utilisateurs.
+
+« Hôtels  à PARIS » et « hotels a paris » doivent donner la même clé de
+cache (et, plus tard, les mêmes correspondances de noms).
+"""
+import re
+import unicodedata
+
+# Signes combinants du plan multilingue de base, retirés en une passe de regex ;
+# au-delà de U+FFFF (rare), on repasse caractère par caractère
+_COMBINANTS = re.compile("[%s]" % re.escape(
+    "".join(chr(cp) for cp in range(0x10000) if unicodedata.combining(chr(cp)))))
+
+
+def sans_accents(texte):
+    decompose = unicodedata.normalize("NFKD", texte)
+    if decompose.isascii():
+        return decompose
+    if max(decompose) <= "\uffff":
+        return _COMBINANTS.sub("", decompose)
+    return "".join(c for c in decompose if not unicodedata.combining(c))
+
+
+def normaliser(texte):
+    """Minuscules, accents retirés, espaces réduits à un seul et retirés aux extrémités."""
+    return " ".join(sans_accents(texte.casefold()).split())
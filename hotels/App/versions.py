@@ -0,0 +1,20 @@
+"""
+Compteurs de version des données (table CompteurVersion, tenue par des triggers).
+
+Un cache qui met la version dans ses clés ne sert jamais une réponse
+calculée sur des données modifiées depuis, quel que soit le processus qui
+les a écrites.
+"""
+from .models import CompteurVersion
+
+DONNEES = "donnees"
+# Hôtels, types et chambres seulement (migration 0008)
+CATALOGUE = "catalogue"
+
+
+def lire(nom=DONNEES):
+    return CompteurVersion.objects.filter(nom=nom).values_list("valeur", flat=True).first() or 0
+
+
+async def alire(nom=DONNEES):
+    return await CompteurVersion.objects.filter(nom=nom).values_list("valeur", flat=True).afirst() or 0
@@ -1,20 +1,68 @@
-from django.shortcuts import render
-from django.http import JsonResponse
-import requests
+import json
+
+from django.conf import settings
+from django.contrib.staticfiles.views import serve as servir_sources
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_date
 from django.views.decorators.csrf import csrf_exempt
 
+from . import availability_cache, chat_log, page_cache, rasa_client, response_cache, storage
+from .services import disponibilites_ville, fenetre_sejour, series_occupation
+
 def home(request):
-    return render(request, "App/index.html")  # Ton index.html actuel
+    return page_cache.rendre(request, "App/index.html")  # Ton index.html actuel
 
 def chat_page(request):
-    return render(request, "App/chat.html")   # La nouvelle page pour le chat
+    # Le sender est créé ici pour que la WebSocket (/ws/chat/) le retrouve dans la session
+    rasa_client.sender_id_sync(request)
+    return page_cache.rendre(request, "App/chat.html")   # La nouvelle page pour le chat
+
+
+def statique(request, chemin):
+    """Fichiers statiques servis par Django lui-même (uvicorn sans nginx devant).
+
+    En DEBUG, depuis les dossiers static/ des applis ; sinon depuis STATIC_ROOT
+    (collectstatic), en variante .br/.gz et avec cache long pour les noms hachés.
+    """
+    if settings.DEBUG:
+        return servir_sources(request, chemin)
+    return storage.servir(request, chemin, settings.STATIC_ROOT)
 
 
 @csrf_exempt
-def chat_with_rasa(request):
-    print("Méthode:", request.method)
-    print("POST:", request.POST)
+async def chat_with_rasa(request):
+    if request.method != "POST":
+        return JsonResponse({"error": "Méthode non autorisée"}, status=405)
+
+    user_message = request.POST.get("message")
+    if not user_message:
+        return JsonResponse({"error": "Aucun message fourni"}, status=400)
+
+    sender = await rasa_client.sender_id(request)
+    with chat_log.tour(sender, "chat"):
+        try:
+            response_data = await response_cache.repondre(request, sender, user_message)
+            messages = [msg.get("text") for msg in response_data if "text" in msg]
+        except rasa_client.BackendIndisponible as e:
+            chat_log.noter(erreur=type(e).__name__)
+            return JsonResponse({"responses": [rasa_client.EXCUSE]}, status=503)
+        except Exception as e:
+            chat_log.noter(erreur=type(e).__name__)
+            return JsonResponse({"error": str(e) or type(e).__name__}, status=500)
+        chat_log.noter(reponses=len(messages))
+
+    return JsonResponse({"responses": messages})
+
+
+def _evenement(donnees, nom=None):
+    """Un événement server-sent events."""
+    texte = f"data: {json.dumps(donnees, ensure_ascii=False)}\n\n"
+    return f"event: {nom}\n{texte}" if nom else texte
 
+
+@csrf_exempt
+async def chat_stream(request):
+    """Comme chat_with_rasa, mais chaque message du bot est envoyé (SSE) dès que Rasa l'émet."""
     if request.method != "POST":
         return JsonResponse({"error": "Méthode non autorisée"}, status=405)
 
@@ -22,15 +70,98 @@ def chat_with_rasa(request):
     if not user_message:
         return JsonResponse({"error": "Aucun message fourni"}, status=400)
 
-    rasa_url = "http://localhost:5005/webhooks/rest/webhook"
-    payload = {"sender": "user", "message": user_message}
+    sender = await rasa_client.sender_id(request)
+
+    async def evenements():
+        with chat_log.tour(sender, "stream"):
+            reponses = 0
+            try:
+                # Session déjà enregistrée par le middleware quand le flux commence
+                async for msg in response_cache.flux(request.session, sender, user_message, sauver=True):
+                    if "text" in msg:
+                        reponses += 1
+                        yield _evenement({"text": msg["text"]})
+            except rasa_client.BackendIndisponible as e:
+                chat_log.noter(erreur=type(e).__name__)
+                yield _evenement({"text": rasa_client.EXCUSE})
+            except Exception as e:
+                chat_log.noter(erreur=type(e).__name__)
+                yield _evenement({"error": str(e) or type(e).__name__}, "erreur")
+            chat_log.noter(reponses=reponses)
+        yield _evenement({}, "fin")
+
+    response = StreamingHttpResponse(evenements(), content_type="text/event-stream; charset=utf-8")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # pas de mise en tampon par un proxy nginx
+    return response
+
+
+async def chat_metriques(request):
+    """Files d'attente, disjoncteurs et latences des serveurs Rasa, caches de réponses et de pages, journal (processus courant)."""
+    return JsonResponse({**rasa_client.metriques(), "cache_reponses": response_cache.stats(),
+                         "cache_pages": page_cache.stats(), "journal": chat_log.stats()})
+
+
+# Durée de séjour maximale de /disponibilites/ (chaque semaine couverte est une entrée du cache)
+NB_JOURS_MAX = 60
 
+
+def disponibilites(request):
+    ville = request.GET.get("ville")
+    jour = parse_date(request.GET.get("date_a", ""))
+    if not ville or not jour:
+        return JsonResponse({"error": "Paramètres ville et date_a (AAAA-MM-JJ) requis"}, status=400)
     try:
-        response = requests.post(rasa_url, json=payload)
-        response_data = response.json()
-        messages = [msg.get("text") for msg in response_data if "text" in msg]
-        print("Messages Rasa:", messages)
-    except Exception as e:
-        return JsonResponse({"error": str(e)}, status=500)
+        nb_jours = int(request.GET.get("nb_jours", 1))
+    except ValueError:
+        return JsonResponse({"error": "nb_jours doit être un entier"}, status=400)
+    if not 1 <= nb_jours <= NB_JOURS_MAX:
+        return JsonResponse({"error": f"nb_jours doit être compris entre 1 et {NB_JOURS_MAX}"}, status=400)
 
-    return JsonResponse({"responses": messages})
+    date_a, date_d = fenetre_sejour(jour, nb_jours)
+    resultats = [
+        {
+            "hotel": r["num_ho"],
+            "nom_hotel": r["num_ho__nom_ho"],
+            "etoiles": r["num_ho__nb_etoiles_ho"],
+            "type": r["num_ty"],
+            "nom_type": r["num_ty__nom_ty"],
+            "prix": float(r["num_ty__prix_ty"]),
+            "chambres_libres": r["nb_libres"],
+        }
+        for r in disponibilites_ville(ville, jour, nb_jours)
+    ]
+    return JsonResponse({
+        "ville": ville,
+        "date_a": date_a.isoformat(),
+        "date_d": date_d.isoformat(),
+        "resultats": resultats,
+    })
+
+
+def disponibilites_cache(request):
+    return JsonResponse(availability_cache.get_cache().stats())
+
+
+def occupation(request):
+    debut = parse_date(request.GET.get("date_debut", ""))
+    fin = parse_date(request.GET.get("date_fin", ""))
+    if not debut or not fin or fin < debut:
+        return JsonResponse({"error": "Paramètres date_debut et date_fin (AAAA-MM-JJ) requis"}, status=400)
+    hotel = request.GET.get("hotel")
+    if hotel is not None and not hotel.isdigit():
+        return JsonResponse({"error": "hotel doit être un identifiant numérique"}, status=400)
+
+    hotels = []
+    for hotel_id, serie in series_occupation(debut, fin, int(hotel) if hotel else None).items():
+        chambres = serie["chambres"]
+        hotels.append({
+            "hotel": hotel_id,
+            "chambres": chambres,
+            # Les nuits absentes ont un taux d'occupation nul
+            "jours": [
+                [jour.isoformat(), occupees, round(occupees / chambres, 4) if chambres else None]
+                for jour, occupees in serie["jours"]
+            ],
+        })
+    return JsonResponse({"date_debut": debut.isoformat(), "date_fin": fin.isoformat(), "hotels": hotels})
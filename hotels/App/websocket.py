@@ -0,0 +1,153 @@
+"""
+Canal WebSocket du chat, en ASGI brut (sans Channels), monté par projet/asgi.py.
+
+Le navigateur garde une seule connexion ouverte. Chaque trame JSON porte un
+identifiant de conversation, ce qui permet plusieurs conversations sur la
+même socket :
+
+    → {"conversation": "c1", "message": "Hôtel à Paris"}
+    ← {"conversation": "c1", "text": "Je vous montre les hôtels…"}
+    ← {"conversation": "c1", "fin": true}
+
+Les messages d'une conversation sont traités dans l'ordre, les conversations
+entre elles en parallèle ; au-delà de MAX_EN_ATTENTE messages en attente
+dans une conversation, les suivants sont refusés. Côté Rasa, toutes les
+sockets du processus passent par le pool de connexions keep-alive de
+rasa_client.
+
+La conversation CONVERSATION (celle de chat.js) parle au tracker du sender
+de la session, comme /chat/stream/ quand la socket est fermée : le
+navigateur peut passer d'un canal à l'autre sans perdre le fil. Les autres
+conversations ont leur propre tracker (sender:conversation).
+
+Les réponses passent par le cache de response_cache. Ses slots sont ceux
+de la session Django pour CONVERSATION (relue et enregistrée à chaque
+message), gardés en mémoire le temps de la socket pour les autres.
+"""
+import asyncio
+import json
+import uuid
+from http.cookies import SimpleCookie
+from importlib import import_module
+from urllib.parse import urlsplit
+
+from django.conf import settings
+
+from . import chat_log, rasa_client, response_cache
+
+CHEMIN = "/ws/chat/"
+CONVERSATION = "chat"
+MAX_CONVERSATIONS = 16
+MAX_EN_ATTENTE = 8
+MAX_MESSAGE = 2000
+
+
+def _entetes(scope):
+    return {nom.decode("latin-1"): valeur.decode("latin-1") for nom, valeur in scope.get("headers", [])}
+
+
+def origine_valide(scope):
+    """Refuse les connexions ouvertes depuis une autre origine ou sans Origin (pas de jeton CSRF sur une WebSocket)."""
+    entetes = _entetes(scope)
+    origine = entetes.get("origin")
+    return origine is not None and urlsplit(origine).netloc == entetes.get("host")
+
+
+def _session(cle=None):
+    """Session Django de clé `cle` ; sans clé, une session en mémoire jamais enregistrée."""
+    return import_module(settings.SESSION_ENGINE).SessionStore(cle)
+
+
+async def sender_session(scope):
+    """(clé de session, sender) du visiteur d'après son cookie, ou (None, sender propre à la socket)."""
+    cookie = SimpleCookie(_entetes(scope).get("cookie", ""))
+    morceau = cookie.get(settings.SESSION_COOKIE_NAME)
+    if morceau is not None:
+        sender = await _session(morceau.value).aget(rasa_client.SESSION_KEY)
+        if sender:
+            return morceau.value, sender
+    return None, uuid.uuid4().hex
+
+
+def sender_conversation(sender, identifiant):
+    """Sender Rasa d'une conversation de la socket : celui de la session pour CONVERSATION."""
+    return sender if identifiant == CONVERSATION else f"{sender}:{identifiant}"
+
+
+async def chat_socket(scope, receive, send):
+    evenement = await receive()
+    if evenement["type"] != "websocket.connect":
+        return
+    if not origine_valide(scope):
+        await send({"type": "websocket.close", "code": 4003})
+        return
+    cle_session, sender = await sender_session(scope)
+    await send({"type": "websocket.accept"})
+
+    verrou = asyncio.Lock()
+
+    async def emettre(donnees):
+        async with verrou:
+            await send({"type": "websocket.send", "text": json.dumps(donnees, ensure_ascii=False)})
+
+    async def conversation(identifiant, file):
+        sender_rasa = sender_conversation(sender, identifiant)
+        partagee = cle_session is not None and identifiant == CONVERSATION
+        locale = None if partagee else _session()
+        while True:
+            message = await file.get()
+            # Relue à chaque message : /chat/stream/ a pu faire avancer la conversation entre-temps
+            session = _session(cle_session) if partagee else locale
+            with chat_log.tour(sender_rasa, "websocket"):
+                reponses = 0
+                try:
+                    async for msg in response_cache.flux(session, sender_rasa, message, sauver=partagee):
+                        if "text" in msg:
+                            reponses += 1
+                            await emettre({"conversation": identifiant, "text": msg["text"]})
+                except asyncio.CancelledError:
+                    raise
+                except rasa_client.BackendIndisponible as e:
+                    chat_log.noter(erreur=type(e).__name__)
+                    await emettre({"conversation": identifiant, "text": rasa_client.EXCUSE})
+                except Exception as e:
+                    chat_log.noter(erreur=type(e).__name__)
+                    await emettre({"conversation": identifiant, "error": str(e) or type(e).__name__})
+                chat_log.noter(reponses=reponses)
+            await emettre({"conversation": identifiant, "fin": True})
+
+    files = {}
+    taches = []
+    try:
+        while True:
+            evenement = await receive()
+            if evenement["type"] == "websocket.disconnect":
+                break
+            if evenement["type"] != "websocket.receive":
+                continue
+            try:
+                trame = json.loads(evenement.get("text") or evenement.get("bytes") or b"")
+                identifiant = str(trame["conversation"])
+                message = trame["message"]
+            except (ValueError, TypeError, KeyError):
+                await emettre({"error": "Trame invalide : {\"conversation\": ..., \"message\": ...} attendu"})
+                continue
+            if not isinstance(message, str) or not message or len(message) > MAX_MESSAGE:
+                await emettre({"conversation": identifiant, "error": "Message vide ou trop long"})
+                continue
+
+            file = files.get(identifiant)
+            if file is None:
+                if len(files) >= MAX_CONVERSATIONS:
+                    await emettre({"conversation": identifiant, "error": "Trop de conversations sur cette connexion"})
+                    continue
+                file = files[identifiant] = asyncio.Queue(MAX_EN_ATTENTE)
+                taches.append(asyncio.create_task(conversation(identifiant, file)))
+            try:
+                file.put_nowait(message)
+            except asyncio.QueueFull:
+                await emettre({"conversation": identifiant, "error": "Trop de messages en attente, réessayez"})
+    finally:
+        for tache in taches:
+            tache.cancel()
+        await asyncio.gather(*taches, return_exceptions=True)
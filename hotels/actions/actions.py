@@ -1,10 +1,8 @@
 import os
 import sys
 import django
-from django.db.models import Avg
 from rasa_sdk import Action, Tracker
 from rasa_sdk.executor import CollectingDispatcher
-from asgiref.sync import sync_to_async
 from rasa_sdk.events import SlotSet, FollowupAction
 
 # Ajouter le projet Django au PYTHONPATH
@@ -14,7 +12,28 @@ sys.path.append(BASE_DIR)
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "projet.settings")
 django.setup()
 
-from App.models import Hotel
+from django.utils import timezone
+
+from . import catalogue, depot, mots_cles
+
+# Villes citées en exemple quand on demande la ville
+VILLES_PROPOSEES = 7
+
+
+def texte_message(tracker):
+    """Texte tapé par l'utilisateur, même quand la passerelle NLU a envoyé « /intention{...} » à sa place."""
+    metadata = tracker.latest_message.get('metadata') or {}
+    return metadata.get('texte') or tracker.latest_message.get('text') or ''
+
+
+def demande_ville(cat):
+    """Demande de ville citant les villes du catalogue les mieux fournies en hôtels."""
+    noms = cat.noms_villes
+    if len(noms) < 2:
+        return "Dans quelle ville souhaitez-vous rechercher un hôtel ?"
+    if len(noms) <= VILLES_PROPOSEES:
+        return f"Veuillez préciser la ville parmi : {', '.join(noms[:-1])} ou {noms[-1]}."
+    return f"Veuillez préciser la ville (par exemple {', '.join(noms[:VILLES_PROPOSEES])}…)."
 
 
 class ActionRechercherHotel(Action):
@@ -24,16 +43,9 @@ class ActionRechercherHotel(Action):
     async def run(self, dispatcher: CollectingDispatcher,
                   tracker: Tracker, domain: dict):
 
-        # Mapping direct des villes dans le texte
-        ville_mapping = {
-            'paris': 'Paris',
-            'nice': 'Nice',
-            'lyon': 'Lyon',
-            'marseille': 'Marseille',
-            'toulouse': 'Toulouse',
-            'bordeaux': 'Bordeaux',
-            'lille': 'Lille'
-        }
+        cat = await catalogue.catalogue()
+        texte = texte_message(tracker)
+        mots = mots_cles.analyser(texte)
 
         # 1. Essayer de récupérer depuis les entités
         entities = tracker.latest_message.get('entities', [])
@@ -44,13 +56,8 @@ class ActionRechercherHotel(Action):
         if ville_entity:
             ville = ville_entity['value']
         else:
-            # 2. Fallback: chercher dans le texte du message
-            message_text = tracker.latest_message.get('text', '').lower()
-
-            for ville_key, ville_value in ville_mapping.items():
-                if ville_key in message_text:
-                    ville = ville_value
-                    break
+            # 2. Fallback: première ville du catalogue citée dans le texte du message
+            ville = cat.ville_citee(texte)
 
         # 3. Si toujours pas trouvé, utiliser le slot
         if not ville:
@@ -58,28 +65,16 @@ class ActionRechercherHotel(Action):
 
         # DÉTECTION INTELLIGENTE : Si pas de ville mais demande de capacité, rediriger
         if not ville:
-            message_text = tracker.latest_message.get('text', '').lower()
-
-            # Mots-clés pour détecter les demandes de capacité
-            mots_capacite = [
-                'personne', 'personnes', 'adulte', 'adultes', 'voyageur', 'voyageurs',
-                'seul', 'couple', 'groupe', 'famille', 'familial', 'familiale',
-                'simple', 'double', 'triple', 'suite'
-            ]
-
-            if any(mot in message_text for mot in mots_capacite):
+            if mots_cles.CAPACITE in mots:
                 # C'est une demande de capacité, rediriger vers l'action appropriée
-                from rasa_sdk.events import FollowupAction
                 return [FollowupAction("action_rechercher_par_capacite")]
 
         if not ville:
-            dispatcher.utter_message(
-                text="Veuillez préciser la ville parmi : Paris, Lyon, Marseille, Nice, Toulouse, Bordeaux ou Lille."
-            )
+            dispatcher.utter_message(text=demande_ville(cat))
             return []
 
-        # Normaliser le nom de la ville
-        ville = ville.capitalize()
+        # Nom de la ville tel qu'au catalogue (casse, accents, fautes de frappe)
+        ville = cat.nom_ville(ville)
 
         # Récupérer aussi le prix et le nombre de personnes
         prix_entity = next((e for e in entities if e['entity'] == 'prix'), None)
@@ -88,16 +83,11 @@ class ActionRechercherHotel(Action):
         prix_max = float(prix_entity['value']) if prix_entity else tracker.get_slot("prix")
         personnes = personnes_entity['value'] if personnes_entity else tracker.get_slot("personnes")
 
-        # Requête synchrone dans thread async
-        def get_hotels_sync():
-            qs = Hotel.objects.filter(ville_ho__iexact=ville).annotate(
-                prix_moyen=Avg('chambre__num_ty__prix_ty')
-            )
-            if prix_max:
-                qs = qs.filter(prix_moyen__lte=prix_max)
-            return list(qs)
-
-        hotels = await sync_to_async(get_hotels_sync)()
+        # Hôtels de la ville dans le budget (catalogue en mémoire), puis
+        # seuls ceux ayant une chambre libre ce soir sont proposés
+        fiches = cat.ville(ville, float(prix_max) if prix_max else None)
+        libres = await depot.hotels_libres([f.num_ho for f in fiches], timezone.localdate())
+        hotels = [f for f in fiches if f.num_ho in libres]
 
         if hotels:
             # Construire le message en fonction des critères
@@ -146,11 +136,7 @@ class ActionRechercherParPrix(Action):
         # Si pas de prix spécifié, utiliser un prix par défaut pour "pas cher"
         if not prix_max:
             # Analyser le texte pour les mots-clés "pas cher"
-            message_text = tracker.latest_message.get('text', '').lower()
-
-            mots_pas_chers = ['pas cher', 'pas chers', 'économique', 'bon marché', 'low cost', 'petit prix', 'bas prix']
-
-            if any(mot in message_text for mot in mots_pas_chers):
+            if mots_cles.BUDGET in mots_cles.analyser(texte_message(tracker)):
                 prix_max = 80  # Prix par défaut pour "pas cher"
                 message_prix = f"Je vous montre les hôtels avec un prix moyen ≤ {prix_max}€ :"
             else:
@@ -164,20 +150,31 @@ class ActionRechercherParPrix(Action):
         if 'message_prix' in locals():
             dispatcher.utter_message(text=message_prix)
 
-        # Requête pour les hôtels par prix
-        def get_hotels_par_prix_sync():
-            qs = Hotel.objects.annotate(
-                prix_moyen=Avg('chambre__num_ty__prix_ty')
-            ).filter(prix_moyen__lte=prix_max).order_by('prix_moyen')
-            return list(qs)
+        # La liste vient d'une action de suivi : avec le canal REST en flux,
+        # ce premier message part vers le navigateur sans attendre la requête
+        return [SlotSet("prix", prix_max), FollowupAction("action_lister_par_prix")]
+
+
+class ActionListerParPrix(Action):
+    def name(self):
+        return "action_lister_par_prix"
+
+    async def run(self, dispatcher: CollectingDispatcher,
+                  tracker: Tracker, domain: dict):
+
+        prix_max = tracker.get_slot("prix")
 
-        hotels = await sync_to_async(get_hotels_par_prix_sync)()
+        # Tous les hôtels, les moins chers d'abord, une page au plus : la réponse ne grandit pas avec le catalogue
+        index = (await catalogue.catalogue()).index_prix()
+        hotels, total = index.page(float(prix_max), taille=catalogue.config()["PAGE_SIZE"])
 
         if hotels:
             response = ""
             for h in hotels:
                 prix = h.prix_moyen or 0
                 response += f"- {h.nom_ho} à {h.ville_ho} ({h.nb_etoiles_ho} étoiles) : {prix:.2f}€\n"
+            if total > len(hotels):
+                response += f"… et {total - len(hotels)} autres hôtels dans ce budget.\n"
         else:
             response = f"Désolé, aucun hôtel ne correspond à votre budget de {prix_max}€."
 
@@ -227,24 +224,21 @@ class ActionRechercherParCapacite(Action):
 
         type_chambre = types_chambres.get(nb_personnes, f"chambre pour {nb_personnes} personnes")
 
-        # Rechercher tous les hôtels (pour l'instant)
-        def get_hotels_sync():
-            qs = Hotel.objects.annotate(
-                prix_moyen=Avg('chambre__num_ty__prix_ty')
-            )
-            return list(qs)
-
-        hotels = await sync_to_async(get_hotels_sync)()
+        # Hôtels proposant un type de chambre assez grand (le moins cher par hôtel, voir
+        # depot.CAPACITES), dans la ville du slot si elle est connue. Jusqu'à la couche
+        # d'accès asynchrone, l'action listait tous les hôtels avec leur prix moyen
+        capacite = int(nb_personnes) if str(nb_personnes).isdigit() else 1
+        cat = await catalogue.catalogue()
+        hotels = cat.pour(capacite, cat.nom_ville(tracker.get_slot("ville")))
 
         if hotels:
             response = f"🛌 Pour {nb_personnes} personne(s), je vous recommande une **{type_chambre}**.\n\n"
             response += f"🏨 **Hôtels disponibles :**\n"
 
             for h in hotels:
-                prix = h.prix_moyen or 0
-                response += f"- {h.nom_ho} à {h.ville_ho} ({h.nb_etoiles_ho} ⭐) : {prix:.2f}€/nuit\n"
+                response += f"- {h.nom_ho} à {h.ville_ho} ({h.nb_etoiles_ho} ⭐) : {h.nom_ty} {h.prix_ty:.2f}€/nuit\n"
 
-            response += f"\n💡 **Conseil :** Précisez une ville pour affiner votre recherche (ex: 'Hôtel à Paris pour {nb_personnes} personnes')."
+            response += f"\n💡 **Conseil :** Précisez une ville pour affiner votre recherche (ex: 'Hôtel à {cat.noms_villes[0]} pour {nb_personnes} personnes')."
         else:
             response = f"Désolé, aucun hôtel ne correspond à votre recherche pour {nb_personnes} personne(s)."
 
@@ -268,23 +262,13 @@ class ActionDetecterCapaciteFallback(Action):
                   tracker: Tracker, domain: dict):
 
         # Analyser le texte pour détecter les demandes de capacité
-        message_text = tracker.latest_message.get('text', '').lower()
-
-        mots_capacite = [
-            'personne', 'personnes', 'adulte', 'adultes', 'voyageur', 'voyageurs',
-            'seul', 'couple', 'groupe', 'famille', 'familial', 'familiale',
-            'simple', 'double', 'triple', 'suite'
-        ]
-
-        nombres = ['1', '2', '3', '4', '5', 'une', 'un', 'deux', 'trois', 'quatre', 'cinq']
+        mots = mots_cles.analyser(texte_message(tracker))
 
         # Vérifier si c'est une demande de capacité
-        if any(mot in message_text for mot in mots_capacite) or any(nombre in message_text for nombre in nombres):
+        if mots_cles.CAPACITE in mots or mots_cles.NOMBRE in mots:
             # Rediriger vers l'action de capacité
-            from rasa_sdk.events import FollowupAction
             return [FollowupAction("action_rechercher_par_capacite")]
         else:
             # Ce n'est pas une demande de capacité, demander la ville normalement
-            dispatcher.utter_message(
-                text="Veuillez préciser la ville parmi : Paris, Lyon, Marseille, Nice, Toulouse, Bordeaux ou Lille.")
+            dispatcher.utter_message(text=demande_ville(await catalogue.catalogue()))
             return []
\ No newline at end of file
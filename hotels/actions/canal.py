@@ -0,0 +1,15 @@
+"""
+Canal REST de Rasa qui garde le champ "metadata" du corps de la requête.
+
+Le canal rest d'origine l'ignore. Or la passerelle NLU (App/nlu_gateway.py)
+envoie « /intention{...} » à la place du texte et met le texte d'origine
+dans metadata["texte"], que les actions relisent. À déclarer dans
+credentials.yml à la place de « rest: » quand la passerelle est activée ;
+il garde l'URL /webhooks/rest/webhook.
+"""
+from rasa.core.channels.rest import RestInput
+
+
+class RestMetadata(RestInput):
+    def get_metadata(self, request):
+        return (request.json or {}).get("metadata")
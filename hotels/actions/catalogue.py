@@ -0,0 +1,280 @@
+"""
+Catalogue des hôtels en mémoire du serveur d'actions.
+
+Hôtels, types et chambres changent rarement : au lieu de refaire à chaque
+action la jointure et l'agrégat des prix, le serveur d'actions garde un
+instantané immuable (Catalogue) avec, par hôtel, prix moyen, minimum et
+maximum, types de chambres proposés et capacité. Il est indexé par ville
+normalisée et par prix moyen ; une recherche est une lecture de
+dictionnaire ou une bissection, sans requête.
+
+Les index de prix (IndexPrix) existent pour tout le catalogue, par ville,
+par nombre d'étoiles et par (ville, étoiles) : « prix moyen ≤ X, du moins
+cher au plus cher » est une bissection puis une tranche, dont on ne
+construit que la page demandée, quel que soit le nombre d'hôtels.
+
+La version 'catalogue' de CompteurVersion (triggers de la migration 0008)
+est relue au plus toutes les VERSION_TTL secondes. Quand elle a changé,
+un nouvel instantané est construit puis mis à la place de l'ancien en une
+affectation : une action qui tient encore l'ancien le lit jusqu'au bout,
+les suivantes voient le nouveau. Pendant le rechargement, les autres
+actions continuent sur l'ancien instantané sans attendre.
+
+Les noms des villes viennent aussi du catalogue : noms_villes (de la plus
+fournie en hôtels à la moins fournie) et un répertoire (App.gazetteer) qui
+les reconnaît sans casse ni accents, sous leurs variantes et malgré les
+fautes de frappe. Il suit le catalogue ; comme sa construction coûte
+quelques secondes pour des dizaines de milliers de villes, un nouvel
+instantané reprend celui du précédent quand l'ensemble des villes n'a pas
+changé.
+
+Seuls les hôtels qui ont des chambres sont au catalogue (comme dans les
+recherches de depot, qui passent par le résumé HotelTypeChambre). Les
+disponibilités, elles, changent tout le temps et restent lues en base
+(depot.hotels_libres).
+
+Réglage dans settings.py :
+
+    CATALOGUE = {
+        "VERSION_TTL": 1.0,     # secondes entre deux lectures de la version
+        "PAGE_SIZE": 10,        # hôtels par page des recherches par prix
+    }
+"""
+import asyncio
+import logging
+import time
+import weakref
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import NamedTuple
+
+from django.conf import settings
+
+from App import versions
+from App.gazetteer import Gazetteer
+from App.texte import normaliser
+
+from . import depot
+from .depot import CAPACITES, PRIX_MOYEN, ChambreAdaptee
+
+logger = logging.getLogger(__name__)
+
+VERSION_TTL = 1.0
+PAGE_SIZE = 10
+
+_courant = None
+_verifie = 0.0
+_verrous = weakref.WeakKeyDictionary()
+
+
+class TypeOffert(NamedTuple):
+    nom_ty: str
+    prix_ty: float
+    nb_chambres: int
+    capacite: int
+
+
+class FicheHotel(NamedTuple):
+    num_ho: int
+    nom_ho: str
+    ville_ho: str
+    nb_etoiles_ho: int
+    prix_moyen: float
+    prix_min: float
+    prix_max: float
+    nb_chambres: int
+    capacite_max: int
+    types: tuple        # TypeOffert, du moins cher au plus cher
+
+
+def config():
+    catalogue = getattr(settings, "CATALOGUE", {})
+    return {
+        "VERSION_TTL": catalogue.get("VERSION_TTL", VERSION_TTL),
+        "PAGE_SIZE": catalogue.get("PAGE_SIZE", PAGE_SIZE),
+    }
+
+
+class IndexPrix:
+    """Hôtels triés par (prix moyen, numéro) ; prix dans un tableau de doubles pour la bissection."""
+
+    __slots__ = ("prix", "fiches")
+
+    def __init__(self, fiches):
+        self.fiches = tuple(sorted(fiches, key=lambda f: (f.prix_moyen, f.num_ho)))
+        self.prix = array("d", (f.prix_moyen for f in self.fiches))
+
+    def __len__(self):
+        return len(self.fiches)
+
+    def bornes(self, prix_max=None, prix_min=None):
+        """Positions [debut, fin) des hôtels de prix moyen entre prix_min et prix_max inclus."""
+        debut = 0 if prix_min is None else bisect_left(self.prix, prix_min)
+        fin = len(self.prix) if prix_max is None else bisect_right(self.prix, prix_max)
+        return debut, max(debut, fin)
+
+    def compter(self, prix_max=None, prix_min=None):
+        debut, fin = self.bornes(prix_max, prix_min)
+        return fin - debut
+
+    def jusqu_a(self, prix_max=None, prix_min=None, decalage=0, nombre=None):
+        """Hôtels de la fourchette, du moins cher au plus cher, à partir du rang `decalage` (au plus `nombre`)."""
+        debut, fin = self.bornes(prix_max, prix_min)
+        debut = min(fin, debut + decalage)
+        if nombre is not None:
+            fin = min(fin, debut + nombre)
+        return self.fiches[debut:fin]
+
+    def page(self, prix_max=None, numero=1, taille=PAGE_SIZE, prix_min=None):
+        """(hôtels de la page `numero`, à partir de 1 ; nombre total d'hôtels de la fourchette)."""
+        return (self.jusqu_a(prix_max, prix_min, (numero - 1) * taille, taille),
+                self.compter(prix_max, prix_min))
+
+
+class Catalogue:
+    """Instantané immuable du catalogue, avec ses index par ville et par prix."""
+
+    __slots__ = ("version", "hotels", "noms_villes", "gazetteer", "_villes", "_index_prix", "_offres")
+
+    def __init__(self, version, fiches, precedent=None):
+        self.version = version
+        self.hotels = tuple(sorted(fiches, key=lambda f: f.num_ho))
+        villes = {}
+        # (ville ou None, étoiles ou None) -> hôtels, pour les index de prix
+        groupes = {}
+        # (ville ou None, personnes) -> type le moins cher qui convient, pour chaque hôtel
+        offres = {}
+        for fiche in self.hotels:
+            ville = normaliser(fiche.ville_ho)
+            villes.setdefault(ville, []).append(fiche)
+            for cle in ((None, None), (ville, None), (None, fiche.nb_etoiles_ho), (ville, fiche.nb_etoiles_ho)):
+                groupes.setdefault(cle, []).append(fiche)
+            for personnes in range(1, fiche.capacite_max + 1):
+                offre = next(t for t in fiche.types if t.capacite >= personnes)
+                chambre = ChambreAdaptee(fiche.num_ho, fiche.nom_ho, fiche.ville_ho, fiche.nb_etoiles_ho,
+                                         offre.nom_ty, offre.prix_ty, offre.capacite)
+                offres.setdefault((None, personnes), []).append(chambre)
+                offres.setdefault((ville, personnes), []).append(chambre)
+        self._villes = {ville: tuple(fiches) for ville, fiches in villes.items()}
+        # Nom affiché de chaque ville : l'orthographe la plus fréquente parmi ses hôtels
+        noms = {}
+        for ville, fiches in self._villes.items():
+            orthographes = {}
+            for fiche in fiches:
+                orthographes[fiche.ville_ho] = orthographes.get(fiche.ville_ho, 0) + 1
+            noms[ville] = max(orthographes, key=lambda nom: (orthographes[nom], nom))
+        self.noms_villes = tuple(sorted(noms.values(), key=lambda nom: (-len(self._villes[normaliser(nom)]), nom)))
+        # Répertoire par ordre alphabétique : il ne dépend que de l'ensemble des villes
+        alphabetique = tuple(sorted(noms.values()))
+        if precedent is not None and precedent.gazetteer.noms == alphabetique:
+            self.gazetteer = precedent.gazetteer
+        else:
+            self.gazetteer = Gazetteer(alphabetique)
+        self._index_prix = {cle: IndexPrix(fiches) for cle, fiches in groupes.items()}
+        self._offres = {cle: tuple(chambres) for cle, chambres in offres.items()}
+
+    def __len__(self):
+        return len(self.hotels)
+
+    def villes(self):
+        return self._villes.keys()
+
+    def nom_ville(self, ville):
+        """Nom au catalogue de la ville tapée (casse, accents, variantes, fautes de frappe), sinon ville telle quelle."""
+        return (self.gazetteer.chercher(ville) or ville) if ville else ville
+
+    def ville_citee(self, texte):
+        """Ville du catalogue citée dans le message, ou None."""
+        return self.gazetteer.citee(texte)
+
+    def ville(self, ville, prix_max=None):
+        """Hôtels de la ville (sans casse ni accents), prix moyen ≤ prix_max, par numéro."""
+        fiches = self._villes.get(normaliser(ville), ())
+        if prix_max is None:
+            return fiches
+        return tuple(f for f in fiches if f.prix_moyen <= prix_max)
+
+    def index_prix(self, ville=None, etoiles=None):
+        """Index de prix de tout le catalogue, d'une ville, d'un nombre d'étoiles ou des deux."""
+        return self._index_prix.get((normaliser(ville) if ville else None, etoiles)) or IndexPrix(())
+
+    def jusqu_a(self, prix_max, ville=None, etoiles=None, decalage=0, nombre=None):
+        """Hôtels de prix moyen ≤ prix_max, du moins cher au plus cher (voir IndexPrix.jusqu_a)."""
+        return self.index_prix(ville, etoiles).jusqu_a(prix_max, decalage=decalage, nombre=nombre)
+
+    def pour(self, personnes, ville=None):
+        """Pour chaque hôtel (de la ville), le type de chambre le moins cher qui loge `personnes`."""
+        return self._offres.get((normaliser(ville) if ville else None, personnes), ())
+
+
+# --- Chargement et rechargement ---
+
+HOTELS = f"""
+    SELECT h.num_ho, h.nom_ho, h.ville_ho, h.nb_etoiles_ho, {PRIX_MOYEN},
+           CAST(MIN(r.prix_ty) AS DOUBLE PRECISION), CAST(MAX(r.prix_ty) AS DOUBLE PRECISION), SUM(r.nb_chambres)
+    FROM "Hotel" h JOIN "HotelTypeChambre" r ON r.num_ho_id = h.num_ho
+    GROUP BY h.num_ho, h.nom_ho, h.ville_ho, h.nb_etoiles_ho
+"""
+
+TYPES = """
+    SELECT r.num_ho_id, t.nom_ty, CAST(r.prix_ty AS DOUBLE PRECISION), r.nb_chambres
+    FROM "HotelTypeChambre" r JOIN "TypeChambre" t ON t.num_ty = r.num_ty_id
+    ORDER BY r.num_ho_id, r.prix_ty, t.num_ty
+"""
+
+
+async def lire_version():
+    lignes = await depot.get_depot().lignes('SELECT valeur FROM "CompteurVersion" WHERE nom = ?', [versions.CATALOGUE])
+    return lignes[0][0] if lignes else 0
+
+
+async def charger(version, precedent=None):
+    """Construit un instantané à partir de la base (deux requêtes ; les index hors de la boucle)."""
+    source = depot.get_depot()
+    types = {}
+    for num_ho, nom_ty, prix_ty, nb_chambres in await source.lignes(TYPES, []):
+        types.setdefault(num_ho, []).append(TypeOffert(nom_ty, prix_ty, nb_chambres, CAPACITES.get(nom_ty.lower(), 0)))
+    fiches = []
+    for num_ho, nom_ho, ville_ho, nb_etoiles, prix_moyen, prix_min, prix_max, nb_chambres in await source.lignes(HOTELS, []):
+        offres = tuple(types.get(num_ho, ()))
+        fiches.append(FicheHotel(num_ho, nom_ho, ville_ho, nb_etoiles, prix_moyen, prix_min, prix_max, nb_chambres,
+                                 max((t.capacite for t in offres), default=0), offres))
+    return await asyncio.to_thread(Catalogue, version, fiches, precedent)
+
+
+def _verrou():
+    loop = asyncio.get_running_loop()
+    verrou = _verrous.get(loop)
+    if verrou is None:
+        verrou = _verrous[loop] = asyncio.Lock()
+    return verrou
+
+
+async def catalogue():
+    """Instantané courant, rechargé si la version du catalogue a changé depuis sa construction."""
+    global _courant, _verifie
+    courant = _courant
+    if courant is not None and time.monotonic() - _verifie < config()["VERSION_TTL"]:
+        return courant
+    verrou = _verrou()
+    if courant is not None and verrou.locked():
+        # Une autre action vérifie ou recharge : l'ancien instantané reste valable en attendant
+        return courant
+    async with verrou:
+        if _courant is not None and time.monotonic() - _verifie < config()["VERSION_TTL"]:
+            return _courant
+        try:
+            version = await lire_version()
+            if _courant is None or version != _courant.version:
+                _courant = await charger(version, _courant)
+        except Exception:
+            if _courant is None:
+                raise
+            logger.exception("Catalogue non rechargé, l'instantané %s reste en service", _courant.version)
+        _verifie = time.monotonic()
+    return _courant
+
+
+def vider():
+    global _courant, _verifie
+    _courant, _verifie = None, 0.0
@@ -0,0 +1,244 @@
+"""
+Accès asynchrone à la base pour le serveur d'actions Rasa.
+
+Avec sync_to_async, chaque requête ORM passe par l'exécuteur d'asgiref,
+qui n'a qu'un thread en mode thread_sensitive : les actions lancées en
+même temps attendent toutes la même connexion. Ici chaque boucle
+d'événements a son propre pool de connexions natives (aiosqlite pour
+SQLite, asyncpg pour PostgreSQL), ouvertes à la demande jusqu'à
+POOL_SIZE : autant de requêtes s'exécutent en parallèle (SQLite : une
+connexion en lecture seule, donc un thread, par requête en vol).
+
+La base est celle de Django (connections["default"]) ; le SQL lit les
+mêmes tables que les services (résumé HotelTypeChambre pour les prix du
+catalogue, Occupation pour les chambres libres).
+
+Réglage dans settings.py :
+
+    ACTIONS_DB = {
+        "POOL_SIZE": 8,     # connexions simultanées par processus d'actions
+    }
+"""
+import asyncio
+import re
+import weakref
+from contextlib import asynccontextmanager
+from datetime import date, timezone as dt_timezone
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+
+from App.services import fenetre_sejour
+
+POOL_SIZE = 8
+
+# Personnes logées par type de chambre (TypeChambre.nom_ty, sans casse)
+CAPACITES = {"simple": 1, "double": 2, "suite": 4}
+
+_depots = weakref.WeakKeyDictionary()
+
+
+class HotelTrouve(NamedTuple):
+    num_ho: int
+    nom_ho: str
+    ville_ho: str
+    nb_etoiles_ho: int
+    prix_moyen: float
+
+
+class ChambreAdaptee(NamedTuple):
+    num_ho: int
+    nom_ho: str
+    ville_ho: str
+    nb_etoiles_ho: int
+    nom_ty: str
+    prix_ty: float
+    capacite: int
+
+
+def config():
+    actions_db = getattr(settings, "ACTIONS_DB", {})
+    return {
+        "POOL_SIZE": actions_db.get("POOL_SIZE", POOL_SIZE),
+    }
+
+
+class DepotSqlite:
+    """Connexions aiosqlite en lecture seule, chacune servie par son propre thread."""
+
+    def __init__(self, chemin, taille):
+        self.chemin = str(chemin)
+        self._places = asyncio.Semaphore(taille)
+        self._libres = []
+
+    @asynccontextmanager
+    async def connexion(self):
+        import aiosqlite
+
+        async with self._places:
+            cnx = self._libres.pop() if self._libres else await aiosqlite.connect(
+                f"file:{self.chemin}?mode=ro", uri=True)
+            try:
+                yield cnx
+            finally:
+                self._libres.append(cnx)
+
+    async def lignes(self, sql, params):
+        async with self.connexion() as cnx:
+            async with cnx.execute(sql, params) as curseur:
+                return await curseur.fetchall()
+
+    def instant(self, valeur):
+        # Même format que le backend sqlite3 de Django : UTC naïf, « AAAA-MM-JJ HH:MM:SS »
+        return str(valeur.astimezone(dt_timezone.utc).replace(tzinfo=None))
+
+    async def fermer(self):
+        libres, self._libres = self._libres, []
+        for cnx in libres:
+            await cnx.close()
+
+
+class DepotPostgres:
+    """Pool asyncpg (les paramètres « ? » deviennent $1, $2…)."""
+
+    def __init__(self, reglages, taille):
+        self.reglages = reglages
+        self.taille = taille
+        self._pool = None
+        self._creation = asyncio.Lock()
+
+    async def pool(self):
+        async with self._creation:
+            if self._pool is None:
+                import asyncpg
+
+                self._pool = await asyncpg.create_pool(
+                    host=self.reglages["HOST"] or None, port=self.reglages["PORT"] or None,
+                    user=self.reglages["USER"] or None, password=self.reglages["PASSWORD"] or None,
+                    database=self.reglages["NAME"], min_size=1, max_size=self.taille,
+                )
+        return self._pool
+
+    async def lignes(self, sql, params):
+        numeros = iter(range(1, len(params) + 1))
+        sql = re.sub(r"\?", lambda _: f"${next(numeros)}", sql)
+        return await (await self.pool()).fetch(sql, *params)
+
+    def instant(self, valeur):
+        return valeur
+
+    async def fermer(self):
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+
+def get_depot():
+    """Dépôt de la boucle courante, créé au premier appel."""
+    loop = asyncio.get_running_loop()
+    depot = _depots.get(loop)
+    if depot is None:
+        reglages = connections["default"].settings_dict
+        taille = config()["POOL_SIZE"]
+        if reglages["ENGINE"] == "django.db.backends.sqlite3":
+            depot = DepotSqlite(reglages["NAME"], taille)
+        elif reglages["ENGINE"] == "django.db.backends.postgresql":
+            depot = DepotPostgres(reglages, taille)
+        else:
+            raise ImproperlyConfigured(f"Pas de pilote asynchrone pour {reglages['ENGINE']}")
+        _depots[loop] = depot
+    return depot
+
+
+async def fermer():
+    depot = _depots.pop(asyncio.get_running_loop(), None)
+    if depot is not None:
+        await depot.fermer()
+
+
+# --- Recherches ---
+# Les actions cherchent par ville, prix et capacité dans le catalogue en
+# mémoire (actions/catalogue.py) et ne lisent ici que les chambres libres
+# (hotels_libres). par_ville, par_prix et par_capacite donnent les mêmes
+# résultats en SQL : ils servent de référence au catalogue.
+
+PRIX_MOYEN = "CAST(SUM(r.nb_chambres * r.prix_ty) AS DOUBLE PRECISION) / SUM(r.nb_chambres)"
+
+HOTELS_PRIX = f"""
+    SELECT h.num_ho, h.nom_ho, h.ville_ho, h.nb_etoiles_ho, {PRIX_MOYEN} AS prix_moyen
+    FROM "Hotel" h JOIN "HotelTypeChambre" r ON r.num_ho_id = h.num_ho
+"""
+
+# Au moins une chambre sans occupation qui chevauche [date_a, date_d)
+CHAMBRE_LIBRE = """
+    EXISTS (SELECT 1 FROM "Chambre" c WHERE c.num_ho_id = h.num_ho AND NOT EXISTS (
+        SELECT 1 FROM "Occupation" o WHERE o.num_ch_id = c.id AND o.date_a < ? AND o.date_d > ?))
+"""
+
+GROUPE = " GROUP BY h.num_ho, h.nom_ho, h.ville_ho, h.nb_etoiles_ho"
+
+# Hôtels par requête de hotels_libres : SQLite avant 3.32 refuse plus de 999 paramètres
+TAILLE_LOT = 500
+
+
+async def par_ville(ville: str, jour: date, prix_max: float | None = None) -> list[HotelTrouve]:
+    """Hôtels de la ville avec une chambre libre la nuit du jour donné, prix moyen ≤ prix_max."""
+    depot = get_depot()
+    date_a, date_d = fenetre_sejour(jour, 1)
+    sql = HOTELS_PRIX + " WHERE lower(h.ville_ho) = lower(?) AND " + CHAMBRE_LIBRE + GROUPE
+    params = [ville, depot.instant(date_d), depot.instant(date_a)]
+    if prix_max is not None:
+        sql += f" HAVING {PRIX_MOYEN} <= ?"
+        params.append(float(prix_max))
+    lignes = await depot.lignes(sql + " ORDER BY h.num_ho", params)
+    return [HotelTrouve(*ligne) for ligne in lignes]
+
+
+async def hotels_libres(num_hos: list[int], jour: date) -> set[int]:
+    """Parmi les hôtels donnés, ceux qui ont une chambre libre la nuit du jour donné."""
+    if not num_hos:
+        return set()
+    depot = get_depot()
+    date_a, date_d = fenetre_sejour(jour, 1)
+    dates = [depot.instant(date_d), depot.instant(date_a)]
+
+    async def lot(numeros):
+        sql = f'SELECT h.num_ho FROM "Hotel" h WHERE h.num_ho IN ({", ".join("?" * len(numeros))}) AND ' + CHAMBRE_LIBRE
+        return await depot.lignes(sql, [*numeros, *dates])
+
+    # Les lots partent en parallèle sur le pool de connexions
+    lots = await asyncio.gather(*(lot(num_hos[i:i + TAILLE_LOT]) for i in range(0, len(num_hos), TAILLE_LOT)))
+    return {ligne[0] for lignes in lots for ligne in lignes}
+
+
+async def par_prix(prix_max: float) -> list[HotelTrouve]:
+    """Tous les hôtels de prix moyen ≤ prix_max, du moins cher au plus cher."""
+    sql = HOTELS_PRIX + GROUPE + f" HAVING {PRIX_MOYEN} <= ? ORDER BY prix_moyen, h.num_ho"
+    lignes = await get_depot().lignes(sql, [float(prix_max)])
+    return [HotelTrouve(*ligne) for ligne in lignes]
+
+
+async def par_capacite(personnes: int, ville: str | None = None) -> list[ChambreAdaptee]:
+    """Pour chaque hôtel, le type de chambre le moins cher qui loge `personnes` (voir CAPACITES)."""
+    types = [nom for nom, capacite in CAPACITES.items() if capacite >= personnes]
+    if not types:
+        return []
+    sql = f"""
+        SELECT h.num_ho, h.nom_ho, h.ville_ho, h.nb_etoiles_ho, t.nom_ty, CAST(r.prix_ty AS DOUBLE PRECISION)
+        FROM "Hotel" h
+        JOIN "HotelTypeChambre" r ON r.num_ho_id = h.num_ho
+        JOIN "TypeChambre" t ON t.num_ty = r.num_ty_id
+        WHERE lower(t.nom_ty) IN ({", ".join("?" * len(types))})
+    """
+    params = list(types)
+    if ville:
+        sql += " AND lower(h.ville_ho) = lower(?)"
+        params.append(ville)
+    lignes = await get_depot().lignes(sql + " ORDER BY h.num_ho, r.prix_ty", params)
+    resultats = {}
+    for ligne in lignes:
+        if ligne[0] not in resultats:
+            resultats[ligne[0]] = ChambreAdaptee(*ligne, CAPACITES[ligne[4].lower()])
+    return list(resultats.values())
@@ -0,0 +1,48 @@
+"""
+Mots-clés repérés dans les messages par les actions (capacité, budget, nombres).
+
+Un seul automate (App/keyword_matcher.py) pour tout le vocabulaire,
+construit à l'import et partagé par toutes les actions : chaque message est
+parcouru une fois, sans accents ni casse, en mots entiers. Les villes, elles,
+viennent du catalogue (Catalogue.ville_citee).
+"""
+from App.keyword_matcher import KeywordMatcher
+
+CAPACITE = "capacite"
+BUDGET = "budget"
+NOMBRE = "nombre"
+
+# Demandes de capacité. En mots entiers, pluriels et féminins sont à écrire
+# (« seule » ne contient plus « seul »).
+MOTS_CAPACITE = [
+    'personne', 'personnes', 'adulte', 'adultes', 'voyageur', 'voyageurs', 'voyageuse', 'voyageuses',
+    'seul', 'seule', 'seuls', 'seules', 'couple', 'couples', 'groupe', 'groupes', 'famille', 'familles',
+    'familial', 'familiale', 'familiaux', 'familiales',
+    'simple', 'simples', 'double', 'doubles', 'triple', 'triples', 'suite', 'suites',
+]
+
+# « Pas cher » sans montant : budget par défaut
+MOTS_PAS_CHERS = [
+    'pas cher', 'pas chers', 'pas chère', 'pas chères', 'économique', 'économiques',
+    'bon marché', 'low cost', 'petit prix', 'petits prix', 'bas prix',
+]
+
+NOMBRES = {
+    '1': 1, '2': 2, '3': 3, '4': 4, '5': 5,
+    'un': 1, 'une': 1, 'deux': 2, 'trois': 3, 'quatre': 4, 'cinq': 5,
+}
+
+MOTS_CLES = KeywordMatcher(
+    [(mot, (CAPACITE, mot)) for mot in MOTS_CAPACITE]
+    + [(mot, (BUDGET, mot)) for mot in MOTS_PAS_CHERS]
+    + [(mot, (NOMBRE, nombre)) for mot, nombre in NOMBRES.items()]
+)
+
+
+def analyser(texte):
+    """{catégorie: [valeurs, dans l'ordre du texte]} en un seul passage sur le message."""
+    trouves = {}
+    for correspondance in MOTS_CLES.trouver(texte):
+        categorie, valeur = correspondance.valeur
+        trouves.setdefault(categorie, []).append(valeur)
+    return trouves
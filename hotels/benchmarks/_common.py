@@ -0,0 +1,129 @@
+"""
+Outils partagés par les scripts de benchmark.
+
+Chaque benchmark travaille sur une base de test jetable (créée par Django à
+partir des migrations) pour ne jamais toucher db.sqlite3.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import django
+
+# Ajouter le projet Django au PYTHONPATH
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "projet.settings")
+django.setup()
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import override_settings
+
+START_DATE = datetime(2025, 1, 1, 14, 0, tzinfo=timezone.utc)
+
+
+@contextmanager
+def base_de_test():
+    """Crée la base de test (migrations comprises) et la détruit à la sortie.
+
+    La base est un fichier temporaire : une base SQLite en mémoire survivrait
+    d'un appel à l'autre tant que la connexion reste ouverte.
+    """
+    with tempfile.TemporaryDirectory() as dossier:
+        connection.settings_dict["TEST"]["NAME"] = os.path.join(dossier, "bench.sqlite3")
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            yield connection
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+@contextmanager
+def statiques_collectes():
+    """Comme en production : DEBUG coupé, STORAGES de settings_prod.py, collectstatic dans un dossier temporaire."""
+    stockages = {**settings.STORAGES, "staticfiles": {"BACKEND": "App.storage.CompressedManifestStorage"}}
+    with tempfile.TemporaryDirectory() as racine, \
+            override_settings(STATIC_ROOT=racine, STORAGES=stockages, DEBUG=False, ALLOWED_HOSTS=["testserver"]):
+        call_command("collectstatic", "--noinput", verbosity=0)
+        yield racine
+
+
+@contextmanager
+def chrono(resultats, cle):
+    debut = time.perf_counter()
+    yield
+    resultats[cle] = time.perf_counter() - debut
+
+
+def percentile(valeurs, p):
+    valeurs = sorted(valeurs)
+    if not valeurs:
+        return 0.0
+    k = min(len(valeurs) - 1, int(round(p / 100 * (len(valeurs) - 1))))
+    return valeurs[k]
+
+
+def peupler_catalogue(nb_hotels, chambres_par_type, villes=("Paris", "Lyon", "Nice", "Marseille")):
+    """Hôtels, types et chambres ; renvoie la liste des (chambre_pk, hotel_pk, type_pk)."""
+    from App.models import Chambre, Client, Hotel, TypeChambre
+
+    types = TypeChambre.objects.bulk_create([
+        TypeChambre(num_ty=1, nom_ty="Simple", prix_ty=80),
+        TypeChambre(num_ty=2, nom_ty="Double", prix_ty=120),
+        TypeChambre(num_ty=3, nom_ty="Suite", prix_ty=200),
+    ])
+    Hotel.objects.bulk_create([
+        Hotel(num_ho=h, nom_ho=f"Hotel {h}", rue_adr_ho=f"{h} rue Exemple",
+              ville_ho=villes[h % len(villes)], nb_etoiles_ho=1 + h % 5)
+        for h in range(1, nb_hotels + 1)
+    ])
+    Client.objects.bulk_create([
+        Client(num_cl=c, nom_cl=f"Nom{c}", prenom_cl=f"Prenom{c}",
+               rue_adr_cl=f"{c} rue Exemple", ville_cl="Paris")
+        for c in range(1, 101)
+    ])
+    Chambre.objects.bulk_create([
+        Chambre(num_ch=101 + i, num_ho_id=h, num_ty_id=types[i // chambres_par_type].num_ty)
+        for h in range(1, nb_hotels + 1)
+        for i in range(len(types) * chambres_par_type)
+    ], batch_size=5000)
+    return list(Chambre.objects.order_by("pk").values_list("pk", "num_ho_id", "num_ty_id"))
+
+
+def occupations_synthetiques(chambres, nb_occupations, seed=0, ecart_min=0):
+    """Génère des occupations sans chevauchement : (client, hotel, chambre, date_a, date_d).
+
+    Avec ecart_min=0 un départ et l'arrivée suivante peuvent tomber le même jour.
+    """
+    rng = random.Random(seed)
+    fin = {pk: START_DATE for pk, _, _ in chambres}
+    for _ in range(nb_occupations):
+        pk, hotel, _ = chambres[rng.randrange(len(chambres))]
+        date_a = fin[pk] + timedelta(days=rng.randint(ecart_min, 3))
+        date_d = date_a + timedelta(days=rng.randint(1, 7))
+        fin[pk] = date_d
+        yield rng.randint(1, 100), hotel, pk, date_a, date_d
+
+
+def charger_occupations(chambres, nb_occupations, seed=0, batch_size=10000):
+    """Remplit Occupation sans passer par le trigger C2 (les données sont déjà cohérentes)."""
+    from App.models import Occupation
+
+    with connection.cursor() as cursor:
+        cursor.execute("DROP TRIGGER IF EXISTS check_occupation_overlap")
+    lot = []
+    for client, hotel, chambre, date_a, date_d in occupations_synthetiques(chambres, nb_occupations, seed):
+        lot.append(Occupation(num_cl_id=client, num_ho_id=hotel, num_ch_id=chambre,
+                              date_a=date_a, date_d=date_d))
+        if len(lot) >= batch_size:
+            Occupation.objects.bulk_create(lot)
+            lot = []
+    if lot:
+        Occupation.objects.bulk_create(lot)
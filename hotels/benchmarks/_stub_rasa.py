@@ -0,0 +1,120 @@
+"""
+Faux serveur Rasa pour les benchmarks : répond au webhook REST après un délai fixe.
+
+Avec ?stream=true, le premier message est envoyé tout de suite et le second
+après le délai, comme une annonce suivie du résultat d'une requête.
+
+    python benchmarks/_stub_rasa.py [--port 5099] [--delai 0.05] [--lents 0.0] [--capacite 0]
+
+Avec --lents, cette fraction des réponses prend LENTEUR fois le délai
+(ramasse-miettes, requête SQL lente…), ce qui fait la queue de latence.
+Avec --capacite, au plus ce nombre de messages sont traités à la fois,
+comme un Rasa limité par son CPU ; les autres attendent leur tour.
+
+Chaque conversation a un tracker minimal (événements du tour, slot ville
+rempli quand le message cite une ville), lisible et complétable comme avec
+l'API HTTP de Rasa : GET /conversations/<sender>/tracker et
+POST /conversations/<sender>/tracker/events.
+
+GET /stats renvoie le nombre de requêtes reçues, de connexions TCP
+distinctes (réutilisation des connexions), de senders distincts et
+d'événements ajoutés par l'API.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import random
+
+from aiohttp import web
+
+LENTEUR = 20
+VILLES = ("paris", "lyon", "nice", "marseille")
+
+
+def application(delai, lents=0.0, capacite=0):
+    stats = {"requetes": 0, "connexions": set(), "senders": set(), "ajouts": 0}
+    trackers = {}
+    travail = asyncio.Semaphore(capacite) if capacite else contextlib.nullcontext()
+
+    def tracker(sender):
+        return trackers.setdefault(sender, {"sender_id": sender, "slots": {"ville": None}, "events": []})
+
+    def appliquer(etat, evenements):
+        for evenement in evenements:
+            if evenement["event"] == "slot":
+                etat["slots"][evenement["name"]] = evenement["value"]
+        etat["events"].extend(evenements)
+
+    async def webhook(request):
+        stats["requetes"] += 1
+        stats["connexions"].add(request.transport.get_extra_info("peername"))
+        corps = await request.json()
+        stats["senders"].add(corps["sender"])
+        annonce = {"recipient_id": corps["sender"], "text": "Je vous montre les hôtels disponibles…"}
+        liste = {"recipient_id": corps["sender"], "text": f"Vous avez dit : {corps['message']}"}
+        ville = next((v.capitalize() for v in VILLES if v in corps["message"].lower()), None)
+        appliquer(tracker(corps["sender"]), [
+            {"event": "user", "text": corps["message"], "parse_data": {"intent": {"name": "rechercher_hotel"}}},
+            {"event": "action", "name": "action_rechercher_hotel"},
+            *([{"event": "slot", "name": "ville", "value": ville}] if ville else []),
+            {"event": "bot", "text": annonce["text"]},
+            {"event": "bot", "text": liste["text"]},
+            {"event": "action", "name": "action_listen"},
+        ])
+        attente = delai * LENTEUR if random.random() < lents else delai
+        if request.query.get("stream") != "true":
+            async with travail:
+                await asyncio.sleep(attente)
+            return web.json_response([annonce, liste])
+
+        # Comme le canal REST de Rasa avec ?stream=true : un message JSON par ligne,
+        # l'annonce tout de suite, la liste après la « requête »
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        await response.write(json.dumps(annonce).encode() + b"\n")
+        await asyncio.sleep(attente)
+        await response.write(json.dumps(liste).encode() + b"\n")
+        await response.write_eof()
+        return response
+
+    async def voir_tracker(request):
+        return web.json_response(tracker(request.match_info["sender"]))
+
+    async def ajouter_evenements(request):
+        evenements = await request.json()
+        evenements = evenements if isinstance(evenements, list) else [evenements]
+        stats["ajouts"] += len(evenements)
+        appliquer(tracker(request.match_info["sender"]), evenements)
+        return web.json_response(tracker(request.match_info["sender"]))
+
+    async def voir_stats(request):
+        return web.json_response({"requetes": stats["requetes"], "connexions": len(stats["connexions"]),
+                                  "senders": len(stats["senders"]), "ajouts": stats["ajouts"]})
+
+    async def remettre_a_zero(request):
+        stats["requetes"] = stats["ajouts"] = 0
+        stats["connexions"].clear()
+        stats["senders"].clear()
+        trackers.clear()
+        return web.json_response({})
+
+    app = web.Application()
+    app.add_routes([
+        web.post("/webhooks/rest/webhook", webhook),
+        web.get("/conversations/{sender}/tracker", voir_tracker),
+        web.post("/conversations/{sender}/tracker/events", ajouter_evenements),
+        web.get("/stats", voir_stats),
+        web.post("/stats/reset", remettre_a_zero),
+    ])
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=5099)
+    parser.add_argument("--delai", type=float, default=0.05, help="durée simulée NLU + actions (s)")
+    parser.add_argument("--lents", type=float, default=0.0, help="fraction des réponses LENTEUR fois plus lentes")
+    parser.add_argument("--capacite", type=int, default=0, help="messages traités à la fois (0 : sans limite)")
+    args = parser.parse_args()
+    web.run_app(application(args.delai, args.lents, args.capacite), host="127.0.0.1", port=args.port, print=None, backlog=1024)
@@ -0,0 +1,98 @@
+"""
+Requêtes des actions Rasa : ORM via sync_to_async contre le dépôt asynchrone.
+
+    python benchmarks/bench_actions_depot.py [nb_recherches] [--hotels 400] [--occupations 100000] [--concurrence 64]
+
+--concurrence recherches sont en vol dans une même boucle, comme dans le
+serveur d'actions quand plusieurs conversations arrivent ensemble. Une
+recherche sur deux est par ville (avec chambre libre ce soir), l'autre par
+prix. L'ancienne version des actions (ORM dans sync_to_async) passe par le
+seul thread de l'exécuteur d'asgiref ; le dépôt (actions/depot.py) ouvre
+jusqu'à POOL_SIZE connexions aiosqlite.
+"""
+import argparse
+import asyncio
+import time
+from datetime import timedelta
+
+from _common import START_DATE, base_de_test, charger_occupations, peupler_catalogue, percentile
+
+from asgiref.sync import sync_to_async
+from django.test.utils import override_settings
+
+from actions import depot
+from App.models import Hotel
+from App.services import annoter_prix_moyen, chambres_libres_par_hotel, fenetre_sejour
+
+VILLES = ("Paris", "Lyon", "Nice", "Marseille")
+PRIX = (90, 110, 130, 150)
+
+
+def orm_par_ville(ville, jour, prix_max):
+    date_a, date_d = fenetre_sejour(jour, 1)
+    hotels_libres = {r["num_ho"] for r in chambres_libres_par_hotel(ville, date_a, date_d)}
+    qs = annoter_prix_moyen(Hotel.objects.filter(ville_ho__iexact=ville, num_ho__in=hotels_libres))
+    if prix_max:
+        qs = qs.filter(prix_moyen__lte=prix_max)
+    return [h.num_ho for h in qs.order_by("num_ho")]
+
+
+def orm_par_prix(prix_max):
+    qs = annoter_prix_moyen(Hotel.objects.all()).filter(prix_moyen__lte=prix_max).order_by("prix_moyen", "num_ho")
+    return [h.num_ho for h in qs]
+
+
+async def recherche(i, jour, mode):
+    ville, prix = VILLES[i % len(VILLES)], PRIX[i % len(PRIX)]
+    if mode == "orm":
+        if i % 2:
+            return await sync_to_async(orm_par_prix)(prix)
+        return await sync_to_async(orm_par_ville)(ville, jour, prix)
+    if i % 2:
+        return [h.num_ho for h in await depot.par_prix(prix)]
+    return [h.num_ho for h in await depot.par_ville(ville, jour, prix)]
+
+
+async def charge(nb_recherches, concurrence, jour, mode):
+    limite = asyncio.Semaphore(concurrence)
+    latences = []
+
+    async def une(i):
+        async with limite:
+            debut = time.perf_counter()
+            resultat = await recherche(i, jour, mode)
+            latences.append(time.perf_counter() - debut)
+            return resultat
+
+    debut = time.perf_counter()
+    resultats = await asyncio.gather(*(une(i) for i in range(nb_recherches)))
+    total = time.perf_counter() - debut
+    await depot.fermer()
+    return resultats, latences, total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("nb_recherches", type=int, nargs="?", default=2000)
+    parser.add_argument("--hotels", type=int, default=400)
+    parser.add_argument("--occupations", type=int, default=100000)
+    parser.add_argument("--concurrence", type=int, default=64)
+    args = parser.parse_args()
+
+    with base_de_test():
+        chambres = peupler_catalogue(args.hotels, 10)
+        charger_occupations(chambres, args.occupations)
+        # En pleine période d'occupations : une partie des hôtels est complète
+        jour = (START_DATE + timedelta(days=10)).date()
+
+        reference = None
+        for mode, pool in (("orm", None), ("depot", 1), ("depot", 4), ("depot", 8)):
+            with override_settings(ACTIONS_DB={"POOL_SIZE": pool}):
+                resultats, latences, total = asyncio.run(charge(args.nb_recherches, args.concurrence, jour, mode))
+            if reference is None:
+                reference = resultats
+            nom = "sync_to_async" if mode == "orm" else f"dépôt, pool {pool}"
+            print(f"{nom:>14} | {args.nb_recherches / total:6.0f} recherches/s | "
+                  f"p50 {percentile(latences, 50) * 1000:7.1f} ms | p99 {percentile(latences, 99) * 1000:7.1f} ms | "
+                  f"{sum(map(len, resultats)) / len(resultats):5.1f} hôtels par recherche, "
+                  f"résultats {'identiques' if resultats == reference else 'DIFFÉRENTS'}")
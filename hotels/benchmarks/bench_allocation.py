@@ -0,0 +1,66 @@
+"""
+Taux d'allocation et débit de l'allocateur sur une année de réservations.
+
+    python benchmarks/bench_allocation.py [nb_reservations]
+
+Compare le best fit au tirage aléatoire de fixtures/main.py (first fit sur
+des chambres mélangées), sur les mêmes réservations synthétiques.
+"""
+import random
+import sys
+import time
+from datetime import timedelta
+
+from _common import START_DATE
+
+from App.allocation import BEST_FIT, FIRST_FIT, RoomAllocator
+from App.models import Reservation
+
+NB_HOTELS = 20
+CHAMBRES_PAR_TYPE = 10
+NB_TYPES = 3
+
+
+def catalogue():
+    pk = 0
+    chambres = []
+    for hotel in range(1, NB_HOTELS + 1):
+        for type_id in range(1, NB_TYPES + 1):
+            for _ in range(CHAMBRES_PAR_TYPE):
+                pk += 1
+                chambres.append((pk, hotel, type_id))
+    return chambres
+
+
+def reservations_annee(nb, seed=0):
+    rng = random.Random(seed)
+    for _ in range(nb):
+        yield Reservation(
+            num_cl_id=rng.randint(1, 1000),
+            num_ho_id=rng.randint(1, NB_HOTELS),
+            num_ty_id=rng.randint(1, NB_TYPES),
+            date_a=START_DATE + timedelta(days=rng.randint(0, 364)),
+            nb_jours=rng.choice((1, 1, 2, 2, 3, 4, 5, 7, 7, 10, 14)),
+            nb_chambres=rng.choice((1, 1, 1, 1, 2, 3)),
+        )
+
+
+def bench(nb_reservations):
+    reservations = list(reservations_annee(nb_reservations))
+    demande = sum(r.nb_jours * r.nb_chambres for r in reservations)
+    capacite = NB_HOTELS * NB_TYPES * CHAMBRES_PAR_TYPE * 365
+    print(f"{nb_reservations} réservations, demande = {demande / capacite:.0%} de la capacité annuelle")
+    for plus_longs_dabord, ordre in ((False, "ordre d'arrivée"), (True, "plus longs d'abord")):
+        print(f" {ordre}")
+        for strategie in (FIRST_FIT, BEST_FIT):
+            allocateur = RoomAllocator(catalogue(), strategie=strategie, seed=0)
+            debut = time.perf_counter()
+            affectations, _ = allocateur.allouer_lot(reservations, plus_longs_dabord)
+            duree = time.perf_counter() - debut
+            nuits = sum(a.reservation.nb_jours * a.reservation.nb_chambres for a in affectations)
+            print(f"  {strategie:>9} : {len(affectations) / nb_reservations:6.1%} des réservations placées, "
+                  f"{nuits / capacite:6.1%} d'occupation, {nb_reservations / duree:8.0f} réservations/s")
+
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 30_000)
@@ -0,0 +1,79 @@
+"""
+Compare l'index de disponibilité en mémoire avec une requête ORM.
+
+    python benchmarks/bench_availability_index.py [10000 100000 1000000]
+
+Pour chaque taille : ~100 occupations par chambre, puis des requêtes
+« chambre libre ? » et « prochain créneau libre » tirées au hasard.
+"""
+import random
+import sys
+from datetime import timedelta
+
+from _common import START_DATE, base_de_test, charger_occupations, chrono, peupler_catalogue
+
+from App.availability import AvailabilityIndex
+from App.models import Occupation
+
+NB_REQUETES = 2000
+CHAMBRES_PAR_TYPE = 20
+
+
+def requetes(chambres, seed=1):
+    rng = random.Random(seed)
+    for _ in range(NB_REQUETES):
+        pk = chambres[rng.randrange(len(chambres))][0]
+        date_a = START_DATE + timedelta(days=rng.randint(0, 700))
+        yield pk, date_a, date_a + timedelta(days=rng.randint(1, 7))
+
+
+def orm_is_free(chambre_id, date_a, date_d):
+    return not Occupation.objects.filter(num_ch_id=chambre_id, date_a__lt=date_d, date_d__gt=date_a).exists()
+
+
+def orm_next_free(chambre_id, date_a, duree):
+    debut = date_a
+    occupations = (Occupation.objects.filter(num_ch_id=chambre_id, date_d__gt=date_a)
+                   .order_by("date_a").values_list("date_a", "date_d"))
+    for occ_a, occ_d in occupations.iterator():
+        if occ_a >= debut + duree:
+            break
+        debut = max(debut, occ_d)
+    return debut
+
+
+def bench(nb_occupations):
+    resultats = {}
+    nb_hotels = max(1, nb_occupations // (100 * 3 * CHAMBRES_PAR_TYPE))
+    with base_de_test():
+        chambres = peupler_catalogue(nb_hotels, CHAMBRES_PAR_TYPE)
+        charger_occupations(chambres, nb_occupations)
+        qs = list(requetes(chambres))
+
+        with chrono(resultats, "construction"):
+            index = AvailabilityIndex.from_queryset(Occupation.objects.all())
+
+        with chrono(resultats, "orm_libre"):
+            attendu = [orm_is_free(*q) for q in qs]
+        with chrono(resultats, "index_libre"):
+            obtenu = [index.is_free(*q) for q in qs]
+        assert attendu == obtenu, "l'index et l'ORM divergent"
+
+        with chrono(resultats, "orm_suivant"):
+            attendu = [orm_next_free(pk, a, d - a) for pk, a, d in qs]
+        with chrono(resultats, "index_suivant"):
+            obtenu = [index.next_free(pk, a, d - a) for pk, a, d in qs]
+        assert attendu == obtenu, "l'index et l'ORM divergent"
+
+    def par_requete(cle):
+        return resultats[cle] / NB_REQUETES * 1e6
+
+    print(f"{nb_occupations:>9} occupations | construction {resultats['construction']:.2f}s | "
+          f"libre ? ORM {par_requete('orm_libre'):8.1f}µs / index {par_requete('index_libre'):6.2f}µs | "
+          f"suivant ORM {par_requete('orm_suivant'):8.1f}µs / index {par_requete('index_suivant'):6.2f}µs")
+
+
+if __name__ == "__main__":
+    tailles = [int(n) for n in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    for taille in tailles:
+        bench(taille)
@@ -0,0 +1,72 @@
+"""
+Matrice d'occupation NumPy contre une boucle ORM par chambre.
+
+    python benchmarks/bench_bitmap.py [nb_chambres_par_type nb_occupations]
+
+Un seul hôtel (par défaut 3 x 167 chambres, deux ans d'occupations) ;
+affiche le temps de « chambres libres du type T » et l'empreinte mémoire.
+"""
+import random
+import sys
+from datetime import timedelta
+
+from _common import START_DATE, base_de_test, charger_occupations, chrono, peupler_catalogue
+
+from App.availability import AvailabilityIndex
+from App.bitmap import BitmapStore
+from App.models import Chambre, Occupation
+
+NB_REQUETES = 500
+
+
+def orm_chambres_libres(hotel_id, type_id, date_a, nb_jours):
+    date_d = date_a + timedelta(days=nb_jours)
+    libres = []
+    for chambre in Chambre.objects.filter(num_ho_id=hotel_id, num_ty_id=type_id):
+        if not Occupation.objects.filter(num_ch=chambre, date_a__lt=date_d, date_d__gt=date_a).exists():
+            libres.append(chambre.pk)
+    return libres
+
+
+def bench(chambres_par_type, nb_occupations):
+    resultats = {}
+    rng = random.Random(2)
+    with base_de_test():
+        chambres = peupler_catalogue(1, chambres_par_type)
+        charger_occupations(chambres, nb_occupations)
+        requetes = [(1, rng.randint(1, 3), START_DATE + timedelta(days=rng.randint(0, 700)), rng.randint(1, 7))
+                    for _ in range(NB_REQUETES)]
+
+        # Le benchmark interroge des dates passées : on charge tout l'historique
+        store = BitmapStore(depuis=START_DATE)
+        with chrono(resultats, "chargement"):
+            store.hotel(1)
+
+        with chrono(resultats, "orm"):
+            attendu = [sorted(orm_chambres_libres(*r)) for r in requetes[:50]]
+        with chrono(resultats, "bitmap"):
+            obtenu = [store.chambres_libres(*r) for r in requetes]
+
+        index = AvailabilityIndex.from_queryset(Occupation.objects.all())
+        for (hotel, type_id, date_a, nb_jours), libres in zip(requetes, obtenu):
+            date_d = date_a + timedelta(days=nb_jours)
+            verif = sorted(pk for pk, _, ty in chambres if ty == type_id and index.is_free(pk, date_a, date_d))
+            assert verif == sorted(libres.tolist()), "la matrice et l'index divergent"
+        assert attendu == [sorted(l.tolist()) for l in obtenu[:50]], "la matrice et l'ORM divergent"
+
+        rapport = store.rapport_memoire()
+
+    print(f"{len(chambres)} chambres, {nb_occupations} occupations")
+    print(f"  chargement matrice   : {resultats['chargement'] * 1000:.1f} ms")
+    print(f"  boucle ORM           : {resultats['orm'] / 50 * 1000:.2f} ms / requête")
+    print(f"  matrice              : {resultats['bitmap'] / NB_REQUETES * 1e6:.1f} µs / requête")
+    for hotel in rapport["hotels"]:
+        print(f"  mémoire hôtel {hotel['hotel']} : {hotel['chambres']} chambres x {hotel['jours']} jours "
+              f"= {hotel['octets_matrice'] / 1024:.1f} Ko (+ {hotel['octets_index'] / 1024:.1f} Ko d'index)")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    chambres_par_type = args[0] if args else 167
+    nb_occupations = args[1] if len(args) > 1 else 40_000
+    bench(chambres_par_type, nb_occupations)
@@ -0,0 +1,111 @@
+"""
+Recherches des actions : requêtes SQL du dépôt contre le catalogue en mémoire.
+
+    python benchmarks/bench_catalogue.py [nb_recherches] [--hotels 2000]
+
+Pour chaque recherche des actions (ville et budget, prix, capacité), on
+compare le temps moyen d'un appel à depot (jointure + agrégat en base) et
+au Catalogue (actions/catalogue.py), et on vérifie que les résultats sont
+les mêmes. La recherche par ville garde une requête, celle des chambres
+libres ce soir (depot.hotels_libres, par lots de depot.TAILLE_LOT hôtels).
+On mesure ensuite la construction d'un instantané, puis le rechargement : un
+hôtel ajouté par l'ORM fait monter la version 'catalogue' et apparaît au
+premier appel après VERSION_TTL.
+"""
+import argparse
+import asyncio
+import time
+from datetime import date
+
+from _common import base_de_test, peupler_catalogue
+
+from django.db import connection
+from django.test.utils import override_settings
+
+from actions import catalogue, depot
+from App.models import Chambre, Hotel
+
+VILLES = ("Paris", "Lyon", "Nice", "Marseille")
+JOUR = date(2025, 1, 1)
+
+
+def varier_prix():
+    """Retire à chaque hôtel une partie de ses chambres simples et de ses suites : prix moyens tous différents."""
+    with connection.cursor() as cursor:
+        cursor.execute('DELETE FROM "Chambre" WHERE num_ty_id = 3 AND num_ch - 121 < num_ho_id % 10')
+        cursor.execute('DELETE FROM "Chambre" WHERE num_ty_id = 1 AND num_ch - 101 < num_ho_id * 3 % 10')
+
+
+async def par_ville(cat, ville, prix_max):
+    fiches = cat.ville(ville, prix_max)
+    libres = await depot.hotels_libres([f.num_ho for f in fiches], JOUR)
+    return [f for f in fiches if f.num_ho in libres]
+
+
+async def mesurer(nb, appel):
+    debut = time.perf_counter()
+    for i in range(nb):
+        resultat = appel(i)
+        if asyncio.iscoroutine(resultat):
+            await resultat
+    return (time.perf_counter() - debut) / nb
+
+
+async def resultat(appel, i):
+    valeur = appel(i)
+    if asyncio.iscoroutine(valeur):
+        valeur = await valeur
+    return [(x.num_ho, getattr(x, "nom_ty", None)) for x in valeur]
+
+
+async def principal(nb):
+    cat = await catalogue.catalogue()
+    comparaisons = {
+        "ville + budget": (lambda i: depot.par_ville(VILLES[i % 4], JOUR, 120 + i % 5 * 10),
+                           lambda i: par_ville(cat, VILLES[i % 4], 120 + i % 5 * 10)),
+        "par prix": (lambda i: depot.par_prix(120 + i % 5 * 10),
+                     lambda i: cat.jusqu_a(120 + i % 5 * 10)),
+        "par capacité": (lambda i: depot.par_capacite(1 + i % 4, VILLES[i % 4]),
+                         lambda i: cat.pour(1 + i % 4, VILLES[i % 4])),
+    }
+    for nom, (sql, memoire) in comparaisons.items():
+        duree_sql = await mesurer(nb, sql)
+        duree_memoire = await mesurer(nb, memoire)
+        identiques = all([await resultat(sql, i) == await resultat(memoire, i) for i in range(20)])
+        nb_resultats = sum([len(await resultat(memoire, i)) for i in range(20)]) / 20
+        print(f"{nom:>14} | SQL {duree_sql * 1e6:8.0f} µs | catalogue {duree_memoire * 1e6:8.1f} µs | "
+              f"{nb_resultats:6.1f} résultats | {'identiques' if identiques else 'DIFFÉRENTS'}")
+
+    debut = time.perf_counter()
+    await catalogue.charger(cat.version)
+    print(f"{'instantané':>14} | {len(cat)} hôtels | construit en {(time.perf_counter() - debut) * 1000:.1f} ms")
+    await depot.fermer()
+
+
+async def rechargement():
+    avant = await catalogue.catalogue()
+    await asyncio.to_thread(ajouter_hotel)
+    pendant = await catalogue.catalogue()
+    await asyncio.sleep(catalogue.config()["VERSION_TTL"])
+    apres = await catalogue.catalogue()
+    print(f"{'rechargement':>14} | version {avant.version} -> {apres.version} | hôtels : "
+          f"{len(avant)}, {len(pendant)} avant VERSION_TTL, {len(apres)} après")
+    await depot.fermer()
+
+
+def ajouter_hotel():
+    hotel = Hotel.objects.create(nom_ho="Hotel neuf", rue_adr_ho="1 rue Neuve", ville_ho="Paris", nb_etoiles_ho=4)
+    Chambre.objects.create(num_ch=101, num_ho=hotel, num_ty_id=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("nb_recherches", type=int, nargs="?", default=200)
+    parser.add_argument("--hotels", type=int, default=2000)
+    args = parser.parse_args()
+
+    with base_de_test(), override_settings(CATALOGUE={"VERSION_TTL": 0.2}):
+        peupler_catalogue(args.hotels, 10)
+        varier_prix()
+        asyncio.run(principal(args.nb_recherches))
+        asyncio.run(rechargement())
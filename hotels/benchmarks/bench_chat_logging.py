@@ -0,0 +1,110 @@
+"""
+Journal des tours de chat : print() sur la sortie standard contre le journal JSON en file.
+
+    python benchmarks/bench_chat_logging.py [nb_tours] [--concurrence 200] [--delai 0.01] [--debit 256]
+
+Chaque tour attend --delai secondes (l'appel à Rasa) puis journalise, comme
+les vues de chat, dans une boucle asyncio partagée par --concurrence
+conversations. La sortie standard est un tube lu à --debit Ko/s par un
+autre processus (collecteur de logs, terminal, `docker logs`) : quand il
+ne suit plus, une écriture synchrone bloque toute la boucle.
+
+Modes comparés :
+- print : les trois print() de l'ancienne vue (méthode, POST, messages) ;
+- json synchrone : un StreamHandler avec JsonFormatter sur le logger App.chat ;
+- json en file : QueueJsonHandler (file bornée, thread d'écriture) ;
+- json en file 10 % : le même avec Echantillonnage(taux=0.1).
+"""
+import argparse
+import asyncio
+import contextlib
+import logging
+import os
+import subprocess
+import sys
+import time
+import uuid
+
+from _common import percentile
+
+from App import chat_log
+
+LECTEUR = """
+import os, sys, time
+fd, debit = int(sys.argv[1]), float(sys.argv[2]) * 1024
+while True:
+    bloc = os.read(fd, 4096)
+    if not bloc:
+        break
+    time.sleep(len(bloc) / debit)
+"""
+
+MESSAGES = ["Je vous montre les hôtels disponibles…", "Hôtel du Parc (3 étoiles) : 89 € la nuit, 4 chambres libres"]
+
+
+async def charge(mode, nb_tours, concurrence, delai):
+    limite = asyncio.Semaphore(concurrence)
+    latences = []
+
+    async def un_tour(i):
+        async with limite:
+            debut = time.perf_counter()
+            sender = uuid.uuid4().hex
+            if mode == "print":
+                print("Méthode:", "POST")
+                print("POST:", {"message": [f"hôtels à Paris {i}"], "csrfmiddlewaretoken": ["x" * 64]})
+                await asyncio.sleep(delai)
+                print("Messages Rasa:", MESSAGES)
+            else:
+                with chat_log.tour(sender, "chat"):
+                    with chat_log.chrono("rasa"):
+                        await asyncio.sleep(delai)
+                    chat_log.noter(cache="miss", intention="rechercher_hotel", reponses=len(MESSAGES))
+            latences.append(time.perf_counter() - debut)
+
+    debut = time.perf_counter()
+    await asyncio.gather(*(un_tour(i) for i in range(nb_tours)))
+    return latences, time.perf_counter() - debut
+
+
+def handler(mode, sortie):
+    if mode == "json synchrone":
+        h = logging.StreamHandler(sortie)
+    else:
+        with contextlib.redirect_stdout(sortie):
+            h = chat_log.QueueJsonHandler()
+        if mode.endswith("10 %"):
+            h.addFilter(chat_log.Echantillonnage(taux=0.1))
+    h.setFormatter(chat_log.JsonFormatter())
+    return h
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("nb_tours", type=int, nargs="?", default=20000)
+    parser.add_argument("--concurrence", type=int, default=200)
+    parser.add_argument("--delai", type=float, default=0.01)
+    parser.add_argument("--debit", type=float, default=256, help="Ko/s lus sur la sortie standard")
+    args = parser.parse_args()
+
+    logger = chat_log.logger
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    for mode in ("print", "json synchrone", "json en file", "json en file 10 %"):
+        lecture, ecriture = os.pipe()
+        lecteur = subprocess.Popen([sys.executable, "-c", LECTEUR, str(lecture), str(args.debit)], pass_fds=(lecture,))
+        os.close(lecture)
+        sortie = open(ecriture, "w", buffering=1, encoding="utf-8")
+        h = None if mode == "print" else handler(mode, sortie)
+        logger.handlers = [h] if h else []
+        with contextlib.redirect_stdout(sortie):
+            latences, total = asyncio.run(charge(mode, args.nb_tours, args.concurrence, args.delai))
+        perdus = getattr(h, "perdus", 0)
+        if isinstance(h, chat_log.QueueJsonHandler):
+            # Le thread d'écriture finit de vider sa file (hors mesure)
+            h.arreter()
+        sortie.close()
+        lecteur.wait()
+        print(f"{mode:>18} | {args.nb_tours} tours | {args.nb_tours / total:6.0f} tours/s | "
+              f"p50 {percentile(latences, 50) * 1000:7.1f} ms | p99 {percentile(latences, 99) * 1000:7.1f} ms | "
+              f"{perdus} enregistrements perdus")
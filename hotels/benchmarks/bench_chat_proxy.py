@@ -0,0 +1,152 @@
+"""
+Proxy de chat vers Rasa : vue synchrone (chat-sync/) contre vue asynchrone (chat/).
+
+    python benchmarks/bench_chat_proxy.py [nb_requetes] [--delai 0.05] [--workers 8] [--concurrence 200]
+
+Un faux Rasa (_stub_rasa.py) tourne dans un sous-processus et répond après
+--delai secondes. La vue synchrone, l'ancienne vue de chat avec requests,
+n'existe plus que dans ce fichier ; elle est appelée depuis --workers threads,
+comme autant de workers WSGI ; la vue asynchrone est appelée par le handler
+ASGI de Django, --concurrence requêtes en vol dans une seule boucle.
+On mesure p50/p99 et le débit, et côté Rasa le nombre de connexions TCP ouvertes.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from _common import base_de_test, percentile
+
+import requests
+from django.conf import settings
+from django.http import JsonResponse
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings, setup_test_environment
+from django.urls import path
+from django.views.decorators.csrf import csrf_exempt
+
+from App import chat_log, rasa_client
+from projet.urls import urlpatterns as urls_projet
+
+PORT = 5099
+
+
+@csrf_exempt
+def chat_with_rasa_sync(request):
+    """Ancienne vue de chat : un appel requests bloquant par message."""
+    if request.method != "POST":
+        return JsonResponse({"error": "Méthode non autorisée"}, status=405)
+
+    user_message = request.POST.get("message")
+    if not user_message:
+        return JsonResponse({"error": "Aucun message fourni"}, status=400)
+
+    sender = rasa_client.sender_id_sync(request)
+    conf = rasa_client.config()
+    payload = {"sender": sender, "message": user_message}
+
+    with chat_log.tour(sender, "chat-sync"):
+        try:
+            with chat_log.chrono("rasa"):
+                response = requests.post(rasa_client.serveur(sender), json=payload,
+                                         timeout=(conf["CONNECT_TIMEOUT"], conf["TIMEOUT"]))
+            response_data = response.json()
+            messages = [msg.get("text") for msg in response_data if "text" in msg]
+        except Exception as e:
+            chat_log.noter(erreur=type(e).__name__)
+            return JsonResponse({"error": str(e)}, status=500)
+        chat_log.noter(reponses=len(messages))
+
+    return JsonResponse({"responses": messages})
+
+
+# Routes du projet plus chat-sync/, le temps du benchmark
+urlpatterns = urls_projet + [path("chat-sync/", chat_with_rasa_sync)]
+
+
+@contextlib.contextmanager
+def stub_rasa(delai, port=PORT, lents=0.0, capacite=0):
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "_stub_rasa.py")
+    process = subprocess.Popen([sys.executable, script, "--port", str(port), "--delai", str(delai),
+                                "--lents", str(lents), "--capacite", str(capacite)])
+    try:
+        for _ in range(100):
+            try:
+                stats_rasa(port=port)
+                break
+            except OSError:
+                time.sleep(0.05)
+        yield
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def stats_rasa(reset=False, port=PORT):
+    url = f"http://127.0.0.1:{port}/stats" + ("/reset" if reset else "")
+    with urllib.request.urlopen(urllib.request.Request(url, method="POST" if reset else "GET")) as reponse:
+        return json.load(reponse)
+
+
+def vue_sync(nb_requetes, workers):
+    def appel(i):
+        debut = time.perf_counter()
+        reponse = Client().post("/chat-sync/", {"message": f"bonjour {i}"})
+        assert reponse.status_code == 200, reponse.content
+        return time.perf_counter() - debut
+
+    # La vue synchrone affiche chaque requête
+    with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(workers) as pool:
+        return list(pool.map(appel, range(nb_requetes)))
+
+
+async def vue_async(nb_requetes, concurrence):
+    client = AsyncClient()
+    limite = asyncio.Semaphore(concurrence)
+
+    async def appel(i):
+        async with limite:
+            debut = time.perf_counter()
+            reponse = await client.post("/chat/", {"message": f"bonjour {i}"})
+            assert reponse.status_code == 200, reponse.content
+            return time.perf_counter() - debut
+
+    try:
+        return await asyncio.gather(*(appel(i) for i in range(nb_requetes)))
+    finally:
+        await rasa_client.fermer()
+
+
+def rapport(nom, durees, total):
+    stats = stats_rasa()
+    print(f"{nom:>28} | p50 {percentile(durees, 50) * 1000:7.1f} ms | p99 {percentile(durees, 99) * 1000:7.1f} ms | "
+          f"{len(durees) / total:7.0f} req/s | {stats['connexions']} connexions Rasa")
+    stats_rasa(reset=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("nb_requetes", type=int, nargs="?", default=2000)
+    parser.add_argument("--delai", type=float, default=0.05)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--concurrence", type=int, default=200)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    settings.RASA = {**getattr(settings, "RASA", {}), "SERVERS": [f"http://127.0.0.1:{PORT}/webhooks/rest/webhook"]}
+    # Base de test : les vues gardent le sender de chaque visiteur en session
+    with base_de_test(), stub_rasa(args.delai), override_settings(ROOT_URLCONF=__name__):
+        debut = time.perf_counter()
+        durees = vue_sync(args.nb_requetes, args.workers)
+        rapport(f"sync, {args.workers} workers", durees, time.perf_counter() - debut)
+
+        debut = time.perf_counter()
+        durees = asyncio.run(vue_async(args.nb_requetes, args.concurrence))
+        rapport(f"async, {args.concurrence} en vol", durees, time.perf_counter() - debut)
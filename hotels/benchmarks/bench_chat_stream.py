@@ -0,0 +1,65 @@
+"""
+Délai avant le premier message affiché : chat/ (JSON) contre chat/stream/ (SSE).
+
+    python benchmarks/bench_chat_stream.py [nb_requetes] [--delai 0.2] [--concurrence 20]
+
+Le faux Rasa envoie une annonce puis, --delai secondes plus tard, la liste
+(en flux avec ?stream=true, en une seule réponse sinon). On mesure le
+temps jusqu'au premier message et jusqu'au dernier.
+"""
+import argparse
+import asyncio
+import time
+
+from _common import base_de_test, percentile
+from bench_chat_proxy import PORT, stub_rasa
+
+from django.conf import settings
+from django.test import AsyncClient
+from django.test.utils import setup_test_environment
+
+from App import rasa_client
+
+
+async def mesurer(url, nb_requetes, concurrence):
+    client = AsyncClient()
+    limite = asyncio.Semaphore(concurrence)
+
+    async def appel(i):
+        async with limite:
+            debut = time.perf_counter()
+            reponse = await client.post(url, {"message": f"pas cher {i}"})
+            assert reponse.status_code == 200, reponse.content
+            if not reponse.streaming:
+                assert reponse.json()["responses"]
+                duree = time.perf_counter() - debut
+                return duree, duree
+            premier = None
+            async for morceau in reponse.streaming_content:
+                if premier is None and b'"text"' in morceau:
+                    premier = time.perf_counter() - debut
+            return premier, time.perf_counter() - debut
+
+    try:
+        return await asyncio.gather(*(appel(i) for i in range(nb_requetes)))
+    finally:
+        await rasa_client.fermer()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("nb_requetes", type=int, nargs="?", default=500)
+    parser.add_argument("--delai", type=float, default=0.2)
+    parser.add_argument("--concurrence", type=int, default=20)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    settings.RASA = {**getattr(settings, "RASA", {}), "SERVERS": [f"http://127.0.0.1:{PORT}/webhooks/rest/webhook"]}
+    with base_de_test(), stub_rasa(args.delai):
+        for url in ("/chat/", "/chat/stream/"):
+            mesures = asyncio.run(mesurer(url, args.nb_requetes, args.concurrence))
+            premiers = [p for p, _ in mesures]
+            derniers = [d for _, d in mesures]
+            print(f"{url:>14} | 1er message p50 {percentile(premiers, 50) * 1000:6.1f} ms "
+                  f"p99 {percentile(premiers, 99) * 1000:6.1f} ms | "
+                  f"dernier p50 {percentile(derniers, 50) * 1000:6.1f} ms")
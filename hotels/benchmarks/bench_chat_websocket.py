@@ -0,0 +1,109 @@
+"""
+Charge du chat : une WebSocket par utilisateur (/ws/chat/) contre un POST par message (chat/).
+
+    python benchmarks/bench_chat_websocket.py [nb_utilisateurs] [--messages 2] [--delai 0.05]
+
+Tout tourne dans le processus : l'application ASGI de projet/asgi.py est
+appelée directement (pas de serveur ASGI installé ici), avec le faux Rasa
+dans un sous-processus. Tous les utilisateurs sont actifs en même temps.
+On compte les ouvertures de connexion côté navigateur (requêtes HTTP ou
+handshakes WebSocket), les connexions TCP reçues par Rasa, et la latence
+de chaque message jusqu'à la dernière réponse (erreurs comprises, par
+exemple un délai Rasa dépassé).
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from _common import base_de_test, percentile
+from bench_chat_proxy import PORT, stats_rasa, stub_rasa
+
+from django.conf import settings
+from django.test import AsyncClient
+from django.test.utils import setup_test_environment
+
+from App import rasa_client
+
+
+class SocketMemoire:
+    """Client WebSocket en mémoire branché directement sur une application ASGI."""
+
+    def __init__(self, application, chemin="/ws/chat/"):
+        self.entree = asyncio.Queue()
+        self.sortie = asyncio.Queue()
+        scope = {"type": "websocket", "path": chemin, "headers": [(b"host", b"testserver"), (b"origin", b"http://testserver")]}
+        self.tache = asyncio.create_task(application(scope, self.entree.get, self.sortie.put))
+
+    async def connecter(self):
+        await self.entree.put({"type": "websocket.connect"})
+        evenement = await self.sortie.get()
+        assert evenement["type"] == "websocket.accept", evenement
+
+    async def envoyer(self, donnees):
+        await self.entree.put({"type": "websocket.receive", "text": json.dumps(donnees)})
+
+    async def recevoir(self):
+        return json.loads((await self.sortie.get())["text"])
+
+    async def fermer(self):
+        await self.entree.put({"type": "websocket.disconnect", "code": 1000})
+        await self.tache
+
+
+async def utilisateur_websocket(application, numero, nb_messages, latences, erreurs):
+    socket = SocketMemoire(application)
+    await socket.connecter()
+    for i in range(nb_messages):
+        debut = time.perf_counter()
+        await socket.envoyer({"conversation": "chat", "message": f"bonjour {numero}-{i}"})
+        while not (trame := await socket.recevoir()).get("fin"):
+            if "error" in trame:
+                erreurs.append(trame["error"])
+        latences.append(time.perf_counter() - debut)
+    await socket.fermer()
+    return 1
+
+
+async def utilisateur_http(application, numero, nb_messages, latences, erreurs):
+    client = AsyncClient()
+    for i in range(nb_messages):
+        debut = time.perf_counter()
+        reponse = await client.post("/chat/", {"message": f"bonjour {numero}-{i}"})
+        if reponse.status_code != 200:
+            erreurs.append(reponse.json()["error"])
+        latences.append(time.perf_counter() - debut)
+    return nb_messages
+
+
+async def charge(utilisateur, nb_utilisateurs, nb_messages):
+    from projet.asgi import application
+
+    latences, erreurs = [], []
+    debut = time.perf_counter()
+    try:
+        ouvertures = await asyncio.gather(*(utilisateur(application, n, nb_messages, latences, erreurs)
+                                            for n in range(nb_utilisateurs)))
+    finally:
+        await rasa_client.fermer()
+    return latences, erreurs, sum(ouvertures), time.perf_counter() - debut
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("nb_utilisateurs", type=int, nargs="?", default=5000)
+    parser.add_argument("--messages", type=int, default=2)
+    parser.add_argument("--delai", type=float, default=0.05)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    settings.RASA = {**getattr(settings, "RASA", {}), "SERVERS": [f"http://127.0.0.1:{PORT}/webhooks/rest/webhook"]}
+    with base_de_test(), stub_rasa(args.delai):
+        for nom, utilisateur in (("POST chat/", utilisateur_http), ("WebSocket", utilisateur_websocket)):
+            latences, erreurs, ouvertures, total = asyncio.run(charge(utilisateur, args.nb_utilisateurs, args.messages))
+            rasa = stats_rasa()
+            stats_rasa(reset=True)
+            print(f"{nom:>10} | {args.nb_utilisateurs} utilisateurs x {args.messages} messages | "
+                  f"p50 {percentile(latences, 50) * 1000:7.1f} ms | p99 {percentile(latences, 99) * 1000:7.1f} ms | "
+                  f"{len(latences) / total:6.0f} msg/s | {len(erreurs)} erreurs | "
+                  f"{ouvertures} ouvertures navigateur | {rasa['connexions']} connexions Rasa")
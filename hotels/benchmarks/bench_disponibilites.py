@@ -0,0 +1,74 @@
+"""
+Disponibilités d'une ville : requête NOT EXISTS contre cache par semaine ISO.
+
+    python benchmarks/bench_disponibilites.py [--hotels 20 200 1000] [--chambres 5] [--recherches 50]
+
+Pour chaque taille (hôtels répartis sur 4 villes, 3 types de chambres) :
+- requête : chambres_libres_par_hotel, une requête agrégée ;
+- cache froid : disponibilites_ville sur un cache vide (résumé + un lot de
+  deux requêtes pour toutes les semaines absentes de la ville) ;
+- cache chaud : la même recherche, seul le résumé est lu en base.
+Le nombre de requêtes SQL ne doit pas grandir avec le nombre d'hôtels, et
+les deux chemins doivent donner le même résultat.
+"""
+import argparse
+import random
+import time
+from datetime import timedelta
+
+from _common import START_DATE, base_de_test, charger_occupations, peupler_catalogue
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from App import availability_cache
+from App.services import chambres_libres_par_hotel, disponibilites_ville, fenetre_sejour
+
+
+def recherche(ville, jour, nb_jours):
+    with CaptureQueriesContext(connection) as requetes:
+        debut = time.perf_counter()
+        resultat = disponibilites_ville(ville, jour, nb_jours)
+        duree = time.perf_counter() - debut
+    return resultat, duree, len(requetes)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hotels", type=int, nargs="+", default=[20, 200, 1000])
+    parser.add_argument("--chambres", type=int, default=5, help="chambres par type et par hôtel")
+    parser.add_argument("--recherches", type=int, default=50)
+    args = parser.parse_args()
+
+    for nb_hotels in args.hotels:
+        rng = random.Random(0)
+        with base_de_test():
+            chambres = peupler_catalogue(nb_hotels, args.chambres)
+            charger_occupations(chambres, len(chambres) * 20)
+            cache = availability_cache.get_cache()
+            mesures = {"requête": [], "cache froid": [], "cache chaud": []}
+            nb_requetes = {"cache froid": 0, "cache chaud": 0}
+            for _ in range(args.recherches):
+                ville = rng.choice(["Paris", "Lyon", "Nice", "Marseille"])
+                jour = (START_DATE + timedelta(days=rng.randint(0, 200))).date()
+                nb_jours = rng.randint(1, 14)
+
+                debut = time.perf_counter()
+                attendu = chambres_libres_par_hotel(ville, *fenetre_sejour(jour, nb_jours))
+                mesures["requête"].append(time.perf_counter() - debut)
+
+                cache.vider()
+                for mode in ("cache froid", "cache chaud"):
+                    obtenu, duree, requetes = recherche(ville, jour, nb_jours)
+                    mesures[mode].append(duree)
+                    nb_requetes[mode] = max(nb_requetes[mode], requetes)
+                    assert [{**r, "num_ty__prix_ty": float(r["num_ty__prix_ty"])} for r in obtenu] == \
+                           [{**r, "num_ty__prix_ty": float(r["num_ty__prix_ty"])} for r in attendu], \
+                        "le cache et la requête divergent"
+            cache.vider()
+
+        colonnes = " | ".join(
+            f"{mode} {sum(valeurs) / len(valeurs) * 1000:7.2f} ms"
+            + (f" ({nb_requetes[mode]} requêtes)" if mode in nb_requetes else "")
+            for mode, valeurs in mesures.items())
+        print(f"{nb_hotels:5d} hôtels | {colonnes} | correct")
@@ -0,0 +1,135 @@
+"""
+Répertoire des villes (App/gazetteer.py) sur de grandes listes de noms.
+
+    python benchmarks/bench_gazetteer.py [--villes 1000 10000 50000] [--recherches 5000] [--balayage 20]
+
+Les noms sont synthétiques, de forme française (syllabes, « Saint-... »,
+« Le ... », « ...-sur-... »). Pour chaque taille :
+- construction du répertoire, puis d'un instantané du catalogue dont les
+  villes n'ont pas changé (le répertoire du précédent est repris) ;
+- exact : noms tapés sans accents, en minuscules, avec St ou sans tirets ;
+- 1 faute, 2 fautes : suppression, insertion ou transposition de lettres,
+  avec la part des noms retrouvés (une faute peut tomber sur un autre nom
+  existant ou sous la tolérance d'un nom court) ;
+- phrase : ville mal tapée au milieu d'un message (citee) ;
+- balayage : distance calculée sur tous les noms, pour quelques requêtes ;
+  les résultats doivent être ceux de l'index.
+"""
+import argparse
+import random
+import time
+
+import _common  # noqa: F401  (configure Django)
+from _common import percentile
+
+from actions.catalogue import Catalogue, FicheHotel, TypeOffert
+from App.gazetteer import Gazetteer, distance, mots, tolerance
+
+ATTAQUES = "b c d f g h j l m n p r s t v ch br tr gr pl cl fl gn qu st bl cr dr pr vr".split()
+VOYELLES = "a e i o u é è ou ai au eu oi an en on in".split()
+
+
+def noms_synthetiques(nb, seed=0):
+    rng = random.Random(seed)
+
+    def mot():
+        syllabes = rng.choices([2, 3, 4], [40, 45, 15])[0]
+        return "".join(rng.choice(ATTAQUES) + rng.choice(VOYELLES) + (rng.choice("lnrstxcm") if rng.random() < .35 else "")
+                       for _ in range(syllabes)).capitalize()
+
+    noms = {}
+    while len(noms) < nb:
+        nom = mot()
+        tirage = rng.random()
+        if tirage < .10:
+            nom = rng.choice(["Saint-", "Sainte-"]) + nom
+        elif tirage < .15:
+            nom = rng.choice(["Le ", "La ", "Les "]) + nom
+        if rng.random() < .10:
+            nom += rng.choice(["-sur-", "-les-", "-en-", "-le-"]) + mot()
+        noms.setdefault("".join(mots(nom)), nom)
+    return sorted(noms.values())
+
+
+def faute(nom, rng):
+    lettres = list(nom.lower())
+    i = rng.randrange(len(lettres))
+    operation = rng.randrange(3)
+    if operation == 0 and len(lettres) > 1:
+        del lettres[i]
+    elif operation == 1:
+        lettres.insert(i, rng.choice("aeioulrst"))
+    elif i + 1 < len(lettres):
+        lettres[i], lettres[i + 1] = lettres[i + 1], lettres[i]
+    return "".join(lettres)
+
+
+def variante(nom):
+    return nom.lower().replace("saint-", "st ").replace("-", " ").replace("é", "e").replace("è", "e")
+
+
+def mesurer(requetes, appel, attendus=None):
+    durees, justes = [], 0
+    for i, requete in enumerate(requetes):
+        debut = time.perf_counter()
+        trouve = appel(requete)
+        durees.append(time.perf_counter() - debut)
+        justes += attendus is not None and trouve == attendus[i]
+    moyenne = sum(durees) / len(durees) * 1e6
+    ligne = f"{moyenne:6.1f} µs (p99 {percentile(durees, 99) * 1e6:6.1f})"
+    return ligne + (f" {justes / len(requetes):4.0%}" if attendus is not None else "")
+
+
+def balayage(repertoire, requete):
+    """Référence : la distance à chacun des noms."""
+    compacte = "".join(mots(requete))
+    maximum = min(tolerance(len(compacte)), repertoire.distance_max)
+    trouves = []
+    for nom in repertoire.noms:
+        ecart = distance(compacte, "".join(mots(nom)), maximum)
+        if ecart <= maximum:
+            trouves.append((nom, ecart))
+    return sorted(trouves, key=lambda t: (t[1], repertoire.noms.index(t[0])))
+
+
+def fiches(noms):
+    return [FicheHotel(h, f"Hotel {h}", nom, 1 + h % 5, 100.0, 100.0, 100.0, 10, 2, (TypeOffert("Double", 100.0, 10, 2),))
+            for h, nom in enumerate(noms, 1)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--villes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--recherches", type=int, default=5000)
+    parser.add_argument("--balayage", type=int, default=20)
+    args = parser.parse_args()
+
+    for nb in args.villes:
+        noms = noms_synthetiques(nb)
+        rng = random.Random(1)
+        cibles = [rng.choice(noms) for _ in range(args.recherches)]
+
+        debut = time.perf_counter()
+        cat = Catalogue(1, fiches(noms))
+        construction = time.perf_counter() - debut
+        debut = time.perf_counter()
+        suivant = Catalogue(2, fiches(noms), cat)
+        reprise = time.perf_counter() - debut
+        repertoire = cat.gazetteer
+        assert suivant.gazetteer is repertoire
+
+        une = [faute(nom, rng) for nom in cibles]
+        deux = [faute(faute(nom, rng), rng) for nom in cibles]
+        print(f"{nb:6d} villes | catalogue {construction * 1000:6.0f} ms, même villes {reprise * 1000:4.0f} ms | "
+              f"exact {mesurer([variante(n) for n in cibles], repertoire.chercher, cibles)} | "
+              f"1 faute {mesurer(une, repertoire.chercher, cibles)} | "
+              f"2 fautes {mesurer(deux, repertoire.chercher, cibles)} | "
+              f"phrase {mesurer([f'un hôtel à {q} pour deux' for q in une], repertoire.citee, cibles)}")
+
+        requetes = (une + deux)[:args.balayage]
+        debut = time.perf_counter()
+        references = [balayage(repertoire, q) for q in requetes]
+        duree = (time.perf_counter() - debut) / len(requetes) * 1e6
+        identiques = all(repertoire.proches(q) == reference for q, reference in zip(requetes, references))
+        print(f"{'':13} | balayage {duree:9.1f} µs/recherche | "
+              f"{'mêmes résultats que l’index' if identiques else 'RÉSULTATS DIFFÉRENTS'}")
@@ -0,0 +1,97 @@
+"""
+Import des CSV : import_csv.py (ligne à ligne) contre import_stream.py (par lots).
+
+    python benchmarks/bench_import.py [nb_occupations]
+
+Les CSV sont générés dans un dossier temporaire avec une Reservation par
+Occupation. Les chambres sont numérotées globalement (num_ch = Chambre.pk
+après import) pour que l'ancien importeur, qui prend num_ch pour la clé
+étrangère, reste correct et que la comparaison porte sur le même travail.
+"""
+import csv
+import io
+import os
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+from _common import START_DATE, base_de_test, occupations_synthetiques
+
+NB_HOTELS = 20
+CHAMBRES_PAR_TYPE = 20
+FORMAT_DATE = "%Y-%m-%d %H:%M:%S"
+
+
+def ecrire(dossier, fichier, entetes, lignes):
+    with open(os.path.join(dossier, fichier), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(entetes)
+        writer.writerows(lignes)
+
+
+def generer_csv(dossier, nb_occupations):
+    chambres = [(pk, 1 + (pk - 1) // (3 * CHAMBRES_PAR_TYPE), 1 + (pk - 1) // CHAMBRES_PAR_TYPE % 3)
+                for pk in range(1, NB_HOTELS * 3 * CHAMBRES_PAR_TYPE + 1)]
+    ecrire(dossier, "Hotel.csv", ["num_ho", "nom_ho", "rue_adr_ho", "ville_ho", "nb_etoiles_ho"],
+           [(h, f"Hotel {h}", f"{h} rue Exemple", "Paris", 1 + h % 5) for h in range(1, NB_HOTELS + 1)])
+    ecrire(dossier, "TypeChambre.csv", ["num_ty", "nom_ty", "prix_ty"],
+           [(1, "Simple", 80.0), (2, "Double", 120.0), (3, "Suite", 200.0)])
+    ecrire(dossier, "Chambre.csv", ["num_ch", "num_ho", "num_ty"], chambres)
+    ecrire(dossier, "Client.csv", ["num_cl", "nom_cl", "prenom_cl", "rue_adr_cl", "ville_cl"],
+           [(c, f"Nom{c}", f"Prenom{c}", f"{c} rue Exemple", "Paris") for c in range(1, 101)])
+    types = {pk: type_id for pk, _, type_id in chambres}
+    occupations = list(occupations_synthetiques(chambres, nb_occupations))
+    # Une réservation par (client, hôtel, type, date) : les doublons sont regroupés
+    reservations = {}
+    for client, hotel, chambre, date_a, date_d in occupations:
+        cle = (client, hotel, types[chambre], date_a.strftime(FORMAT_DATE))
+        nb_jours = (date_d - date_a).days
+        reservations[cle] = (nb_jours, reservations.get(cle, (0, 0))[1] + 1)
+    ecrire(dossier, "Reservation.csv", ["num_cl", "num_ho", "num_ty", "date_a", "nb_jours", "nb_chambres"],
+           [cle + valeur for cle, valeur in reservations.items()])
+    ecrire(dossier, "Occupation.csv", ["num_cl", "num_ho", "num_ch", "date_a", "date_d"],
+           [(client, hotel, chambre, date_a.strftime(FORMAT_DATE), date_d.strftime(FORMAT_DATE))
+            for client, hotel, chambre, date_a, date_d in occupations])
+    return len(chambres) + NB_HOTELS + 3 + 100 + len(reservations) + len(occupations)
+
+
+def ancien(dossier):
+    from App.fixtures import import_csv
+
+    # L'ancien importeur lit les CSV dans le répertoire courant
+    courant = os.getcwd()
+    os.chdir(dossier)
+    try:
+        import_csv.import_hotels()
+        import_csv.import_types()
+        import_csv.import_chambres()
+        import_csv.import_clients()
+        import_csv.import_reservations()
+        import_csv.import_occupations()
+    finally:
+        os.chdir(courant)
+
+
+def nouveau(dossier):
+    from App.fixtures import import_stream
+
+    import_stream.importer(dossier)
+
+
+if __name__ == "__main__":
+    nb_occupations = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    with tempfile.TemporaryDirectory() as dossier:
+        nb_lignes = generer_csv(dossier, nb_occupations)
+        print(f"{nb_lignes} lignes CSV, {nb_occupations} occupations depuis {START_DATE:%Y-%m-%d}")
+        for nom, importer in (("import_csv", ancien), ("import_stream", nouveau)):
+            with base_de_test():
+                from App.models import DailyOccupancy, Occupation
+
+                sortie = io.StringIO()
+                debut = time.perf_counter()
+                with redirect_stdout(sortie):
+                    importer(dossier)
+                duree = time.perf_counter() - debut
+                print(f"{nom:>13} | {duree:7.2f}s | {nb_lignes / duree:>9.0f} lignes/s | "
+                      f"{Occupation.objects.count()} occupations, {DailyOccupancy.objects.count()} jours agrégés")
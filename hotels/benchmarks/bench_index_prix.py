@@ -0,0 +1,74 @@
+"""
+Recherche par prix sur un grand catalogue : filtre + tri contre IndexPrix.
+
+    python benchmarks/bench_index_prix.py [--hotels 1000 10000 100000] [--recherches 2000]
+
+Le catalogue est synthétique (FicheHotel en mémoire, sans base) : prix
+moyens entre 40 et 400 €, 200 villes, 1 à 5 étoiles. Pour « prix moyen ≤ X,
+du moins cher au plus cher » on compare :
+- filtre + tri : parcours de tous les hôtels à chaque question ;
+- index, tout : bissection puis tranche complète (ancienne réponse sans limite) ;
+- index, page : les PAGE_SIZE premiers, et la page 3 ;
+- ville + étoiles : la même page dans l'index (ville, étoiles).
+Les pages mises bout à bout doivent redonner le résultat complet.
+"""
+import argparse
+import random
+import time
+
+import _common  # noqa: F401  (configure Django)
+
+from actions.catalogue import PAGE_SIZE, Catalogue, FicheHotel, TypeOffert
+
+
+def catalogue_synthetique(nb_hotels, seed=0):
+    rng = random.Random(seed)
+    fiches = []
+    for h in range(1, nb_hotels + 1):
+        prix = round(rng.uniform(40, 400), 2)
+        fiches.append(FicheHotel(h, f"Hotel {h}", f"Ville {h % 200}", 1 + h % 5, prix, prix, prix, 10, 2,
+                                 (TypeOffert("Double", prix, 10, 2),)))
+    return Catalogue(0, fiches)
+
+
+def mesurer(nb, appel):
+    debut = time.perf_counter()
+    for i in range(nb):
+        appel(i)
+    return (time.perf_counter() - debut) / nb * 1e6
+
+
+def budget(i):
+    return 60 + (i * 37) % 300
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hotels", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--recherches", type=int, default=2000)
+    args = parser.parse_args()
+
+    for nb_hotels in args.hotels:
+        cat = catalogue_synthetique(nb_hotels)
+        index = cat.index_prix()
+        modes = {
+            "filtre + tri": lambda i: sorted((f for f in cat.hotels if f.prix_moyen <= budget(i)),
+                                             key=lambda f: (f.prix_moyen, f.num_ho)),
+            "index, tout": lambda i: index.jusqu_a(budget(i)),
+            "index, page 1": lambda i: index.page(budget(i), 1, PAGE_SIZE),
+            "index, page 3": lambda i: index.page(budget(i), 3, PAGE_SIZE),
+            "ville + étoiles": lambda i: cat.index_prix(f"Ville {i % 200}", 1 + i % 5).page(budget(i)),
+        }
+        complet = modes["filtre + tri"](1)
+        pages = []
+        numero = 1
+        while True:
+            page, total = index.page(budget(1), numero, PAGE_SIZE)
+            if not page:
+                break
+            pages.extend(page)
+            numero += 1
+        correct = list(index.jusqu_a(budget(1))) == complet == pages and total == len(complet)
+        nb = args.recherches if nb_hotels <= 10000 else args.recherches // 10
+        resultats = " | ".join(f"{nom} {mesurer(nb, appel):8.1f} µs" for nom, appel in modes.items())
+        print(f"{nb_hotels:7d} hôtels | {resultats} | {'correct' if correct else 'INCORRECT'}")
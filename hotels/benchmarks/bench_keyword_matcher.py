@@ -0,0 +1,141 @@
+"""
+Détection des villes et mots-clés : boucles `mot in texte` contre l'automate partagé.
+
+    python benchmarks/bench_keyword_matcher.py [--messages 20000] [--villes 7 1000 10000]
+
+1. Table de correction : pour des messages piégeux, ce que trouvaient les
+   anciennes boucles des actions (sous-chaînes, première ville du
+   dictionnaire) et ce que trouvent actions/mots_cles.py et le répertoire
+   des villes (mots entiers, sans accents, première ville du texte).
+2. Temps par message, ancienne détection (listes reconstruites à chaque
+   appel, un `in` par mot) contre un passage de l'automate, avec un
+   vocabulaire de villes de plus en plus grand.
+"""
+import argparse
+import random
+import time
+
+import _common  # noqa: F401  (configure Django)
+
+from actions import mots_cles
+from App.gazetteer import Gazetteer
+from App.keyword_matcher import KeywordMatcher
+
+VILLE = "ville"
+
+CAS = [
+    # message, (ville, capacité, budget, nombre) attendus
+    ("Un hôtel à Lyon pour 2 personnes", ("Lyon", True, False, True)),
+    ("Aucune chambre libre à Nice ?", ("Nice", False, False, False)),
+    ("Je suis lyonnais, un hôtel à Paris", ("Paris", False, False, True)),
+    ("Hôtel à Marseille ou sinon Paris", ("Marseille", False, False, False)),
+    ("hotel economique a bordeaux", ("Bordeaux", False, True, False)),
+    ("HÔTEL PAS CHER À LILLE", ("Lille", False, True, False)),
+    ("12 nuits à Toulouse", ("Toulouse", False, False, False)),
+    ("Et ensuite, que proposez-vous ?", (None, False, False, False)),
+    ("Je voyage seule", (None, True, False, False)),
+    ("Des chambres doubles à Nice", ("Nice", True, False, False)),
+    ("Quelque chose de bon marché", (None, False, True, False)),
+    ("Réserver pour cinq", (None, False, False, True)),
+]
+
+ANCIENNES_VILLES = {'paris': 'Paris', 'nice': 'Nice', 'lyon': 'Lyon', 'marseille': 'Marseille',
+                    'toulouse': 'Toulouse', 'bordeaux': 'Bordeaux', 'lille': 'Lille'}
+
+
+def ancienne_detection(message, villes=ANCIENNES_VILLES):
+    """Les boucles des actions avant l'automate, listes comprises."""
+    texte = message.lower()
+    ville = None
+    for cle, valeur in villes.items():
+        if cle in texte:
+            ville = valeur
+            break
+    mots_capacite = ['personne', 'personnes', 'adulte', 'adultes', 'voyageur', 'voyageurs',
+                     'seul', 'couple', 'groupe', 'famille', 'familial', 'familiale',
+                     'simple', 'double', 'triple', 'suite']
+    mots_pas_chers = ['pas cher', 'pas chers', 'économique', 'bon marché', 'low cost', 'petit prix', 'bas prix']
+    nombres = ['1', '2', '3', '4', '5', 'une', 'un', 'deux', 'trois', 'quatre', 'cinq']
+    return (ville, any(m in texte for m in mots_capacite), any(m in texte for m in mots_pas_chers),
+            any(n in texte for n in nombres))
+
+
+REPERTOIRE = Gazetteer(ANCIENNES_VILLES.values())
+
+
+def detection(message, matcher=None):
+    if matcher is None:
+        mots = mots_cles.analyser(message)
+        ville = REPERTOIRE.citee(message)
+    else:
+        mots = analyser(matcher, message)
+        ville = next(iter(mots.get(VILLE, ())), None)
+    return ville, mots_cles.CAPACITE in mots, mots_cles.BUDGET in mots, mots_cles.NOMBRE in mots
+
+
+def analyser(matcher, message):
+    trouves = {}
+    for correspondance in matcher.trouver(message):
+        categorie, valeur = correspondance.valeur
+        trouves.setdefault(categorie, []).append(valeur)
+    return trouves
+
+
+def table():
+    def cellule(resultat, attendu):
+        ville, capacite, budget, nombre = resultat
+        texte = f"{ville or '-':9} {'C' if capacite else '.'}{'B' if budget else '.'}{'N' if nombre else '.'}"
+        return f"{texte} {'ok' if resultat == attendu else 'FAUX'}"
+
+    justes = [0, 0]
+    print(f"{'message':38} | {'attendu':13} | {'ancien':16} | {'automate':16}")
+    for message, attendu in CAS:
+        ancien, nouveau = ancienne_detection(message), detection(message)
+        justes[0] += ancien == attendu
+        justes[1] += nouveau == attendu
+        print(f"{message:38} | {cellule(attendu, attendu)[:-3]:13} | {cellule(ancien, attendu):16} | "
+              f"{cellule(nouveau, attendu):16}")
+    print(f"{'(C capacité, B budget, N nombre)':38} | {len(CAS):13d} | {justes[0]:9d} justes   | {justes[1]:9d} justes")
+
+
+def villes_synthetiques(nb, seed=0):
+    rng = random.Random(seed)
+    syllabes = ["sa", "int", "ber", "lon", "mar", "vil", "le", "mont", "beau", "ro", "che", "fort", "nay", "gny"]
+    villes = dict(ANCIENNES_VILLES)
+    while len(villes) < nb:
+        nom = "".join(rng.choice(syllabes) for _ in range(rng.randint(2, 4)))
+        villes.setdefault(nom, nom.capitalize())
+    return villes
+
+
+def mesurer(nb, messages, detecter):
+    debut = time.perf_counter()
+    for i in range(nb):
+        detecter(messages[i % len(messages)])
+    return (time.perf_counter() - debut) / nb * 1e6
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--villes", type=int, nargs="+", default=[7, 1000, 10000])
+    args = parser.parse_args()
+
+    table()
+    print()
+    messages = [message for message, _ in CAS]
+    for nb_villes in args.villes:
+        villes = villes_synthetiques(nb_villes)
+        debut = time.perf_counter()
+        matcher = KeywordMatcher(
+            [(mot, (VILLE, ville)) for mot, ville in villes.items()]
+            + [(mot, (mots_cles.CAPACITE, mot)) for mot in mots_cles.MOTS_CAPACITE]
+            + [(mot, (mots_cles.BUDGET, mot)) for mot in mots_cles.MOTS_PAS_CHERS]
+            + [(mot, (mots_cles.NOMBRE, n)) for mot, n in mots_cles.NOMBRES.items()]
+        )
+        construction = (time.perf_counter() - debut) * 1000
+        nb = args.messages if nb_villes <= 1000 else args.messages // 10
+        ancien = mesurer(nb, messages, lambda m: ancienne_detection(m, villes))
+        nouveau = mesurer(nb, messages, lambda m: detection(m, matcher))
+        print(f"{nb_villes:6d} villes | boucles {ancien:8.1f} µs/message | automate {nouveau:6.1f} µs/message "
+              f"(construit une fois en {construction:.0f} ms)")
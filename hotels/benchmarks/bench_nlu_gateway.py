@@ -0,0 +1,82 @@
+"""
+Passerelle NLU : une inférence par message contre des lots de messages simultanés.
+
+    python benchmarks/bench_nlu_gateway.py [nb_utilisateurs] [--messages 20] [--workers 1]
+                                            [--modele models/] [--fixe 4] [--unitaire 0.4]
+
+nb_utilisateurs conversations envoient chacune --messages messages, l'un
+après l'autre, toutes en même temps. On compare le MicroBatcher réglé sans
+regroupement (lots de 1) puis avec la fenêtre de 5 ms et 32 messages au plus,
+devant --workers processus d'inférence.
+
+Avec --modele, les processus chargent le vrai modèle Rasa (charger_rasa).
+Sans, ils simulent son coût en occupant le CPU : --fixe ms par passage dans
+le graphe et --unitaire ms par message du lot. C'est ce coût fixe que le
+regroupement amortit. Mesurez-le avec --modele avant de régler WINDOW_MS.
+"""
+import argparse
+import asyncio
+import functools
+import time
+
+from _common import percentile
+
+from App import nlu_gateway
+
+
+def _occuper(secondes):
+    fin = time.perf_counter() + secondes
+    while time.perf_counter() < fin:
+        pass
+
+
+def charger_factice(fixe, unitaire, modele):
+    def analyser(textes):
+        _occuper((fixe + unitaire * len(textes)) / 1000)
+        return [{"text": texte, "intent": {"name": "rechercher_hotel", "confidence": 0.9}, "entities": []}
+                for texte in textes]
+    return analyser
+
+
+async def charge(batcher, nb_utilisateurs, nb_messages):
+    latences = []
+
+    async def utilisateur(numero):
+        for i in range(nb_messages):
+            debut = time.perf_counter()
+            await batcher.soumettre(f"un hôtel à Paris {numero}-{i}")
+            latences.append(time.perf_counter() - debut)
+
+    debut = time.perf_counter()
+    await asyncio.gather(*(utilisateur(n) for n in range(nb_utilisateurs)))
+    return latences, time.perf_counter() - debut
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("nb_utilisateurs", type=int, nargs="?", default=200)
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--modele", help="modèle Rasa entraîné ; sinon coût simulé")
+    parser.add_argument("--fixe", type=float, default=4.0, help="ms par passage dans le graphe (simulé)")
+    parser.add_argument("--unitaire", type=float, default=0.4, help="ms par message du lot (simulé)")
+    args = parser.parse_args()
+
+    if args.modele:
+        travailleur = nlu_gateway.TravailleurLocal(args.modele, args.workers)
+    else:
+        charger = functools.partial(charger_factice, args.fixe, args.unitaire)
+        travailleur = nlu_gateway.TravailleurLocal(None, args.workers, charger=charger)
+    try:
+        # Chargement du modèle hors mesure
+        asyncio.run(travailleur.analyser(["bonjour"]))
+        for nom, fenetre, taille_max in (("un par un", 0, 1), ("lots 5 ms / 32", 0.005, 32)):
+            batcher = nlu_gateway.MicroBatcher(travailleur.analyser, fenetre, taille_max, args.workers)
+            latences, total = asyncio.run(charge(batcher, args.nb_utilisateurs, args.messages))
+            stats = batcher.stats()
+            print(f"{nom:>15} | {args.nb_utilisateurs} utilisateurs x {args.messages} messages | "
+                  f"{len(latences) / total:7.0f} msg/s | p50 {percentile(latences, 50) * 1000:7.1f} ms | "
+                  f"p99 {percentile(latences, 99) * 1000:7.1f} ms | {stats['lots']} lots "
+                  f"(moyenne {stats['taille_moyenne']})")
+    finally:
+        travailleur.arreter()
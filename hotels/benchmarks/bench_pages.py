@@ -0,0 +1,73 @@
+"""
+Débit des pages d'accueil (/) et de chat (/chat-page/) par worker.
+
+    python benchmarks/bench_pages.py [nb_requetes]
+
+Les requêtes passent par toute la pile Django (middlewares, session) via
+le client de test, dans un seul thread : requêtes/s d'un worker. Le client
+garde ses cookies comme un navigateur, la session n'est donc créée qu'une
+fois. DEBUG est coupé, comme en production : collectstatic est lancé dans
+un dossier temporaire (stockage de settings_prod.py) pour que {% static %}
+trouve le manifeste.
+
+Modes comparés :
+- relecture : gabarit relu et recompilé à chaque requête (ancien APP_DIRS en DEBUG) ;
+- cached.Loader : gabarit compilé une fois, rendu à chaque requête ;
+- cache de page : HTML rendu une fois (PAGE_CACHE), renvoyé avec son ETag ;
+- 304 : visite suivante, le navigateur envoie If-None-Match.
+"""
+import argparse
+import time
+
+from _common import base_de_test, percentile, statiques_collectes
+
+from django.conf import settings
+from django.test import Client
+from django.test.utils import override_settings
+
+from App import page_cache
+
+PAGES = {"/": "accueil", "/chat-page/": "chat"}
+
+
+def gabarits(cache):
+    chargeurs = ["django.template.loaders.app_directories.Loader"]
+    if cache:
+        chargeurs = [("django.template.loaders.cached.Loader", chargeurs)]
+    return [{**settings.TEMPLATES[0], "OPTIONS": {**settings.TEMPLATES[0]["OPTIONS"], "loaders": chargeurs}}]
+
+
+def charge(chemin, nb_requetes, revalider):
+    client = Client()
+    entetes = {}
+    premiere = client.get(chemin)
+    if revalider and premiere.has_header("ETag"):
+        entetes["HTTP_IF_NONE_MATCH"] = premiere["ETag"]
+    latences = []
+    debut = time.perf_counter()
+    for _ in range(nb_requetes):
+        t = time.perf_counter()
+        reponse = client.get(chemin, **entetes)
+        latences.append(time.perf_counter() - t)
+    return reponse.status_code, len(reponse.content), latences, time.perf_counter() - debut
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("nb_requetes", type=int, nargs="?", default=3000)
+    args = parser.parse_args()
+
+    modes = [
+        ("relecture", False, False, False),
+        ("cached.Loader", True, False, False),
+        ("cache de page", True, True, False),
+        ("304", True, True, True),
+    ]
+    with base_de_test(), statiques_collectes():
+        for chemin, nom in PAGES.items():
+            for mode, cache_gabarits, cache_page, revalider in modes:
+                page_cache.vider()
+                with override_settings(TEMPLATES=gabarits(cache_gabarits), PAGE_CACHE={"ENABLED": cache_page}):
+                    statut, taille, latences, total = charge(chemin, args.nb_requetes, revalider)
+                print(f"{nom:>8} | {mode:>13} | {statut} {taille:5d} o | {args.nb_requetes / total:6.0f} req/s | "
+                      f"p50 {percentile(latences, 50) * 1000:6.3f} ms | p99 {percentile(latences, 99) * 1000:6.3f} ms")
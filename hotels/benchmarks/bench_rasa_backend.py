@@ -0,0 +1,99 @@
+"""
+Appels à Rasa quand il flanche : disjoncteur, attente bornée et relances.
+
+    python benchmarks/bench_rasa_backend.py [nb_requetes] [--concurrence 200]
+
+Les messages passent directement par rasa_client.envoyer (ce qu'appelle la
+vue chat/), pour que la mesure ne dépende pas du client de test Django.
+
+Trois scénarios, chacun avec et sans le mécanisme :
+
+- panne : Rasa ne répond plus (délai de 5 s, TIMEOUT à 0,5 s). Sans
+  disjoncteur chaque message attend TIMEOUT ; avec, les suivants reçoivent
+  l'excuse aussitôt et Rasa n'est plus sollicité ;
+- saturation : 10 places par serveur pour --concurrence messages en vol.
+  Sans attente bornée la file s'allonge, avec QUEUE_TIMEOUT le surplus est
+  refusé vite (BackendIndisponible, 503 pour la vue) et les messages acceptés gardent leur latence ;
+- queue de latence : deux serveurs dont 5 % des réponses sont 20 fois plus
+  lentes. HEDGING relance vers le second serveur après le p95.
+"""
+import argparse
+import asyncio
+import contextlib
+import time
+import uuid
+
+import aiohttp
+
+from _common import percentile
+from bench_chat_proxy import PORT, stats_rasa, stub_rasa
+
+from django.conf import settings
+
+from App import rasa_client
+
+WEBHOOK = "http://127.0.0.1:{}/webhooks/rest/webhook"
+
+
+async def charge(nb_requetes, concurrence):
+    limite = asyncio.Semaphore(concurrence)
+    latences, refus = [], []
+
+    async def appel(i):
+        async with limite:
+            debut = time.perf_counter()
+            try:
+                # Un sender par message : les messages se répartissent sur l'anneau
+                await rasa_client.envoyer(uuid.uuid4().hex, f"bonjour {i}")
+                latences.append(time.perf_counter() - debut)
+            except (rasa_client.BackendIndisponible, aiohttp.ClientError, asyncio.TimeoutError):
+                # Ce que la vue chat/ transforme en excuse (503) ou en erreur (500)
+                refus.append(time.perf_counter() - debut)
+
+    debut = time.perf_counter()
+    try:
+        await asyncio.gather(*(appel(i) for i in range(nb_requetes)))
+    finally:
+        await rasa_client.fermer()
+    return latences, refus, time.perf_counter() - debut
+
+
+def scenario(nom, reglages, nb_requetes, concurrence, ports=(PORT,)):
+    settings.RASA = {"SERVERS": [WEBHOOK.format(port) for port in ports], **reglages}
+    rasa_client._backends.clear()
+    rasa_client._relances.update(lancees=0, gagnees=0)
+    latences, refus, total = asyncio.run(charge(nb_requetes, concurrence))
+    recues = sum(stats_rasa(port=port)["requetes"] for port in ports)
+    for port in ports:
+        stats_rasa(reset=True, port=port)
+
+    def ms(valeurs, p):
+        return f"{percentile(valeurs, p) * 1000:7.1f}" if valeurs else "      -"
+
+    print(f"{nom:>28} | ok p50 {ms(latences, 50)} ms p99 {ms(latences, 99)} ms | "
+          f"{len(refus):4d} échecs (p50 {ms(refus, 50)} ms) | {total:5.1f} s | "
+          f"{recues:5d} requêtes Rasa | relances {rasa_client._relances['lancees']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("nb_requetes", type=int, nargs="?", default=2000)
+    parser.add_argument("--concurrence", type=int, default=200)
+    args = parser.parse_args()
+    n, c = args.nb_requetes, args.concurrence
+
+    # Panne : quelques conversations à la fois, pour que le disjoncteur ait le temps de s'ouvrir
+    with stub_rasa(5.0):
+        sans_disjoncteur = {"TIMEOUT": 0.5, "BREAKER_THRESHOLD": n + 1}
+        scenario("panne, sans disjoncteur", sans_disjoncteur, n // 10, 10)
+        scenario("panne, disjoncteur", {"TIMEOUT": 0.5}, n // 10, 10)
+
+    with stub_rasa(0.1):
+        scenario("saturation, file sans borne", {"POOL_SIZE": 10, "QUEUE_TIMEOUT": 3600}, n, c)
+        scenario("saturation, QUEUE_TIMEOUT 0.2", {"POOL_SIZE": 10, "QUEUE_TIMEOUT": 0.2}, n, c)
+
+    with contextlib.ExitStack() as pile:
+        for port in (PORT, PORT + 1):
+            pile.enter_context(stub_rasa(0.02, port=port, lents=0.05))
+        scenario("queue, sans relance", {}, n, c // 4, ports=(PORT, PORT + 1))
+        scenario("queue, HEDGING", {"HEDGING": True}, n, c // 4, ports=(PORT, PORT + 1))
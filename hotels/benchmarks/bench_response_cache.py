@@ -0,0 +1,101 @@
+"""
+Cache de réponses : chat/ avec et sans RESPONSE_CACHE, sur des messages fréquents.
+
+    python benchmarks/bench_response_cache.py [nb_conversations] [--concurrence 50] [--delai 0.05] [--capacite 4]
+                                               [--uniques 0.2] [--flux]
+
+Chaque conversation envoie 1 à 3 messages, tirés selon une loi de Zipf
+parmi des messages courants écrits de plusieurs façons (« Bonjour »,
+« bonjour  », « hôtels à Paris », « HOTELS A PARIS »…) ; --uniques est la
+part de messages jamais vus. Le faux Rasa traite --capacite messages à la
+fois, --delai secondes chacun (NLU, politiques, actions), et tient un
+tracker minimal (slot ville). On compte les messages traités par
+Rasa et les événements ajoutés aux trackers par les hits. Avec --flux, les
+messages passent par chat/stream/ (server-sent events) au lieu de chat/.
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from _common import base_de_test, percentile
+from bench_chat_proxy import PORT, stats_rasa, stub_rasa
+
+from django.conf import settings
+from django.test import AsyncClient
+from django.test.utils import setup_test_environment
+
+from App import rasa_client, response_cache
+
+COURANTS = [
+    ("Bonjour", "bonjour", "BONJOUR !"),
+    ("hôtels à Paris", "Hotels a paris", "HÔTELS À  PARIS"),
+    ("pas cher", "Pas cher", "pas  cher"),
+    ("hôtels à Lyon", "hotels a lyon"),
+    ("merci", "Merci"),
+    ("pour 2 personnes", "Pour 2 personnes"),
+    ("au revoir", "Au revoir"),
+    ("hôtels à Nice", "hotels à nice"),
+]
+
+
+def messages(generateur, nb, uniques):
+    poids = [1 / (rang + 1) for rang in range(len(COURANTS))]
+    for _ in range(nb):
+        if generateur.random() < uniques:
+            yield f"question {generateur.random():.12f}"
+        else:
+            yield generateur.choice(generateur.choices(COURANTS, poids)[0])
+
+
+async def charge(nb_conversations, concurrence, uniques, vue="/chat/"):
+    generateur = random.Random(42)
+    conversations = [list(messages(generateur, generateur.randint(1, 3), uniques)) for _ in range(nb_conversations)]
+    limite = asyncio.Semaphore(concurrence)
+    latences = []
+
+    async def conversation(textes):
+        async with limite:
+            client = AsyncClient()
+            for texte in textes:
+                debut = time.perf_counter()
+                reponse = await client.post(vue, {"message": texte})
+                assert reponse.status_code == 200, reponse.content
+                if reponse.streaming:
+                    corps = b"".join([morceau async for morceau in reponse.streaming_content])
+                    assert b"event: erreur" not in corps, corps
+                latences.append(time.perf_counter() - debut)
+
+    debut = time.perf_counter()
+    try:
+        await asyncio.gather(*(conversation(textes) for textes in conversations))
+    finally:
+        await rasa_client.fermer()
+    return latences, time.perf_counter() - debut
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("nb_conversations", type=int, nargs="?", default=2000)
+    parser.add_argument("--concurrence", type=int, default=50)
+    parser.add_argument("--delai", type=float, default=0.05)
+    parser.add_argument("--capacite", type=int, default=4)
+    parser.add_argument("--uniques", type=float, default=0.2)
+    parser.add_argument("--flux", action="store_true", help="chat/stream/ au lieu de chat/")
+    args = parser.parse_args()
+    vue = "/chat/stream/" if args.flux else "/chat/"
+
+    setup_test_environment()
+    settings.RASA = {**getattr(settings, "RASA", {}), "SERVERS": [f"http://127.0.0.1:{PORT}/webhooks/rest/webhook"]}
+    with base_de_test(), stub_rasa(args.delai, capacite=args.capacite):
+        for actif in (False, True):
+            settings.RESPONSE_CACHE = {**getattr(settings, "RESPONSE_CACHE", {}), "ENABLED": actif}
+            latences, total = asyncio.run(charge(args.nb_conversations, args.concurrence, args.uniques, vue))
+            rasa = stats_rasa()
+            stats_rasa(reset=True)
+            cache = response_cache.stats() if actif else None
+            print(f"{'cache' if actif else 'sans cache':>10} | {len(latences)} messages | "
+                  f"p50 {percentile(latences, 50) * 1000:6.1f} ms | p99 {percentile(latences, 99) * 1000:6.1f} ms | "
+                  f"{len(latences) / total:5.0f} msg/s | {rasa['requetes']} messages traités par Rasa | "
+                  f"{rasa['ajouts']} événements rejoués"
+                  + (f" | taux de hits {cache['taux_hits']:.0%}" if cache else ""))
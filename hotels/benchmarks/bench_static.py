@@ -0,0 +1,90 @@
+"""
+Pages d'accueil et de chat : octets transférés et rendu des gabarits.
+
+    python benchmarks/bench_static.py [--rendus 2000]
+
+collectstatic est lancé dans un dossier temporaire (CompressedManifestStorage),
+puis les pages sont demandées au client de test comme par un navigateur
+qui accepte gzip (et br si le paquet brotli est installé) :
+- première visite : HTML + CSS/JS en variante précompressée ;
+- visite suivante : HTML seul, les fichiers hachés sont en cache (immutable) ;
+- « en ligne » : ce que coûtait chaque visite quand CSS et JS étaient dans
+  le HTML, servi sans compression (la page se retéléchargeait en entier).
+
+Le HTML, dynamique, n'est compressé que par le serveur web devant Django
+(gzip on dans nginx) : sa taille gzip est donnée à part.
+
+Le rendu compare le chargeur de gabarits en cache à une relecture du
+fichier à chaque requête.
+"""
+import argparse
+import gzip
+import re
+import time
+
+from _common import base_de_test, percentile, statiques_collectes
+
+from django.conf import settings
+from django.template import engines
+from django.test import Client, RequestFactory
+from django.test.utils import override_settings, setup_test_environment
+
+from App import storage
+
+PAGES = {"accueil": "/", "chat": "/chat-page/"}
+
+
+def transferts(client, chemin, encodage):
+    page = client.get(chemin, HTTP_ACCEPT_ENCODING=encodage)
+    html = page.content
+    fichiers = re.findall(rb'(?:href|src)="(/static/[^"]+)"', html)
+    actifs = [client.get(f.decode(), HTTP_ACCEPT_ENCODING=encodage) for f in fichiers]
+    brut = len(html) + sum(len(b"".join(r.streaming_content)) for r in
+                           (client.get(f.decode()) for f in fichiers))
+    envoyes = sum(len(b"".join(r.streaming_content)) for r in actifs)
+    html_gz = len(gzip.compress(html))
+    return {
+        "html": len(html), "html_gz": html_gz, "actifs": envoyes, "brut": brut,
+        "encodages": {r.get("Content-Encoding") or "identity" for r in actifs},
+        "immuables": all("immutable" in r.get("Cache-Control", "") for r in actifs),
+    }
+
+
+def rendus(nb, cache):
+    chargeurs = ["django.template.loaders.app_directories.Loader"]
+    if cache:
+        chargeurs = [("django.template.loaders.cached.Loader", chargeurs)]
+    options = {**settings.TEMPLATES[0]["OPTIONS"], "loaders": chargeurs}
+    gabarits = [{**settings.TEMPLATES[0], "OPTIONS": options}]
+    requete = RequestFactory().get("/chat-page/")
+    with override_settings(TEMPLATES=gabarits):
+        moteur = engines["django"]
+        durees = []
+        for _ in range(nb):
+            debut = time.perf_counter()
+            moteur.get_template("App/chat.html").render({}, requete)
+            durees.append(time.perf_counter() - debut)
+    return durees
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rendus", type=int, default=2000)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    encodage = "br, gzip" if storage.brotli is not None else "gzip"
+    # base_de_test : la page de chat enregistre une session
+    with base_de_test(), statiques_collectes():
+        client = Client()
+        for nom, chemin in PAGES.items():
+            t = transferts(client, chemin, encodage)
+            print(f"{nom:>8} | en ligne {t['brut']:6d} o par visite | "
+                  f"première visite {t['html'] + t['actifs']:6d} o | suivante {t['html']:5d} o "
+                  f"({t['html_gz']} o avec gzip nginx) | "
+                  f"actifs {'/'.join(sorted(t['encodages']))}{', immutable' if t['immuables'] else ''}")
+
+    for cache in (False, True):
+        durees = rendus(args.rendus, cache)
+        print(f"{'cached.Loader' if cache else 'sans cache':>13} | {args.rendus} rendus de chat.html | "
+              f"p50 {percentile(durees, 50) * 1e6:6.0f} µs | p99 {percentile(durees, 99) * 1e6:6.0f} µs")
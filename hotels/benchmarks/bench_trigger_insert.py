@@ -0,0 +1,72 @@
+"""
+Débit d'insertion dans Occupation avec le trigger C2, avant et après 0004.
+
+    python benchmarks/bench_trigger_insert.py [10000 50000 100000 200000]
+
+« avant » : trigger BETWEEN de 0003 sans index composite ;
+« après » : trigger semi-ouvert de 0004 avec l'index (num_ch_id, date_a, date_d).
+Pour chaque taille de table, on mesure l'insertion ligne à ligne de
+NB_INSERTIONS occupations (une transaction, un déclenchement par ligne).
+"""
+import sys
+import time
+from importlib import import_module
+from itertools import islice
+
+from _common import base_de_test, occupations_synthetiques, peupler_catalogue
+
+from django.db import connection, transaction
+
+NB_INSERTIONS = 2000
+CHAMBRES_PAR_TYPE = 20
+
+C2_AVANT = import_module("App.migrations.0003_triggers").C2_TRIGGER
+C2_APRES = import_module("App.migrations.0004_occupation_overlap_index").C2_TRIGGER
+
+INSERT = "INSERT INTO Occupation (num_cl_id, num_ho_id, num_ch_id, date_a, date_d) VALUES (%s, %s, %s, %s, %s)"
+
+
+def inserer(lignes):
+    adapt = connection.ops.adapt_datetimefield_value
+    params = [(cl, ho, ch, adapt(a), adapt(d)) for cl, ho, ch, a, d in lignes]
+    debut = time.perf_counter()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(INSERT, params)
+    return len(params) / (time.perf_counter() - debut)
+
+
+def bench(mode, tailles):
+    with base_de_test():
+        chambres = peupler_catalogue(1, CHAMBRES_PAR_TYPE)
+        # Écart d'au moins un jour : l'ancien trigger refuse les séjours bout à bout
+        flux = occupations_synthetiques(chambres, sum(tailles) + NB_INSERTIONS * len(tailles), ecart_min=1)
+        with connection.cursor() as cursor:
+            if mode == "avant":
+                cursor.execute("DROP INDEX IF EXISTS occupation_chambre_dates")
+        taille_courante = 0
+        for taille in tailles:
+            # Remplissage sans trigger jusqu'à la taille visée
+            charger_occupations_depuis(flux, taille - taille_courante)
+            with connection.cursor() as cursor:
+                cursor.execute(C2_AVANT if mode == "avant" else C2_APRES)
+            debit = inserer(islice(flux, NB_INSERTIONS))
+            taille_courante = taille + NB_INSERTIONS
+            print(f"{mode:>5} | {taille:>8} lignes existantes | {debit:>10.0f} lignes/s")
+
+
+def charger_occupations_depuis(flux, nombre):
+    from App.models import Occupation
+
+    with connection.cursor() as cursor:
+        cursor.execute("DROP TRIGGER IF EXISTS check_occupation_overlap")
+    Occupation.objects.bulk_create(
+        (Occupation(num_cl_id=cl, num_ho_id=ho, num_ch_id=ch, date_a=a, date_d=d)
+         for cl, ho, ch, a, d in islice(flux, max(0, nombre))),
+        batch_size=10000,
+    )
+
+
+if __name__ == "__main__":
+    tailles = [int(n) for n in sys.argv[1:]] or [10_000, 50_000, 100_000, 200_000]
+    for mode in ("avant", "apres"):
+        bench(mode, tailles)
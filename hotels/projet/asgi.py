@@ -13,4 +13,17 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'projet.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Après get_asgi_application() : Django doit être initialisé
+from App.websocket import CHEMIN, chat_socket  # noqa: E402
+
+
+async def application(scope, receive, send):
+    # Django ne traite pas les WebSockets : le chat (/ws/chat/) est servi directement
+    if scope["type"] == "websocket":
+        if scope["path"] == CHEMIN:
+            return await chat_socket(scope, receive, send)
+        await receive()
+        return await send({"type": "websocket.close", "code": 4004})
+    return await django_application(scope, receive, send)
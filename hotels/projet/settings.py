@@ -56,13 +56,19 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Gabarits compilés une fois par processus, y compris en DEBUG
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
@@ -117,7 +123,102 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# collectstatic : noms hachés + variantes .gz/.br en production (STORAGES de settings_prod.py)
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Pages d'accueil et de chat rendues une fois, servies avec ETag / 304 (App/page_cache.py)
+
+PAGE_CACHE = {
+    'ENABLED': False,
+}
+
+
+# Cache des disponibilités (App/availability_cache.py)
+
+AVAILABILITY_CACHE = {
+    'MAX_BYTES': 16 * 1024 * 1024,
+    'TIMEOUT': 60,
+}
+
+
+# Serveur Rasa (App/rasa_client.py)
+
+RASA = {
+    # Conversations réparties par hachage cohérent du sender
+    'SERVERS': [
+        'http://localhost:5005/webhooks/rest/webhook',
+    ],
+    'TIMEOUT': 30,
+    'CONNECT_TIMEOUT': 2,
+    'POOL_SIZE': 100,
+    'QUEUE_TIMEOUT': 2,
+    'BREAKER_THRESHOLD': 5,
+    'BREAKER_RESET': 10,
+    # Relance vers le serveur suivant après le p95 : seulement avec un tracker store partagé
+    'HEDGING': False,
+    'HEDGE_DELAY': 0.5,
+    # API HTTP de Rasa (rasa run --enable-api --auth-token), lue par le cache de réponses
+    'API_TOKEN': None,
+}
+
+# Réponses du bot en cache, par texte normalisé, slots et version des données (voir App/response_cache.py)
+RESPONSE_CACHE = {
+    'ENABLED': False,
+    'MAX_ENTRIES': 10000,
+    'TIMEOUT': 300,
+    'SLOTS': ['ville', 'prix', 'personnes'],
+    'VERSION_TTL': 0.5,
+}
+
+# Analyse NLU par lots avant l'envoi à Rasa (voir App/nlu_gateway.py)
+NLU_GATEWAY = {
+    'ENABLED': False,
+    'MODEL': BASE_DIR / 'models',
+    'WORKERS': 1,
+    'WINDOW_MS': 5,
+    'MAX_BATCH': 32,
+    'TIMEOUT': 1,
+}
+
+# Requêtes des actions Rasa, en parallèle sur un pool de connexions asynchrones (voir actions/depot.py)
+ACTIONS_DB = {
+    'POOL_SIZE': 8,
+}
+
+# Catalogue en mémoire du serveur d'actions, rechargé quand sa version change (voir actions/catalogue.py)
+CATALOGUE = {
+    'VERSION_TTL': 1.0,
+    # Hôtels listés au plus par réponse de recherche par prix
+    'PAGE_SIZE': 10,
+}
+
+# Journal JSON des tours de chat, écrit hors de la requête (voir App/chat_log.py)
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {'()': 'App.chat_log.JsonFormatter'},
+    },
+    'filters': {
+        # taux : part des conversations journalisées ; les tours lents ou en erreur le sont toujours
+        'echantillon': {'()': 'App.chat_log.Echantillonnage', 'taux': 1.0, 'lent_ms': 2000},
+    },
+    'handlers': {
+        'chat_json': {
+            '()': 'App.chat_log.QueueJsonHandler',
+            'formatter': 'json',
+            'filters': ['echantillon'],
+            'fichier': None,        # None : sortie standard
+            'taille_file': 10000,
+        },
+    },
+    'loggers': {
+        'App.chat': {'handlers': ['chat_json'], 'level': 'INFO', 'propagate': False},
+    },
+}
@@ -0,0 +1,30 @@
+"""
+Réglages de production, par-dessus settings.py.
+
+    DJANGO_SETTINGS_MODULE=projet.settings_prod DJANGO_SECRET_KEY=... \
+        DJANGO_ALLOWED_HOSTS=hotel.example.com uvicorn projet.asgi:application
+
+Avant le premier démarrage : python manage.py collectstatic --settings=projet.settings_prod
+"""
+import os
+
+from .settings import *  # noqa: F401,F403
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = os.environ['DJANGO_SECRET_KEY']
+
+DEBUG = False
+
+ALLOWED_HOSTS = os.environ.get('DJANGO_ALLOWED_HOSTS', 'localhost').split(',')
+
+# Noms hachés + variantes .gz/.br écrits par collectstatic (voir App/storage.py)
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'App.storage.CompressedManifestStorage'},
+}
+
+# Gabarits compilés une fois par processus (chargeur en cache, voir settings.TEMPLATES)
+# et pages statiques rendues une seule fois, servies avec ETag / 304
+PAGE_CACHE = {
+    'ENABLED': True,
+}
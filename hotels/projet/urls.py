@@ -15,7 +15,7 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path
+from django.urls import path, re_path
 from App import views as app_views
 
 urlpatterns = [
@@ -23,4 +23,11 @@ urlpatterns = [
     path('', app_views.home, name='home'),
     path('chat-page/', app_views.chat_page, name='chat_page'),  # Nouvelle page
     path('chat/', app_views.chat_with_rasa, name='chat_with_rasa'),
+    path('chat/stream/', app_views.chat_stream, name='chat_stream'),
+    path('chat/metriques/', app_views.chat_metriques, name='chat_metriques'),
+    path('disponibilites/', app_views.disponibilites, name='disponibilites'),
+    path('disponibilites/cache/', app_views.disponibilites_cache, name='disponibilites_cache'),
+    path('occupation/', app_views.occupation, name='occupation'),
+    # Statiques sans serveur web devant (voir App/storage.py) ; nginx les sert avant Django sinon
+    re_path(r'^static/(?P<chemin>.+)$', app_views.statique, name='statique'),
 ]